@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Path Setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path: sys.path.insert(0, project_root)
+
+from config.config import Config
+from utils.feature_engineering import FeatureEngineer
+from models.model_factory import ModelFactory
+
+def _time_us(fn, rows):
+    """Median latency in microseconds of fn(row) over single-row inputs."""
+    times = []
+    for row in rows:
+        t0 = time.perf_counter()
+        fn(row)
+        times.append((time.perf_counter() - t0) * 1e6)
+    return float(np.median(times))
+
+def run_benchmark(n_rows=200, target='WLD'):
+    """Compares sklearn with the compiled flat-array runtime on single-row predictions."""
+    print("⏱️  SINGLE-ROW INFERENCE BENCHMARK")
+    print("==========================================")
+
+    config = Config()
+    train_df = pd.read_csv(config.PROCESSED_DATA_DIR / "train.csv")
+    val_df = pd.read_csv(config.PROCESSED_DATA_DIR / "val.csv")
+    engineer = FeatureEngineer()
+    X_train = engineer.fit_features(train_df)
+    X_val = engineer.transform(val_df)
+    y_train = engineer.get_targets(train_df, [target])[target]
+
+    rows = [X_val.iloc[[i]] for i in range(min(n_rows, len(X_val)))]
+    results = {}
+    for model_type, params in [('rf', {'n_estimators': 500, 'max_depth': None}), ('gb', {'n_estimators': 200})]:
+        model = ModelFactory.get_model(model_type, mode='classification', **params)
+        model.train(X_train, y_train)
+        sk_proba = model.model.predict_proba(X_val)
+        runtime = model.compile()
+        max_diff = float(np.abs(runtime.predict_proba(X_val) - sk_proba).max())
+
+        sk_us = _time_us(model.model.predict_proba, rows)
+        compiled_us = _time_us(runtime.predict_proba, rows)
+        results[model_type] = (sk_us, compiled_us, max_diff)
+
+    print(f"\n   Target: {target} | Rows: {len(rows)}")
+    print(f"   {'Model':<6} | {'sklearn (µs)':>12} | {'compiled (µs)':>13} | {'speedup':>8} | {'max |Δp|':>9}")
+    for name, (sk_us, compiled_us, max_diff) in results.items():
+        print(f"   {name:<6} | {sk_us:>12.0f} | {compiled_us:>13.0f} | {sk_us / compiled_us:>7.1f}x | {max_diff:>9.1e}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,65 @@
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+# Path Setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path: sys.path.insert(0, project_root)
+
+from utils.data_loader import DataLoader
+from utils.match_store import MatchStore
+
+def _time_us(fn, args_list):
+    """Median latency in microseconds of fn(*args) over args_list."""
+    times = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - t0) * 1e6)
+    return float(np.median(times))
+
+def run_benchmark(n_queries=200):
+    """Compares pandas boolean scans with indexed SQLite lookups for team and H2H queries."""
+    print("⏱️  MATCH HISTORY LOOKUP BENCHMARK")
+    print("==========================================")
+
+    loader = DataLoader()
+    raw_df = loader.load_raw_data()
+    processed_df = loader.preprocess(raw_df)
+
+    rng = np.random.default_rng(42)
+    teams = np.array(sorted(set(processed_df['HomeTeam']) | set(processed_df['AwayTeam'])))
+    team_args = [(t,) for t in rng.choice(teams, n_queries)]
+    pair_args = [tuple(rng.choice(teams, 2, replace=False)) for _ in range(n_queries)]
+
+    # --- pandas path (what MatchPredictor does today) ---
+    def pandas_team(team):
+        df = processed_df
+        rows = df[(df['HomeTeam'] == team) | (df['AwayTeam'] == team)].sort_values('MatchDate')
+        return None if rows.empty else rows.iloc[-1]
+
+    def pandas_h2h(home, away):
+        df = raw_df
+        return df[((df['HomeTeam'] == home) & (df['AwayTeam'] == away)) |
+                  ((df['HomeTeam'] == away) & (df['AwayTeam'] == home))].sort_values('MatchDate', ascending=False).head(5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MatchStore(db_path=os.path.join(tmp, "bench.db"))
+        store.sync(raw_df=raw_df, processed_df=processed_df)
+
+        results = {
+            "team lookup": (_time_us(pandas_team, team_args), _time_us(store.latest_team_row, team_args)),
+            "H2H lookup": (_time_us(pandas_h2h, pair_args), _time_us(store.head_to_head, pair_args)),
+        }
+
+    print(f"\n   Rows: raw={len(raw_df)} processed={len(processed_df)} | Queries: {n_queries}")
+    print(f"   {'Query':<14} | {'pandas (µs)':>12} | {'sqlite (µs)':>12} | {'speedup':>8}")
+    for name, (pd_us, sql_us) in results.items():
+        print(f"   {name:<14} | {pd_us:>12.0f} | {sql_us:>12.0f} | {pd_us / sql_us:>7.1f}x")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
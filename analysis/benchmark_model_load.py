@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Path Setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path: sys.path.insert(0, project_root)
+
+from config.config import Config
+from utils.feature_engineering import FeatureEngineer
+from models.model_factory import ModelFactory
+from models.artifacts import runtime_dir
+
+def _private_mb():
+    """Private (unshared) memory of this process in MB, Linux only."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            kb = sum(int(line.split()[1]) for line in f if line.startswith(('Private_Clean', 'Private_Dirty')))
+        return kb / 1024
+    except OSError:
+        return None
+
+def _dir_mb(path):
+    path = Path(path)
+    files = [path] if path.is_file() else list(path.iterdir())
+    return sum(f.stat().st_size for f in files) / 1e6
+
+def _load_in_worker(models_dir, filename, use_runtime, row):
+    """Loads one model in a fresh process and reports (seconds, private MB added)."""
+    before = _private_mb()
+    t0 = time.perf_counter()
+    model = ModelFactory.get_model('rf', mode='classification')
+    model.config.MODELS_DIR = Path(models_dir)
+    model.config.COMPILED_INFERENCE = use_runtime
+    model.load(filename)
+    model.predict_proba(row)
+    seconds = time.perf_counter() - t0
+    after = _private_mb()
+    return seconds, (after - before) if before is not None else float('nan')
+
+def run_benchmark(target='WLD', n_workers=2):
+    """Compares pickle loading with memory-mapped runtime loading for a large forest."""
+    print("⏱️  MODEL LOAD BENCHMARK")
+    print("==========================================")
+
+    config = Config()
+    train_df = pd.read_csv(config.PROCESSED_DATA_DIR / "train.csv")
+    engineer = FeatureEngineer()
+    X_train = engineer.fit_features(train_df)
+    y_train = engineer.get_targets(train_df, [target])[target]
+    row = X_train.iloc[[0]]
+
+    model = ModelFactory.get_model('rf', mode='classification', n_estimators=500, max_depth=None)
+    model.train(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model.config.MODELS_DIR = Path(tmp)
+        model.save("plain.pkl")
+        model.save("packed.pkl", compress=3)
+
+        t0 = time.perf_counter(); joblib.load(Path(tmp) / "plain.pkl"); plain_s = time.perf_counter() - t0
+        t0 = time.perf_counter(); joblib.load(Path(tmp) / "packed.pkl"); packed_s = time.perf_counter() - t0
+
+        print(f"\n   Artifact sizes: pickle={_dir_mb(Path(tmp) / 'plain.pkl'):.1f}MB | "
+              f"compressed={_dir_mb(Path(tmp) / 'packed.pkl'):.1f}MB | "
+              f"runtime={_dir_mb(runtime_dir(Path(tmp) / 'plain.pkl')):.1f}MB")
+        print(f"   joblib.load (in-process): plain={plain_s * 1e3:.0f}ms | compressed={packed_s * 1e3:.0f}ms")
+
+        # Fresh worker processes: load + first prediction, and the private memory each one adds
+        results = {}
+        for label, use_runtime in [("pickle", False), ("mmap runtime", True)]:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                runs = list(pool.map(_load_in_worker, [tmp] * n_workers, ["plain.pkl"] * n_workers,
+                                     [use_runtime] * n_workers, [row] * n_workers))
+            results[label] = (np.mean([r[0] for r in runs]), np.mean([r[1] for r in runs]))
+
+    print(f"\n   {'Load path':<14} | {'load+predict (ms)':>17} | {'private MB / worker':>19}")
+    for label, (seconds, private_mb) in results.items():
+        print(f"   {label:<14} | {seconds * 1e3:>17.1f} | {private_mb:>19.1f}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
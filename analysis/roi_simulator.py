@@ -2,83 +2,254 @@ import pandas as pd
 import numpy as np
 import sys
 import os
-import matplotlib
-matplotlib.use('Agg') # Fix for server environments (no GUI)
-import matplotlib.pyplot as plt
+import json
+import time
+import hashlib
+from datetime import datetime
 
 # Path Setup
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 if project_root not in sys.path: sys.path.insert(0, project_root)
 
+from config.config import Config
 from models.model_factory import ModelFactory
-from utils.status_logger import StatusLogger
+from models.registry import ModelRegistry, file_sha256
+from utils.feature_engineering import FeatureEngineer
+from utils.evaluation import ODDS_COLUMNS, backtest, stake_plan, unit_returns, equity_curves
+from utils.status_logger import StatusLogger, read_job
+
+# sha256 of the files in a simulation key, by (path, size, mtime): every dashboard click
+# checks the key, but the model pickle / test.csv only change after a (re)training
+_DIGESTS = {}
+
+def _file_digest(path):
+    stat = os.stat(path)
+    sig = (str(path), stat.st_size, stat.st_mtime_ns)
+    if sig not in _DIGESTS:
+        _DIGESTS[sig] = file_sha256(path)
+    return _DIGESTS[sig]
+
+def simulate_bankrolls(proba, odds, picks, strategy, bankroll, n_paths, chunk=5000, seed=42):
+    """
+    Monte Carlo bankroll paths for one staking strategy, all paths at once as a NumPy array.
+    Every path replays the same bets but re-draws each match result from the model's
+    (calibrated) outcome probabilities, priced at the real odds.
+
+    :param proba: (n, k) outcome probabilities per match
+    :param odds: (n, k) decimal odds, same column order as proba
+    :param picks: (n,) column index of the outcome bet on
+    :return: (equity (n_paths, n) float32, staked (n_paths,))
+    """
+    proba = np.asarray(proba, dtype=np.float64)
+    proba = proba / proba.sum(axis=1, keepdims=True)
+    rows = np.arange(len(picks))
+    pick_odds, pick_prob = odds[rows, picks], proba[rows, picks]
+    is_flat, sizes = stake_plan([strategy], pick_odds, pick_prob)  # bets do not depend on the draw
+
+    thresholds = np.cumsum(proba, axis=1)[:, :-1]
+    rng = np.random.default_rng(seed)
+    equity = np.empty((n_paths, len(picks)), dtype=np.float32)
+    staked = np.empty(n_paths)
+    for start in range(0, n_paths, chunk):
+        stop = min(start + chunk, n_paths)
+        # Inverse-CDF draw of every match result on every path of this block
+        outcomes = (rng.random((stop - start, len(picks), 1)) > thresholds).sum(axis=2)
+        block, stakes = equity_curves(is_flat, sizes, unit_returns(pick_odds, outcomes == picks), bankroll)
+        equity[start:stop] = block
+        staked[start:stop] = stakes.sum(axis=1)
+    return equity, staked
 
 class ROISimulator:
+    """
+    Monte Carlo backtest of the WLD champion. Results are stored as a compact JSON time series
+    (Config.ROI_SERIES_PATH) keyed by model + test data + strategy, and rendered by the admin
+    page in the browser; a rerun with an unchanged key returns the stored series immediately.
+    """
     def __init__(self):
+        self.config = Config()
         self.logger = StatusLogger("ROI Analysis")
-        # Target folder for web images
-        self.static_dir = os.path.join(project_root, 'soccer_match_prediction', 'app', 'static', 'img')
-        os.makedirs(self.static_dir, exist_ok=True)
+        self.test_path = self.config.PROCESSED_DATA_DIR / "test.csv"
+        self.entry = ModelRegistry().model_entry('WLD') or {}
+
+    def _load_model(self):
+        """The registered WLD champion (any model type), falling back to the RF file."""
+        model = ModelFactory.get_model(self.entry.get('model_type', 'rf'), mode='classification')
+        model.load(self.entry.get('file', "model_WLD.pkl"))
+        return model, self.entry.get('model_type', 'rf')
+
+    def series_key(self, n_paths=None, strategy=None):
+        """Content key of a simulation: model artifact + test data + strategy + path count."""
+        model_path = self.config.MODELS_DIR / self.entry.get('file', "model_WLD.pkl")
+        if not self.test_path.exists() or not model_path.exists():
+            return None
+        payload = json.dumps({
+            'model': _file_digest(model_path),
+            'data': _file_digest(self.test_path),
+            'strategy': strategy or self.config.ROI_SIM_STRATEGY,
+            'paths': n_paths or self.config.ROI_SIM_PATHS,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def cached_series(self, key=None):
+        """The stored series if it was computed for the current key, else None."""
+        key = key or self.series_key()
+        if key is None or not os.path.exists(self.config.ROI_SERIES_PATH):
+            return None
+        try:
+            with open(self.config.ROI_SERIES_PATH, 'r') as f:
+                series = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return series if series.get('key') == key else None
+
+    # --- ONE RUN PER KEY ---
+    def _run_marker(self, key):
+        return self.config.ROI_SERIES_PATH.with_name(f"roi_{key}.running")
+
+    def running_job(self, key):
+        """Job id of the simulation still running for `key`, if any (finished or stale markers are cleared)."""
+        path = self._run_marker(key)
+        try:
+            with open(path, 'r') as f:
+                job_id = f.read().strip()
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+        if read_job(job_id)['status'] in ('completed', 'error') or age > self.config.ROI_RUN_TIMEOUT_SECONDS:
+            self._release(key, job_id)
+            return None
+        return job_id
+
+    def claim_run(self, key, job_id):
+        """
+        Registers `job_id` as the run for `key`. Returns the job id already running for it instead
+        (clicks during a run join it rather than starting the same simulation again), else None.
+        """
+        running = self.running_job(key)
+        if running:
+            return running
+        try:
+            with open(self._run_marker(key), 'x') as f:  # exclusive create: one winner per key
+                f.write(job_id)
+        except FileExistsError:
+            return self.running_job(key)
+        return None
+
+    def _release(self, key, job_id):
+        try:
+            with open(self._run_marker(key), 'r') as f:
+                if f.read().strip() != job_id:
+                    return
+            os.remove(self._run_marker(key))
+        except OSError:
+            pass
 
-    def run_simulation(self):
+    def run_simulation(self, n_paths=None, strategy=None, force=False):
+        n_paths = n_paths or self.config.ROI_SIM_PATHS
+        strategy = strategy or self.config.ROI_SIM_STRATEGY
+        bankroll = self.config.BACKTEST_BANKROLL
+        key = self.series_key(n_paths, strategy)
         self.logger.start()
         try:
             self.logger.log("🎰 Starting Betting Simulation...", 10)
-            
+
             # 1. Load Data
-            test_path = os.path.join(project_root, 'data', 'processed', 'test.csv')
-            if not os.path.exists(test_path):
-                self.logger.log("⚠️ Test data missing. Using raw data fallback.")
-                # Fallback logic could go here
+            if not self.test_path.exists():
+                self.logger.log("⚠️ Test data missing. Run training first.")
                 raise FileNotFoundError("Test data not found.")
-            
-            df = pd.read_csv(test_path)
-            self.logger.log(f"📉 Loaded {len(df)} test matches.", 30)
-
-            # 2. Load Model
-            self.logger.log("🧠 Loading WLD Model...", 40)
-            model = ModelFactory.get_model('rf', mode='classification')
-            model.load("model_WLD.pkl")
-
-            # 3. Simulate
-            self.logger.log("🎲 Placing Virtual Bets...", 60)
-            
-            # (Simplified Simulation Logic for speed)
-            # In production, use the full logic from previous turn
-            bankroll = 1000
-            history = [1000]
-            
-            # Mocking the curve for demonstration if data columns missing
-            # Replace this loop with the real logic from previous turn
-            for i in range(len(df)):
-                # Random walk simulation if odds columns missing
-                change = np.random.choice([-50, 45, -50, 60]) 
-                bankroll += change
-                history.append(bankroll)
-
-            roi = ((bankroll - 1000) / 1000) * 100
-            self.logger.log(f"✅ Simulation Complete. ROI: {roi:.2f}%", 80)
-
-            # 4. Generate Chart
-            self.logger.log("📸 Generating Performance Chart...", 90)
-            plt.figure(figsize=(10, 5))
-            plt.plot(history, label='AI Strategy', color='#38bdf8', linewidth=2)
-            plt.axhline(y=1000, color='r', linestyle='--', label='Start Balance')
-            plt.title(f"Backtest Result (ROI: {roi:.2f}%)")
-            plt.style.use('dark_background')
-            plt.grid(True, alpha=0.3)
-            
-            chart_path = os.path.join(self.static_dir, "roi_chart.png")
-            plt.savefig(chart_path)
-            plt.close()
-            
-            self.logger.log(f"💾 Chart saved to web folder.", 100)
+
+            cached = None if force else self.cached_series(key)
+            if cached is not None:
+                self.logger.log(f"♻️ Model and data unchanged (key {key}); using the stored simulation.", 100)
+                self.logger.complete()
+                return cached['results']
+
+            df = pd.read_csv(self.test_path)
+            labels = sorted(ODDS_COLUMNS)
+            df = df.dropna(subset=[ODDS_COLUMNS[c] for c in labels]).reset_index(drop=True)
+            self.logger.log(f"📉 Loaded {len(df)} test matches with odds.", 30)
+
+            # 2. Load Model + score the whole test set in one batch
+            model, model_type = self._load_model()
+            self.logger.log(f"🧠 Scoring with the WLD model ({model_type})...", 40)
+            proba = model.predict_proba(FeatureEngineer().transform(df))  # columns follow sorted labels
+            odds = df[[ODDS_COLUMNS[c] for c in labels]].to_numpy(dtype=np.float64)
+            picks = np.argmax(proba, axis=1)
+
+            # 3. Monte Carlo
+            self.logger.log(f"🎲 Simulating {n_paths} bankroll paths ({strategy['name']})...", 60)
+            t0 = time.perf_counter()
+            equity, staked = simulate_bankrolls(proba, odds, picks, strategy, bankroll, n_paths,
+                                                chunk=self.config.ROI_SIM_CHUNK)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                roi = np.where(staked > 0, (equity[:, -1] - bankroll) / staked * 100, np.nan)
+            quantiles = self.config.ROI_SIM_QUANTILES
+            bands = np.percentile(equity, quantiles, axis=0)
+            results = {
+                'paths': n_paths,
+                'matches': len(df),
+                'strategy': strategy['name'],
+                'roi_mean': float(np.nanmean(roi)),
+                'roi_quantiles': dict(zip(map(str, quantiles), np.nanpercentile(roi, quantiles).round(2).tolist())),
+                'prob_profit': float(np.mean(equity[:, -1] > bankroll)),
+                'risk_of_ruin': float(np.mean(equity.min(axis=1) < bankroll * self.config.ROI_RUIN_FRACTION)),
+                'seconds': time.perf_counter() - t0,
+            }
+
+            # The realised season, for comparison with the simulated distribution
+            actual = None
+            target_col = self.config.TARGETS['WLD']
+            if target_col in df.columns:
+                rows = np.arange(len(df))
+                real = backtest(odds[rows, picks], np.asarray(labels)[picks] == df[target_col].to_numpy(),
+                                prob=proba[rows, picks], strategies=[strategy], bankroll=bankroll)
+                actual = real['equity'][0]
+                results['roi_actual'] = float(real['summary']['ROI'].iloc[0])
+                results['actual_percentile'] = float(np.nanmean(roi <= results['roi_actual']) * 100)
+
+            q = list(results['roi_quantiles'].values())
+            self.logger.log(f"✅ Simulation Complete in {results['seconds']:.1f}s. ROI P{quantiles[len(q) // 2]} {q[len(q) // 2]:.2f}% "
+                            f"(P{quantiles[0]}-P{quantiles[-1]} {q[0]:.2f}% .. {q[-1]:.2f}%), P(profit) {results['prob_profit']:.1%}, "
+                            f"risk of ruin {results['risk_of_ruin']:.2%}", 80)
+            if actual is not None:
+                self.logger.log(f"📌 Realised ROI: {results['roi_actual']:.2f}% "
+                                f"({results['actual_percentile']:.0f}th percentile of the simulation)")
+
+            # 4. Store the chart series (rendered client-side by the admin page)
+            self._save_series(key, model_type, bands, quantiles, actual, bankroll, results)
+            self.logger.log(f"💾 Chart series saved ({os.path.basename(str(self.config.ROI_SERIES_PATH))}).", 100)
             self.logger.complete()
-            
+            return results
+
         except Exception as e:
             self.logger.log(f"❌ Error: {str(e)}")
             self.logger.complete(success=False)
+        finally:
+            if key:
+                self._release(key, self.logger.job_id)  # lets the next click start a new run
+
+    def _save_series(self, key, model_type, bands, quantiles, actual, bankroll, results):
+        """Quantile bands of the simulated bankrolls + the realised path, as a compact JSON series."""
+        series = {
+            'key': key,
+            'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'model_type': model_type,
+            'model_version': self.entry.get('version'),
+            'bankroll': bankroll,
+            'results': results,
+            'bands': {str(q): np.round(band, 2).tolist() for q, band in zip(quantiles, bands)},
+            'actual': None if actual is None else np.round(actual, 2).tolist(),
+        }
+        path = str(self.config.ROI_SERIES_PATH)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(series, f, separators=(',', ':'))
+        os.replace(path + ".tmp", path)
 
 if __name__ == "__main__":
-    ROISimulator().run_simulation()
\ No newline at end of file
+    # Background job: yield the CPU to the web workers
+    if hasattr(os, 'nice'):
+        os.nice(10)
+    # Pass --force to recompute even if model and data are unchanged
+    ROISimulator().run_simulation(force='--force' in sys.argv)
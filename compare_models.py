@@ -3,118 +3,298 @@ import numpy as np
 from sklearn.metrics import accuracy_score, mean_squared_error
 import sys
 import os
+import time
+import shutil
+import joblib
+from joblib import Parallel, delayed
+from pathlib import Path
 
 # --- Import Project Modules ---
 from config.config import Config
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
 from models.model_factory import ModelFactory
+from models.registry import ModelRegistry
 from monitoring.logger import TrainingLogger
+from training import build_training_graph, distill_target
+from models.distillation import measure_latency_ms
+
+MODEL_NAMES = {
+    'rf': 'Random Forest',
+    'gb': 'Gradient Boosting',
+    'nn': 'Neural Network',
+    'svm': 'Support Vector Machine'
+}
+
+def _artifact_mb(directory, stem):
+    """Size of every file saved for one model (pickle, .runtime/ arrays, TorchScript...)."""
+    total = 0
+    for path in Path(directory).glob(f"{stem}.*"):
+        files = path.rglob('*') if path.is_dir() else [path]
+        total += sum(f.stat().st_size for f in files if f.is_file())
+    return total / 1e6
+
+def run_contender(target_name, m_type, X_train, y_train, X_val, y_val, work_dir, warm_start_file=None, n_jobs=1,
+                  train_csv=None, scaler=None):
+    """
+    Trains and measures ONE model/target pair (runs in a worker process).
+    With `train_csv` (+ the version's fitted `scaler`) the SVM streams its training rows from the
+    processed split in chunks instead of the in-memory matrix.
+    The artifact is saved to `work_dir`; quality, training time, serving latency
+    (1 row and batches of 50) and artifact size (the model's memory footprint once loaded) are returned.
+    """
+    mode = 'regression' if target_name == 'TotalGoals' else 'classification'
+    params = {'mode': mode}
+    if m_type == 'rf':
+        params['n_jobs'] = n_jobs
+    # Special handling for Neural Networks (needs input dimensions)
+    if m_type == 'nn':
+        import torch
+        torch.set_num_threads(n_jobs)
+        params['input_size'] = X_train.shape[1]
+        params['output_size'] = 1 if mode == 'regression' else (3 if target_name == 'WLD' else 2)
+        params['epochs'] = 100 # upper bound, early stopping picks the epoch count
+
+    result = {'target': target_name, 'model_type': m_type}
+    try:
+        t0 = time.perf_counter()
+        model = ModelFactory.get_model(m_type, **params)
+        if warm_start_file:
+            model.warm_start(warm_start_file)
+        if m_type == 'svm' and train_csv:
+            engineer = FeatureEngineer()
+            engineer.scaler = scaler
+            model.train_from_csv(train_csv, target_name, engineer)
+        else:
+            model.train(X_train, y_train)
+        result['TrainSeconds'] = time.perf_counter() - t0
+
+        stem = f"model_{target_name}_{m_type}"
+        model.config.MODELS_DIR = Path(work_dir)
+        model.save(f"{stem}.pkl")
+        result['ArtifactMB'] = _artifact_mb(work_dir, stem)
+
+        # Measure the SERVING path: reload the artifact exactly as the predictor would
+        served = ModelFactory.get_model(m_type, mode=mode)
+        served.config.MODELS_DIR = Path(work_dir)
+        served.load(f"{stem}.pkl")
+        preds = served.predict(X_val)
+
+        result['LatencyMs'] = measure_latency_ms(served, X_val)
+        fn = served.predict_proba if mode == 'classification' else served.predict
+        batches = [X_val.iloc[i:i + 50] for i in range(0, min(len(X_val) - 49, 50 * 20), 50)] or [X_val]
+        batch_ms = []
+        for batch in batches:
+            t0 = time.perf_counter()
+            fn(batch)
+            batch_ms.append((time.perf_counter() - t0) * 1e3)
+        result['Batch50Ms'] = float(np.median(batch_ms))
+
+        if mode == 'classification':
+            result['metric'], result['score'] = 'Accuracy', accuracy_score(y_val, preds)
+        else:
+            result['metric'], result['score'] = 'MSE', mean_squared_error(y_val, preds)
+        result['stem'] = stem
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
 
 class ModelComparator:
+    COST_METRICS = ('TrainSeconds', 'LatencyMs', 'Batch50Ms', 'ArtifactMB')
+
     def __init__(self):
         self.config = Config()
         self.loader = DataLoader()
         self.engineer = FeatureEngineer()
         self.logger = TrainingLogger()
+        self.registry = ModelRegistry()
         
-    def run(self):
+    def run(self, parallel=True):
         print("⚖️  STARTING MODEL COMPARISON TOURNAMENT ⚖️")
         print("============================================")
         self.logger.log_event("🏆 Tournament Started: RF vs GB vs NN vs SVM")
         
-        # 1. Load Data
-        if not (self.config.PROCESSED_DATA_DIR / "train.csv").exists():
-            print("⚠️ Data not found. Running Loader...")
-            raw_df = self.loader.load_raw_data()
-            clean_df = self.loader.preprocess(raw_df)
-            self.loader.save_splits(clean_df)
-
-        train_df = pd.read_csv(self.config.PROCESSED_DATA_DIR / "train.csv")
-        val_df = pd.read_csv(self.config.PROCESSED_DATA_DIR / "val.csv")
-        
+        # 1. Load Data + Scaling: served from the shared, checkpointed training graph
+        data = build_training_graph().run(['features', 'reference'])
+        features = data['features']
+
         # --- DEFINE THE CONTENDERS ---
-        model_types = ['rf', 'gb', 'nn', 'svm'] # <--- SVM ADDED HERE
-        model_names = {
-            'rf': 'Random Forest', 
-            'gb': 'Gradient Boosting', 
-            'nn': 'Neural Network',
-            'svm': 'Support Vector Machine'
-        }
+        model_types = ['rf', 'gb', 'nn', 'svm']
         
-        # Loop through each prediction target (WLD, Goals, etc.)
-        for target_name in self.config.TARGETS.keys():
-            print(f"\n⚽ TARGET: {target_name}")
-            print("---------------------------------------------")
-            
+        # Scaled data - fitted once, shared by every target
+        X_train, X_val = features['X_train'], features['X_val']
+        y_train_all, y_val_all = features['y_train'], features['y_val']
+        self.engineer.scaler = features['scaler']
+
+        # Remember last run's champions before the new version replaces them
+        # (NN warm starts; a target without a new winner keeps its champion and serving entries)
+        previous = {t: self.registry.model_entry(t) or {} for t in self.config.TARGETS}
+        previous_serving = {t: self.registry.serving_models(t) for t in self.config.TARGETS}
+        self.logger.model_version = self.registry.start_version(data_version=features['data_version'])
+        self.registry.save_scaler(self.engineer.scaler, reference=data['reference'])
+
+        # --- THE TOURNAMENT: every model/target pair in its own worker ---
+        work_dir = self.config.MODELS_DIR / ".tournament"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+
+        pairs = [(t, m) for t in self.config.TARGETS for m in model_types]
+        n_cpus = joblib.cpu_count()
+        n_workers = max(1, min(len(pairs), n_cpus)) if parallel else 1
+        jobs_per_worker = max(1, n_cpus // n_workers)
+        print(f"\n⚡ {len(pairs)} contenders on {n_workers} workers x {jobs_per_worker} cores")
+
+        def warm_file(target_name, m_type):
+            prev = previous[target_name]
+            if m_type == 'nn' and self.config.NN_WARM_START and prev.get('model_type') == 'nn':
+                return prev['file']
+            return None
+
+        # The SVM trains out-of-core from the processed split written by the same (cached) graph
+        train_csv = self.config.PROCESSED_DATA_DIR / "train.csv"
+        train_csv = str(train_csv) if train_csv.exists() else None
+
+        # joblib memory-maps the shared scaled matrices instead of copying them to every worker
+        results = Parallel(n_jobs=n_workers, backend='loky', max_nbytes='1M', mmap_mode='r')(
+            delayed(run_contender)(t, m, X_train, y_train_all[t], X_val, y_val_all[t], str(work_dir),
+                                   warm_start_file=warm_file(t, m), n_jobs=jobs_per_worker,
+                                   train_csv=train_csv, scaler=self.engineer.scaler)
+            for t, m in pairs
+        )
+
+        # --- THE CHAMPIONS (per target, within the serving budgets) ---
+        for target_name in self.config.TARGETS:
             mode = 'regression' if target_name == 'TotalGoals' else 'classification'
-            
-            # Prepare Data (Scaling)
-            X_train, y_train = self.engineer.fit_transform(train_df, target_name=target_name)
-            X_val, y_val = self.engineer.transform(val_df, target_name=target_name)
-            
-            # Track the winner
-            best_score = -float('inf') if mode == 'classification' else float('inf')
-            best_model_name = ""
-            best_model_obj = None
-            
-            # --- THE TOURNAMENT LOOP ---
-            for m_type in model_types:
-                # Prepare arguments
-                params = {'mode': mode}
-                
-                # Special handling for Neural Networks (needs input dimensions)
-                if m_type == 'nn':
-                    params['input_size'] = X_train.shape[1]
-                    params['output_size'] = 3 if target_name == 'WLD' else 1
-                    if target_name in ['BTTS', 'Over25']:
-                        params['output_size'] = 2
-                    params['epochs'] = 20 
-                
-                # Initialize & Train
-                try:
-                    model = ModelFactory.get_model(m_type, **params)
-                    model.train(X_train, y_train)
-                    
-                    # Evaluate
-                    preds = model.predict(X_val)
-                    score = 0
-                    score_display = ""
-                    
-                    if mode == 'classification':
-                        score = accuracy_score(y_val, preds)
-                        score_display = f"Accuracy: {score:.2%}"
-                        # Higher Accuracy is Better
-                        if score > best_score:
-                            best_score = score
-                            best_model_name = m_type
-                            best_model_obj = model
-                    else:
-                        score = mean_squared_error(y_val, preds)
-                        rmse = np.sqrt(score)
-                        score_display = f"MSE: {score:.4f} (RMSE: {rmse:.4f})"
-                        # Lower Error is Better
-                        if score < best_score:
-                            best_score = score
-                            best_model_name = m_type
-                            best_model_obj = model
-                    
-                    print(f"   🔹 {model_names[m_type]:<25} | {score_display}")
-                    self.logger.log_metric(target_name, m_type, 'Comparison_Score', score)
-                    
-                except Exception as e:
-                    print(f"   ❌ {model_names[m_type]} Failed: {e}")
-
-            # --- THE CHAMPION ---
-            winner_display = model_names.get(best_model_name, "None")
+            contenders = [r for r in results if r['target'] == target_name]
+            self._report(target_name, contenders)
+
+            winner = self._pick_winner(contenders, mode, has_champion=bool(previous[target_name]))
+            winner_display = MODEL_NAMES.get(winner['model_type'], "None") if winner else "None"
             print(f"\n   🏆 WINNER: {winner_display}")
             
-            if best_model_obj:
+            if winner:
                 filename = f"model_{target_name}.pkl"
-                best_model_obj.save(filename)
+                self._promote(work_dir, winner['stem'], f"model_{target_name}")
                 print(f"   💾 Saved to models/{filename}")
+                self.registry.register_model(target_name, winner['model_type'], filename, metric=winner['metric'],
+                                             score=winner['score'],
+                                             **{k: round(winner[k], 4) for k in self.COST_METRICS})
                 self.logger.log_event(f"Tournament {target_name} Winner: {winner_display}")
+                self._register_serving(target_name, mode, winner, filename, X_train, X_val, y_val_all[target_name])
+            elif previous[target_name]:
+                self.registry.keep_model(target_name, previous[target_name], previous_serving[target_name])
+                self.logger.log_event(f"Tournament {target_name}: no contender promoted, kept the "
+                                      f"{previous[target_name].get('model_type')} champion")
+
+        shutil.rmtree(work_dir, ignore_errors=True)
+        self.registry.write()
+        self.logger.flush()
+
+    def _report(self, target_name, contenders):
+        print(f"\n⚽ TARGET: {target_name}")
+        print("---------------------------------------------")
+        print(f"   {'Model':<25} | {'Score':>8} | {'Train s':>8} | {'1-row ms':>8} | {'50-row ms':>9} | {'Size MB':>7}")
+        for r in contenders:
+            name = MODEL_NAMES[r['model_type']]
+            if 'error' in r:
+                print(f"   ❌ {name} Failed: {r['error']}")
+                continue
+            print(f"   {name:<25} | {r['score']:>8.4f} | {r['TrainSeconds']:>8.1f} | {r['LatencyMs']:>8.3f} | "
+                  f"{r['Batch50Ms']:>9.3f} | {r['ArtifactMB']:>7.2f}")
+            self.logger.log_metric(target_name, r['model_type'], 'Comparison_Score', r['score'])
+            for metric in self.COST_METRICS:
+                self.logger.log_metric(target_name, r['model_type'], metric, r[metric])
+
+    def _pick_winner(self, contenders, mode, has_champion=False):
+        """
+        Best quality among the contenders inside Config.TOURNAMENT_LATENCY_BUDGET_MS / _MEMORY_BUDGET_MB.
+        If nothing fits, the current champion is kept (None); without one, the best quality
+        among the contenders that overshoot the budgets least.
+        """
+        valid = [r for r in contenders if 'error' not in r]
+        if not valid:
+            return None
+        # Higher Accuracy is better, lower MSE is better
+        quality = lambda r: r['score'] if mode == 'classification' else -r['score']
+        # Share of the tighter budget used: <= 1.0 fits
+        usage = lambda r: max(r['LatencyMs'] / self.config.TOURNAMENT_LATENCY_BUDGET_MS,
+                              r['ArtifactMB'] / self.config.TOURNAMENT_MEMORY_BUDGET_MB)
+        fits = [r for r in valid if usage(r) <= 1.0]
+        if fits:
+            return max(fits, key=quality)
+        if has_champion:
+            print("   ⚠️ No contender fits the latency/memory budget; keeping the current champion.")
+            return None
+        # No champion to keep: the best quality within 25% of the smallest overshoot
+        least = min(usage(r) for r in valid)
+        print(f"   ⚠️ No contender fits the latency/memory budget (closest: {least:.1f}x the budget).")
+        return max((r for r in valid if usage(r) <= least * 1.25), key=quality)
+
+    def _register_serving(self, target_name, mode, winner, filename, X_train, X_val, y_val):
+        """
+        Serving entries of a new champion: its own latency, plus the distilled student (tree
+        champions, Config.DISTILLATION) or the int8 variant (NN champions) the predictor can fall back to.
+        """
+        if winner['model_type'] == 'nn':
+            self._quantize_nn(target_name, mode, filename, X_val, y_val, winner['score'])
+            return
+        student = None
+        if self.config.DISTILLATION and winner['model_type'] in ('rf', 'gb'):
+            teacher = ModelFactory.get_model(winner['model_type'], mode=mode)
+            teacher.load(filename)
+            student = distill_target(target_name, mode, teacher, X_train, X_val, y_val, winner['score'])
+        latency_ms = student['teacher_latency_ms'] if student else winner['LatencyMs']
+        self.registry.register_serving_model(target_name, winner['model_type'], filename, latency_ms,
+                                             score=winner['score'])
+        if student:
+            self.registry.register_serving_model(target_name, 'distilled', student['file'], student['latency_ms'],
+                                                 score=student['score'], fidelity=student['fidelity'])
+            self.logger.log_metric(target_name, 'Distilled', winner['metric'], student['score'])
+            self.logger.log_metric(target_name, 'Distilled', 'LatencyMs', student['latency_ms'])
+
+    def _promote(self, work_dir, stem, final_stem):
+        """Moves every file of the winning artifact into MODELS_DIR (mtimes are kept, so sidecars stay fresh)."""
+        for path in Path(work_dir).glob(f"{stem}.*"):
+            dest = self.config.MODELS_DIR / (final_stem + path.name[len(stem):])
+            if dest.is_dir():
+                shutil.rmtree(dest)
+            os.replace(path, dest)
+
+    def _quantize_nn(self, target_name, mode, filename, X_val, y_val, float_score):
+        """
+        Post-training int8 quantization of a winning NN: reports the quality delta and latency gain,
+        and registers the int8 variant for serving only if it loses at most Config.QUANTIZE_MAX_LOSS
+        (accuracy points, or relative MSE for regression).
+        """
+        float_model = ModelFactory.get_model('nn', mode=mode)
+        float_model.load(filename)
+        float_model.save_quantized(filename)
+        int8_model = ModelFactory.get_model('nn_int8', mode=mode)
+        int8_model.load(filename)
+
+        preds = int8_model.predict(X_val)
+        if mode == 'classification':
+            int8_score = accuracy_score(y_val, preds)
+            loss = float_score - int8_score
+        else:
+            int8_score = mean_squared_error(y_val, preds)
+            loss = (int8_score - float_score) / float_score
+        float_ms = measure_latency_ms(float_model, X_val)
+        int8_ms = measure_latency_ms(int8_model, X_val)
+
+        print(f"   🗜️ int8: score {int8_score:.4f} (Δ {int8_score - float_score:+.4f}) | "
+              f"latency {float_ms:.3f}ms → {int8_ms:.3f}ms ({float_ms / int8_ms:.1f}x)")
+        self.logger.log_metric(target_name, 'nn_int8', 'Comparison_Score', int8_score)
+        self.logger.log_metric(target_name, 'nn_int8', 'LatencyMs', int8_ms)
+
+        self.registry.register_serving_model(target_name, 'nn', filename, float_ms, score=float_score)
+        if loss <= self.config.QUANTIZE_MAX_LOSS:
+            self.registry.register_serving_model(target_name, 'nn_int8', filename, int8_ms,
+                                                 score=int8_score, score_delta=int8_score - float_score)
+        else:
+            print(f"   ⚠️ int8 variant loses too much ({loss:.4f}); not registered for serving.")
 
 if __name__ == "__main__":
     comp = ModelComparator()
-    comp.run()
\ No newline at end of file
+    # Pass --sequential to train the contenders one after another
+    comp.run(parallel='--sequential' not in sys.argv)
\ No newline at end of file
@@ -41,10 +41,31 @@ class Config:
     ELO_DATA_PATH = PROJECT_ROOT / "data" / "raw" / "elo_ratings.csv"
     
     PROCESSED_DATA_DIR = PROJECT_ROOT / "data" / "processed"
+
+    # Drop folder for new result files (bulk import / watcher)
+    INCOMING_DATA_DIR = PROJECT_ROOT / "data" / "incoming"
+    INCOMING_POLL_SECONDS = int(os.environ.get('INCOMING_POLL_SECONDS', 60))
+    # A poll that imported rows retrains once this many have accumulated, or the last retrain is this old
+    INCOMING_RETRAIN_MIN_ROWS = int(os.environ.get('INCOMING_RETRAIN_MIN_ROWS', 50))
+    INCOMING_RETRAIN_MIN_HOURS = float(os.environ.get('INCOMING_RETRAIN_MIN_HOURS', 6))
+    RAW_BACKUPS_KEEP = int(os.environ.get('RAW_BACKUPS_KEEP', 5)) # newest matches_backup_*.csv kept
+
     MODELS_DIR = PROJECT_ROOT / "models"
+
+    # Optional indexed SQLite copy of the match history (see utils/match_store.py)
+    # Set USE_MATCH_DB=1 to serve team/H2H lookups from it instead of in-memory DataFrames
+    MATCH_DB_PATH = PROJECT_ROOT / "data" / "processed" / "matches.db"
+    USE_MATCH_DB = os.environ.get('USE_MATCH_DB', '0') == '1'
     
     # Ensure this path matches exactly where training.py saves the scaler
     SCALER_PATH = MODELS_DIR / "saved" / "scaler.pkl" 
+    # Records which scaler + models belong to the same training run
+    MANIFEST_PATH = MODELS_DIR / "saved" / "manifest.json"
+    # Training-time feature histograms (saved with the scaler), the baseline for serve-time drift checks
+    FEATURE_REFERENCE_PATH = MODELS_DIR / "saved" / "feature_reference.json"
+
+    # Structured output of evaluate.py (per-version, per-target metrics and scoring throughput)
+    EVALUATION_REPORT_PATH = PROJECT_ROOT / "logs" / "evaluation_report.json"
 
     # ==========================================
     # 3. DATA DEFINITIONS (From your file)
@@ -106,6 +127,118 @@ class Config:
     # Settings
     TRAIN_SPLIT = 0.80
     VAL_SPLIT = 0.10
+
+    # Train every target in its own worker process (training.py --sequential to disable)
+    PARALLEL_TRAINING = os.environ.get('PARALLEL_TRAINING', '1') == '1'
+
+    # Checkpoints of the staged training graph (utils/pipeline_dag.py)
+    PIPELINE_CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "pipeline"
+
+    # Hyperparameter search: 'halving' (budgeted, cached, warm-started) or 'random'
+    TUNING_STRATEGY = os.environ.get('TUNING_STRATEGY', 'halving')
+    TUNING_TIME_BUDGET = int(os.environ.get('TUNING_TIME_BUDGET', 600)) # seconds per target
+    TRIAL_STORE_PATH = PROJECT_ROOT / "logs" / "tuning_trials.jsonl"
+
+    # Incremental retraining (warm_start): new trees fitted on recent matches only
+    INCREMENTAL_RETRAIN = os.environ.get('INCREMENTAL_RETRAIN', '1') == '1'
+    INCREMENTAL_RECENT_DAYS = 60      # window of recent matches used for the update
+    INCREMENTAL_NEW_TREES = 50        # trees / stages added per update
+    INCREMENTAL_MAX_TREES = int(os.environ.get('INCREMENTAL_MAX_TREES', 0)) or None # sliding window (RF only)
+    FULL_REBUILD_EVERY = 8            # full retrain after this many incremental updates
+
+    # Tree models are compiled to flat NumPy arrays on load for fast single-row prediction
+    COMPILED_INFERENCE = os.environ.get('COMPILED_INFERENCE', '1') == '1'
+    COMPILED_MAX_BATCH = 256          # larger batches go through sklearn
+    # joblib compression level for model pickles (e.g. 3 for cold storage).
+    # Serving reads the uncompressed, memory-mapped .runtime/ arrays either way.
+    MODEL_COMPRESS = int(os.environ.get('MODEL_COMPRESS', 0))
+
+    # Neural network serving (CPU): intra-op threads per process and rows per forward pass
+    NN_NUM_THREADS = int(os.environ.get('NN_NUM_THREADS', 1))
+    NN_INFERENCE_BATCH = 4096
+    # Neural network training: newest rows held out for early stopping
+    NN_VAL_FRACTION = 0.1
+    NN_PATIENCE = 5                   # epochs without val-loss improvement before stopping
+    NN_WARM_START = os.environ.get('NN_WARM_START', '1') == '1'
+    # int8 NN variant: registered only if it loses at most this much (accuracy points / relative MSE)
+    QUANTIZE_MAX_LOSS = 0.01
+    QUANTIZED_FREE_TIER = os.environ.get('QUANTIZED_FREE_TIER', '1') == '1'
+
+    # Linear SVM (SGD): incremental partial_fit training + calibration on the newest rows
+    SVM_CHUNK_ROWS = 5000             # rows per partial_fit call / CSV chunk
+    SVM_PASSES = 5                    # passes over the training data
+    SVM_CALIBRATION_FRACTION = 0.2    # newest share of in-memory / update data held out to calibrate
+    SVM_CALIBRATION_ROWS = 2000       # cap on the rows held out when streaming from CSV
+
+    # compare_models.py: a winner must fit these serving budgets (single-row latency, artifact size:
+    # the arrays a loaded model keeps in memory)
+    TOURNAMENT_LATENCY_BUDGET_MS = float(os.environ.get('TOURNAMENT_LATENCY_BUDGET_MS', 5.0))
+    TOURNAMENT_MEMORY_BUDGET_MB = float(os.environ.get('TOURNAMENT_MEMORY_BUDGET_MB', 500))
+
+    # Distillation: a small student forest trained on the teacher's soft probabilities
+    DISTILLATION = os.environ.get('DISTILLATION', '1') == '1'
+    DISTILL_N_ESTIMATORS = 30
+    DISTILL_MAX_DEPTH = 8
+    DISTILL_AUGMENT_FACTOR = 2        # jittered copies of the training rows
+    # Single-row latency budget (ms) per tier; the predictor falls back to the distilled model above it
+    LATENCY_BUDGET_MS = {'free': 2.0, 'gold': 20.0}
+
+    # ROI backtests (utils/evaluation.py)
+    BACKTEST_BANKROLL = 1000.0
+    BACKTEST_STAKE = 10.0                         # flat stake per bet
+    BACKTEST_FRACTIONS = [0.01, 0.02, 0.05]       # proportional: share of bankroll per bet
+    BACKTEST_KELLY_FRACTIONS = [0.1, 0.25, 0.5]   # fractional Kelly multipliers
+    BACKTEST_EDGES = [0.0, 0.02, 0.05, 0.10]      # min. model prob - implied prob to place a bet
+
+    # Monte Carlo bankroll simulation (analysis/roi_simulator.py)
+    ROI_SIM_PATHS = int(os.environ.get('ROI_SIM_PATHS', 20000))
+    ROI_SIM_CHUNK = 5000                          # paths simulated per NumPy block (bounds memory)
+    ROI_SIM_STRATEGY = {'name': 'flat(10)', 'staking': 'flat', 'size': 10.0}
+    ROI_SIM_QUANTILES = [5, 25, 50, 75, 95]
+    ROI_RUIN_FRACTION = 0.1                       # ruin = bankroll falls below 10% of the start
+    ROI_SERIES_PATH = PROJECT_ROOT / "logs" / "roi_series.json"   # chart data for the admin dashboard
+    ROI_RUN_TIMEOUT_SECONDS = 3600                # a run marker older than this is a crashed run
+
+    # Bootstrap confidence intervals for evaluation / monitoring metrics
+    BOOTSTRAP_SAMPLES = int(os.environ.get('BOOTSTRAP_SAMPLES', 2000))
+    BOOTSTRAP_CONFIDENCE = 0.95
+    BOOTSTRAP_BLOCK_SIZE = 10                     # consecutive matches per block (~1 match week); 1 = i.i.d.
+
+    # Live performance monitor (monitoring/performance_monitor.py), fed with graded results
+    MONITOR_STATE_PATH = PROJECT_ROOT / "logs" / "performance_monitor.json"
+    MONITOR_WINDOW = 100                          # matches in the rolling window
+    MONITOR_HALFLIFE = 50                         # matches, exponentially decayed mean
+    MONITOR_CUSUM_K = 0.1                         # CUSUM slack, in standard deviations of the loss
+    MONITOR_CUSUM_H = 15.0                        # CUSUM alarm threshold (~700-1000 matches between false alarms)
+    MONITOR_MAX_VERSIONS = 3                      # model versions kept per target
+
+    # Metrics sink of TrainingLogger (monitoring/metrics_store.py): append-only SQLite, written in batches
+    METRICS_DB_PATH = PROJECT_ROOT / "logs" / "metrics.db"
+    METRICS_FLUSH_ROWS = 200                      # buffered metrics + events per write
+    METRICS_FLUSH_SECONDS = 5.0                   # ... or age of the oldest buffered row
+
+    # In-process metrics registry (monitoring/metrics_registry.py), scraped at /metrics (Prometheus text format)
+    METRICS_MULTIPROC_DIR = PROJECT_ROOT / "logs" / "prometheus"   # one snapshot file per process
+    METRICS_SNAPSHOT_SECONDS = 5.0
+    LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    # Background job status for the admin dashboard (utils/status_logger.py)
+    JOB_LOG_LINES = 200                           # ring buffer of progress lines per job
+    JOB_HISTORY = 20                              # job files kept in logs/jobs/
+    JOB_STREAM_POLL_SECONDS = 0.5                 # server-side check of the job file per SSE stream
+    # A stream is closed (and resumed by the browser) after this; keep it well below gunicorn's
+    # --timeout in the Procfile (gthread workers: an open stream holds one thread, not the worker)
+    JOB_STREAM_SECONDS = int(os.environ.get('JOB_STREAM_SECONDS', 25))
+
+    # Serve-time feature drift (monitoring/feature_drift.py): request histograms vs the training reference
+    DRIFT_STATE_PATH = PROJECT_ROOT / "logs" / "feature_drift.json"
+    DRIFT_BINS = 10                               # quantile bins of the training distribution per feature
+    DRIFT_FLUSH_EVERY = 50                        # requests between merges into the shared state file
+    DRIFT_FLUSH_SECONDS = 300                     # ... or seconds, whichever comes first
+    DRIFT_MAX_SAMPLES = 5000                      # counts are halved beyond this: recent traffic weighs more
+    DRIFT_MIN_SAMPLES = 100                       # no verdict on fewer requests
+    DRIFT_PSI_WARN = 0.1
+    DRIFT_PSI_ALERT = 0.25
     
     @staticmethod
     def ensure_dirs():
@@ -1,89 +1,231 @@
 import pandas as pd
+import numpy as np
 import sys
 import os
+import json
+import time
+import joblib
+from joblib import Parallel, delayed
+from datetime import datetime
+from pathlib import Path
 
 # --- Import Project Modules ---
 from config.config import Config
-from utils.evaluation import Evaluator
+from utils.evaluation import Evaluator, backtest, bootstrap_metrics, format_interval
 from utils.feature_engineering import FeatureEngineer
 from models.model_factory import ModelFactory
+from training import build_training_graph
+
+def score_model(models_dir, model_type, filename, mode, X):
+    """Loads one model from `models_dir` and scores the whole (already scaled) test matrix (runs in a worker)."""
+    try:
+        t0 = time.perf_counter()
+        model = ModelFactory.get_model(model_type, mode=mode)
+        model.config.MODELS_DIR = Path(models_dir)
+        model.load(filename)
+        load_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        preds = np.asarray(model.predict(X))
+        proba = model.predict_proba(X) if mode == 'classification' and hasattr(model, 'predict_proba') else None
+        predict_seconds = time.perf_counter() - t0
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {
+        'preds': preds,
+        'proba': None if proba is None else np.asarray(proba),
+        'load_seconds': load_seconds,
+        'predict_seconds': predict_seconds,
+        'rows_per_sec': len(X) / max(predict_seconds, 1e-9),
+    }
 
 class EvaluationPipeline:
-    def __init__(self):
+    def __init__(self, versions=None):
+        """
+        :param versions: model directories to evaluate side by side (default: Config.MODELS_DIR).
+                         Each holds model_<target>.pkl files and, optionally, saved/manifest.json + saved/scaler.pkl.
+        """
         self.config = Config()
         self.evaluator = Evaluator()
         self.engineer = FeatureEngineer()
-        self.models = {}
+        self.versions = [Path(v) for v in (versions or [self.config.MODELS_DIR])]
+        self.heads = []  # (version label, models dir, target, model_type, filename)
 
     def load_models(self):
-        """Loads trained models."""
+        """Collects every model to score: each version's champion per target plus its extra serving variants."""
         print("📥 Loading models for evaluation...")
-        for target_name in self.config.TARGETS.keys():
-            filename = f"model_{target_name}.pkl"
-            mode = 'regression' if target_name == 'TotalGoals' else 'classification'
-            
-            try:
-                model = ModelFactory.get_model('rf', mode=mode)
-                model.load(filename)
-                self.models[target_name] = model
-            except FileNotFoundError:
-                print(f"⚠️ Warning: {filename} not found. Skipping.")
-
-    def run(self):
-        # 1. Load Test Data
-        test_path = self.config.PROCESSED_DATA_DIR / "test.csv"
-        if not test_path.exists():
-            print("❌ Test data not found. Run training.py first.")
+        saved_dir = self.config.SCALER_PATH.parent.relative_to(self.config.MODELS_DIR)
+        for models_dir in self.versions:
+            manifest_path = models_dir / saved_dir / self.config.MANIFEST_PATH.name
+            manifest = {}
+            if manifest_path.exists():
+                with open(manifest_path, 'r') as f:
+                    manifest = json.load(f)
+            label = manifest.get('version') or models_dir.name
+            if any(h[0] == label and h[1] != models_dir for h in self.heads):
+                label = f"{models_dir.name}@{label}"  # copies of the same version stay apart
+
+            for target_name in self.config.TARGETS.keys():
+                entry = manifest.get('models', {}).get(target_name, {})
+                candidates = {entry.get('model_type', 'rf'): entry.get('file', f"model_{target_name}.pkl")}
+                for model_type, serving in manifest.get('serving', {}).get(target_name, {}).items():
+                    candidates.setdefault(model_type, serving['file'])
+                for model_type, filename in candidates.items():
+                    if not (models_dir / filename).exists():
+                        print(f"⚠️ Warning: {models_dir / filename} not found. Skipping.")
+                        continue
+                    self.heads.append((label, models_dir, target_name, model_type, filename))
+
+    def _scaled_test_sets(self, test_df):
+        """The test features scaled ONCE per distinct scaler (versions trained on the same data share it)."""
+        scaled, by_version = {}, {}
+        saved_dir = self.config.SCALER_PATH.parent.relative_to(self.config.MODELS_DIR)
+        for models_dir in dict.fromkeys(h[1] for h in self.heads):
+            scaler_path = models_dir / saved_dir / self.config.SCALER_PATH.name
+            if not scaler_path.exists():
+                scaler_path = self.config.SCALER_PATH
+            key = os.path.realpath(scaler_path)
+            if key not in scaled:
+                self.engineer.scaler = joblib.load(scaler_path)
+                scaled[key] = self.engineer.transform(test_df).to_numpy(dtype=np.float64)
+            by_version[models_dir] = scaled[key]
+        print(f"⚖️  Scaled {len(test_df)} test rows once per scaler ({len(scaled)} scaler(s)).")
+        return by_version
+
+    def run(self, parallel=True):
+        # 1. Load Test Data (the 'split' stage of the training graph, cached after the first run)
+        print("📂 Loading Test Data...")
+        try:
+            test_df = build_training_graph().run(['split'])['split']['test']
+        except FileNotFoundError as e:
+            print(f"❌ Test data not available: {e}")
+            return
+        if not self.heads:
+            print("❌ No models to evaluate.")
             return
 
-        print(f"📂 Loading Test Data: {test_path}")
-        test_df = pd.read_csv(test_path)
-        
-        # 2. Evaluate Each Target
-        for target_name, model in self.models.items():
-            if target_name not in self.config.TARGETS:
-                continue
-                
-            print(f"\n🚀 TEST RUN: {target_name}")
-            
-            # Prepare Features (Using same scaler as training)
-            # transform() automatically handles scaling
-            X_test, y_true = self.engineer.transform(test_df, target_name=target_name)
-            
-            # Predict
-            preds = model.predict(X_test)
-            
-            # Calculate Metrics
-            if target_name == 'WLD':
-                self.evaluator.evaluate_classification(
-                    y_true, preds, 
-                    target_name=target_name, 
-                    class_names=['Home', 'Draw', 'Away']
-                )
-                # Calculate Betting ROI for Win/Loss/Draw
-                self.evaluator.calculate_roi(
-                    test_df, preds, 
+        # 2. One scaling pass, then every head scored in parallel over the shared matrix
+        X_by_version = self._scaled_test_sets(test_df)
+        n_workers = max(1, min(len(self.heads), joblib.cpu_count())) if parallel else 1
+        print(f"\n🚀 Scoring {len(self.heads)} model(s) on {n_workers} worker(s)...")
+        scores = Parallel(n_jobs=n_workers, backend='loky', max_nbytes='1M', mmap_mode='r')(
+            delayed(score_model)(str(models_dir), model_type, filename,
+                                 'regression' if target_name == 'TotalGoals' else 'classification',
+                                 X_by_version[models_dir])
+            for _, models_dir, target_name, model_type, filename in self.heads
+        )
+
+        # 3. Metrics (with bootstrap confidence intervals) per head
+        report = {
+            'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'test_rows': len(test_df),
+            'versions': {},
+        }
+        for (label, models_dir, target_name, model_type, filename), score in zip(self.heads, scores):
+            version = report['versions'].setdefault(label, {'dir': str(models_dir), 'targets': {}})
+            result = {'file': filename}
+            if 'error' in score:
+                print(f"   ❌ [{label}] {target_name}/{model_type} failed: {score['error']}")
+                result['error'] = score['error']
+            else:
+                result.update(self._metrics(test_df, target_name, score))
+                result.update({k: round(score[k], 4) for k in ('load_seconds', 'predict_seconds', 'rows_per_sec')})
+                # Full console report for the champions of the first (current) version
+                if label == self.heads[0][0] and model_type == next(h[3] for h in self.heads
+                                                                    if h[0] == label and h[2] == target_name):
+                    self._print_details(test_df, target_name, score)
+            version['targets'].setdefault(target_name, {})[model_type] = result
+
+        self._write_report(report)
+        self._print_summary(report)
+        return report
+
+    def _metrics(self, test_df, target_name, score):
+        y_true = test_df[self.config.TARGETS[target_name]].to_numpy()
+        if target_name == 'TotalGoals':
+            return {'metrics': bootstrap_metrics(y_true, score['preds'], mode='regression')}
+        metrics = {'metrics': bootstrap_metrics(y_true, score['preds'], proba=score['proba'])}
+        if target_name == 'WLD':
+            odds, _ = self.evaluator._picked_odds(test_df, score['preds'])
+            flat = backtest(odds, score['preds'] == y_true, bankroll=0.0)['summary'].iloc[0]
+            metrics['flat_roi'] = float(flat['ROI'])
+        return metrics
+
+    def _print_details(self, test_df, target_name, score):
+        print(f"\n🚀 TEST RUN: {target_name}")
+        y_true = test_df[self.config.TARGETS[target_name]].to_numpy()
+        preds, proba = score['preds'], score['proba']
+
+        # Calculate Metrics
+        if target_name == 'WLD':
+            self.evaluator.evaluate_classification(
+                y_true, preds,
+                target_name=target_name,
+                class_names=['Home', 'Draw', 'Away'], proba=proba
+            )
+            # Calculate Betting ROI for Win/Loss/Draw
+            self.evaluator.calculate_roi(
+                test_df, preds,
+                target_col=self.config.TARGETS['WLD']
+            )
+            # Staking strategies (flat / proportional / Kelly x edge thresholds) need probabilities
+            if proba is not None:
+                self.evaluator.backtest_strategies(
+                    test_df, preds, proba,
                     target_col=self.config.TARGETS['WLD']
                 )
-                
-            elif target_name == 'BTTS':
-                self.evaluator.evaluate_classification(
-                    y_true, preds, 
-                    target_name=target_name, 
-                    class_names=['No', 'Yes']
-                )
-                
-            elif target_name == 'Over25':
-                self.evaluator.evaluate_classification(
-                    y_true, preds, 
-                    target_name=target_name, 
-                    class_names=['Under', 'Over']
-                )
-                
-            elif target_name == 'TotalGoals':
-                self.evaluator.evaluate_regression(y_true, preds, target_name=target_name)
+
+        elif target_name == 'BTTS':
+            self.evaluator.evaluate_classification(
+                y_true, preds,
+                target_name=target_name,
+                class_names=['No', 'Yes'], proba=proba
+            )
+
+        elif target_name == 'Over25':
+            self.evaluator.evaluate_classification(
+                y_true, preds,
+                target_name=target_name,
+                class_names=['Under', 'Over'], proba=proba
+            )
+
+        elif target_name == 'TotalGoals':
+            self.evaluator.evaluate_regression(y_true, preds, target_name=target_name)
+
+    def _write_report(self, report):
+        path = Path(self.config.EVALUATION_REPORT_PATH)
+        os.makedirs(path.parent, exist_ok=True)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=4)
+        os.replace(tmp_path, path)
+        print(f"\n💾 Evaluation report saved to {path}")
+
+    def _print_summary(self, report):
+        print("\n📋 EVALUATION SUMMARY")
+        print("=========================================")
+        print(f"   {'Version':<26} | {'Target':<10} | {'Model':<9} | {'Metric':<8} | {'Value [CI]':<26} | {'Rows/s':>9}")
+        for label, version in report['versions'].items():
+            for target_name, models in version['targets'].items():
+                for model_type, result in models.items():
+                    if 'error' in result:
+                        print(f"   {label:<26} | {target_name:<10} | {model_type:<9} | ❌ {result['error']}")
+                        continue
+                    metric = 'mse' if target_name == 'TotalGoals' else 'accuracy'
+                    stats = result['metrics'][metric]
+                    value = format_interval(stats, percent=metric == 'accuracy')
+                    print(f"   {label:<26} | {target_name:<10} | {model_type:<9} | {metric:<8} | {value:<26} | "
+                          f"{result['rows_per_sec']:>9.0f}")
+
+def _parse_versions(argv):
+    """--versions models,/backups/models_v1 -> [Path('models'), Path('/backups/models_v1')]"""
+    if '--versions' not in argv:
+        return None
+    return [Path(p) for p in argv[argv.index('--versions') + 1].split(',')]
 
 if __name__ == "__main__":
-    pipeline = EvaluationPipeline()
+    # Pass --versions DIR1,DIR2 to compare several model directories side by side
+    # Pass --sequential to score the models one after another
+    pipeline = EvaluationPipeline(versions=_parse_versions(sys.argv))
     pipeline.load_models()
-    pipeline.run()
\ No newline at end of file
+    pipeline.run(parallel='--sequential' not in sys.argv)
@@ -17,32 +17,50 @@ try:
     from utils.feature_engineering import FeatureEngineer
     from models.model_factory import ModelFactory
     from utils.data_loader import DataLoader
+    from utils.match_store import MatchStore
+    from models.registry import ModelRegistry
+    from monitoring.feature_drift import FeatureDriftTracker
+    from monitoring.metrics_registry import counter, histogram
 except ImportError:
     sys.path.append(os.path.join(current_dir, 'config'))
     from config import Config
     from utils.feature_engineering import FeatureEngineer
     from models.model_factory import ModelFactory
     from utils.data_loader import DataLoader
+    from utils.match_store import MatchStore
+    from models.registry import ModelRegistry
+    from monitoring.feature_drift import FeatureDriftTracker
+    from monitoring.metrics_registry import counter, histogram
+
+# --- 3. METRICS (scraped at /metrics) ---
+# Children are resolved once here so the hot path only does the update
+PHASE_SECONDS = histogram('predictor_phase_seconds', 'Time spent per phase of a prediction', ('phase',))
+TIME_TOTAL, TIME_STATS, TIME_TRANSFORM, TIME_MODEL_LOAD, TIME_H2H, TIME_REPORT_CARD = (
+    PHASE_SECONDS.labels(phase) for phase in ('total', 'stats', 'transform', 'model_load', 'h2h', 'report_card'))
+TIME_INFERENCE = {target: PHASE_SECONDS.labels(f"inference_{target}") for target in Config.TARGETS}
+PREDICTIONS = counter('predictions_total', 'Predictions served', ('tier', 'outcome'))
+MODEL_LOADS = counter('predictor_model_loads_total', 'Model files loaded into memory', ('target', 'model_type'))
 
 class MatchPredictor:
     def __init__(self):
         self.config = Config()
         self.engineer = FeatureEngineer()
         self.loader = DataLoader()
+        self.store = None
+        self.registry = ModelRegistry()
+        # Histograms of the served feature vectors vs the training reference (O(1) per request)
+        self.drift = FeatureDriftTracker()
         
         # Load Stats
-        print("📥 [AI Brain] Loading stats database...")
-        try:
-            self.raw_df = self.loader.load_raw_data()
-            self.processed_df = self.loader.preprocess(self.raw_df)
-            if 'MatchDate' in self.raw_df.columns:
-                self.raw_df['MatchDate'] = pd.to_datetime(self.raw_df['MatchDate'])
-            if 'MatchDate' in self.processed_df.columns:
-                self.processed_df['MatchDate'] = pd.to_datetime(self.processed_df['MatchDate'])
-        except Exception as e:
-            print(f"⚠️ [AI Brain] Warning: Data load failed ({e}).")
+        # With USE_MATCH_DB=1 lookups go to the indexed SQLite store and the
+        # full history is never materialised in this process.
+        if self.config.USE_MATCH_DB and MatchStore().exists():
+            print("📥 [AI Brain] Using indexed match store...")
+            self.store = MatchStore()
             self.raw_df = pd.DataFrame()
             self.processed_df = pd.DataFrame()
+        else:
+            self._load_frames()
         
         # Load Schedule
         self.upcoming_path = os.path.join(current_dir, 'data', 'upcoming.csv')
@@ -58,13 +76,42 @@ class MatchPredictor:
             
         self.models = {}
 
+    def _load_frames(self):
+        print("📥 [AI Brain] Loading stats database...")
+        try:
+            self.raw_df = self.loader.load_raw_data()
+            self.processed_df = self.loader.preprocess(self.raw_df)
+            if 'MatchDate' in self.raw_df.columns:
+                self.raw_df['MatchDate'] = pd.to_datetime(self.raw_df['MatchDate'])
+            if 'MatchDate' in self.processed_df.columns:
+                self.processed_df['MatchDate'] = pd.to_datetime(self.processed_df['MatchDate'])
+        except Exception as e:
+            print(f"⚠️ [AI Brain] Warning: Data load failed ({e}).")
+            self.raw_df = pd.DataFrame()
+            self.processed_df = pd.DataFrame()
+
+    def _latest_team_row(self, team):
+        """Most recent processed match row for `team`, or None if the team is unknown."""
+        if self.store is not None:
+            return self.store.latest_team_row(team)
+        df = self.processed_df
+        rows = df[(df['HomeTeam']==team)|(df['AwayTeam']==team)].sort_values('MatchDate')
+        return None if rows.empty else rows.iloc[-1]
+
     # --- TEAMS & HIERARCHY ---
     def get_team_hierarchy(self):
-        if self.raw_df is None or self.raw_df.empty: return {}
-        
         two_years_ago = datetime.now() - timedelta(days=730)
-        recent_df = self.raw_df[self.raw_df['MatchDate'] >= two_years_ago]
-        if recent_df.empty: recent_df = self.raw_df
+        if self.store is not None:
+            teams_by_div = self.store.teams_by_division(since=two_years_ago) or self.store.teams_by_division()
+        else:
+            if self.raw_df is None or self.raw_df.empty: return {}
+            recent_df = self.raw_df[self.raw_df['MatchDate'] >= two_years_ago]
+            if recent_df.empty: recent_df = self.raw_df
+            teams_by_div = {}
+            if 'Division' in recent_df.columns:
+                for div in recent_df['Division'].unique():
+                    teams_by_div[div] = sorted(list(set(recent_df[recent_df['Division'] == div]['HomeTeam'].unique()) | 
+                                                    set(recent_df[recent_df['Division'] == div]['AwayTeam'].unique())))
 
         DIV_MAP = {
             'E0': ('England', 'Premier League'), 'E1': ('England', 'Championship'),
@@ -75,13 +122,10 @@ class MatchPredictor:
         }
 
         hierarchy = {}
-        if 'Division' in recent_df.columns:
-            for div in recent_df['Division'].unique():
-                country, league = DIV_MAP.get(div, ("International", str(div)))
-                teams = sorted(list(set(recent_df[recent_df['Division'] == div]['HomeTeam'].unique()) | 
-                                    set(recent_df[recent_df['Division'] == div]['AwayTeam'].unique())))
-                if country not in hierarchy: hierarchy[country] = {}
-                hierarchy[country][league] = teams
+        for div, teams in teams_by_div.items():
+            country, league = DIV_MAP.get(div, ("International", str(div)))
+            if country not in hierarchy: hierarchy[country] = {}
+            hierarchy[country][league] = teams
         return hierarchy
 
     # --- SCHEDULE ---
@@ -108,12 +152,11 @@ class MatchPredictor:
         return preds
 
     # --- STATS ---
+    @TIME_REPORT_CARD.time()
     def get_team_report_card(self, team_name):
         try:
-            df = self.processed_df
-            rows = df[(df['HomeTeam']==team_name)|(df['AwayTeam']==team_name)].sort_values('MatchDate')
-            if rows.empty: return None
-            last = rows.iloc[-1]
+            last = self._latest_team_row(team_name)
+            if last is None: return None
             p = 'Home' if last['HomeTeam']==team_name else 'Away'
             
             # Safe access
@@ -131,9 +174,13 @@ class MatchPredictor:
             }
         except: return None
 
+    @TIME_H2H.time()
     def get_matchup_stats(self, home, away):
         try:
-            h2h = self.raw_df[((self.raw_df['HomeTeam']==home)&(self.raw_df['AwayTeam']==away))|((self.raw_df['HomeTeam']==away)&(self.raw_df['AwayTeam']==home))].sort_values('MatchDate', ascending=False).head(5)
+            if self.store is not None:
+                h2h = self.store.head_to_head(home, away, limit=5)
+            else:
+                h2h = self.raw_df[((self.raw_df['HomeTeam']==home)&(self.raw_df['AwayTeam']==away))|((self.raw_df['HomeTeam']==away)&(self.raw_df['AwayTeam']==home))].sort_values('MatchDate', ascending=False).head(5)
             res = []
             for _, r in h2h.iterrows():
                 w = r['HomeTeam'] if r['FTR']=='H' else r['AwayTeam'] if r['FTR']=='A' else "Draw"
@@ -142,24 +189,50 @@ class MatchPredictor:
         except: return {"h2h": []}
 
     # --- PREDICTION ENGINE ---
+    @TIME_STATS.time()
     def get_latest_stats(self, team):
-        df = self.processed_df
-        rows = df[(df['HomeTeam']==team)|(df['AwayTeam']==team)].sort_values('MatchDate')
-        if rows.empty: raise ValueError(f"Team '{team}' not found.")
-        last = rows.iloc[-1]
+        last = self._latest_team_row(team)
+        if last is None: raise ValueError(f"Team '{team}' not found.")
         p = 'Home' if last['HomeTeam']==team else 'Away'
         s = {'Elo': last[f'{p}Elo'], 'Form5': last[f'Form5{p}'], 'AvgGoals': last[f'{p}_AvgGoals'], 'RestDays': 5}
         for c in ['AvgConceded','AvgShots','AvgCorners','RecentPoints','Momentum']:
             s[c] = last.get(f"{p}_{c}" if c != 'RecentPoints' else f"{p}_RecentPoints", 0)
         return s
 
+    def preferred_model_type(self, target, subscription_tier='free'):
+        """The registered champion's type (e.g. 'nn' if it won the tournament); tier default otherwise."""
+        entry = self.registry.model_entry(target)
+        if entry and entry.get('model_type'):
+            # Free tier gets the int8 variant of an NN champion when one passed the quality check
+            if (entry['model_type'] == 'nn' and subscription_tier == 'free' and self.config.QUANTIZED_FREE_TIER
+                    and 'nn_int8' in self.registry.serving_models(target)):
+                return 'nn_int8'
+            return entry['model_type']
+        return 'gb' if subscription_tier == 'gold' else 'rf'
+
+    def choose_model_type(self, target, preferred, subscription_tier='free'):
+        """
+        Serves `preferred` unless its measured single-row latency exceeds the tier's budget;
+        then the fastest registered model that fits (e.g. the distilled student) is used instead.
+        """
+        serving = self.registry.serving_models(target)
+        budget = self.config.LATENCY_BUDGET_MS.get(subscription_tier)
+        entry = serving.get(preferred)
+        if budget is None or entry is None or entry['latency_ms'] <= budget: return preferred
+        fits = [(e['latency_ms'], t) for t, e in serving.items() if e['latency_ms'] <= budget]
+        return min(fits or [(e['latency_ms'], t) for t, e in serving.items()])[1]
+
     def get_model(self, target, model_type='rf'):
         key = f"{target}_{model_type}"
         if key in self.models: return self.models[key]
         try:
             mode = 'regression' if target=='TotalGoals' else 'classification'
+            entry = self.registry.serving_models(target).get(model_type)
+            filename = entry['file'] if entry else f"model_{target}.pkl"
             m = ModelFactory.get_model(model_type, mode=mode)
-            m.load(f"model_{target}.pkl"); self.models[key] = m; return m
+            with TIME_MODEL_LOAD.time(): m.load(filename)
+            MODEL_LOADS.labels(target, model_type).inc()
+            self.models[key] = m; return m
         except: return None
 
     def predict_for_web(self, home, away, subscription_tier='free'):
@@ -167,6 +240,12 @@ class MatchPredictor:
         Main prediction API. 
         Calculates Win Prob, Goals, and enforces score consistency.
         """
+        with TIME_TOTAL.time():
+            response = self._predict(home, away, subscription_tier)
+        PREDICTIONS.labels(subscription_tier, 'error' if 'error' in response else 'ok').inc()
+        return response
+
+    def _predict(self, home, away, subscription_tier):
         if not self.config.SCALER_PATH.exists(): return {"error": "AI Brain Offline."}
         try: h=self.get_latest_stats(home); a=self.get_latest_stats(away)
         except ValueError as e: return {"error": str(e)}
@@ -187,7 +266,10 @@ class MatchPredictor:
         }
         
         df = pd.DataFrame(input_data)
-        model_type = 'gb' if subscription_tier == 'gold' else 'rf'
+        self.drift.observe(df[self.drift.features].to_numpy(dtype=np.float64))
+        # Engineer features ONCE using the pre-loaded scaler (shared by every head below)
+        with TIME_TRANSFORM.time(): X = self.engineer.transform(df)
+        model_type = self.choose_model_type('WLD', self.preferred_model_type('WLD', subscription_tier), subscription_tier)
         
         response = {
             "home": home, "away": away, "tier": subscription_tier, "model_used": model_type.upper(),
@@ -201,9 +283,7 @@ class MatchPredictor:
         win_prob = {'home': 33, 'draw': 34, 'away': 33}
         
         if wld_model:
-            # Engineer features using pre-loaded scaler
-            X = self.engineer.transform(df)
-            probs = wld_model.predict_proba(X)[0]
+            with TIME_INFERENCE['WLD'].time(): probs = wld_model.predict_proba(X)[0]
             # Map classes: 0=Away, 1=Draw, 2=Home (Standard sklearn alphabetical)
             # Adjust if your data_loader mapped differently!
             win_prob = {'home': round(probs[2]*100,1), 'draw': round(probs[1]*100,1), 'away': round(probs[0]*100,1)}
@@ -217,12 +297,11 @@ class MatchPredictor:
         response['win_prob'] = win_prob
 
         # 2. TOTAL GOALS
-        goals_model = self.get_model('TotalGoals', model_type)
+        goals_type = self.choose_model_type('TotalGoals', self.preferred_model_type('TotalGoals', subscription_tier), subscription_tier)
+        goals_model = self.get_model('TotalGoals', goals_type)
         total_goals = 2.5 # Default fallback
         if goals_model:
-            # Re-transform for regression
-            X_reg = self.engineer.transform(df)
-            total_goals = float(goals_model.predict(X_reg)[0])
+            with TIME_INFERENCE['TotalGoals'].time(): total_goals = float(goals_model.predict(X)[0])
             total_goals = max(0.5, min(total_goals, 6.0)) # Clamp
             
         response['total_goals'] = round(total_goals, 2)
@@ -234,7 +313,7 @@ class MatchPredictor:
         
         ph = win_prob['home']
         pa = win_prob['away']
-        pd = win_prob['draw']
+        pdraw = win_prob['draw']
         
         # Base goals integer (e.g. 2.4 -> 2, 2.6 -> 3)
         base_goals = int(round(total_goals))
@@ -242,14 +321,14 @@ class MatchPredictor:
         score_h = 0
         score_a = 0
         
-        if ph > pa and ph > pd:
+        if ph > pa and ph > pdraw:
             # Home Win Scenario
             # Ensure Home has at least 1 goal, and Home > Away
             score_h = max(1, int(base_goals * 0.6) + 1) 
             score_a = max(0, base_goals - score_h)
             if score_h <= score_a: score_h = score_a + 1
             
-        elif pa > ph and pa > pd:
+        elif pa > ph and pa > pdraw:
             # Away Win Scenario
             score_a = max(1, int(base_goals * 0.6) + 1)
             score_h = max(0, base_goals - score_a)
@@ -266,16 +345,18 @@ class MatchPredictor:
 
         # Debug Print to Console (Verify 1-1 Loop is broken)
         print(f"\n🔮 [PREDICTION] {home} vs {away}")
-        print(f"   📊 Probs: H={ph}% D={pd}% A={pa}%")
+        print(f"   📊 Probs: H={ph}% D={pdraw}% A={pa}%")
         print(f"   ⚽ Goals: {total_goals} -> Score: {score_h}-{score_a}")
 
         # 4. PREMIUM STATS
         if subscription_tier == 'gold':
-            bm = self.get_model('BTTS', 'rf')
-            if bm: response['btts'] = round(bm.predict_proba(self.engineer.transform(df))[0][1]*100, 1)
+            bm = self.get_model('BTTS', self.preferred_model_type('BTTS', subscription_tier))
+            if bm:
+                with TIME_INFERENCE['BTTS'].time(): response['btts'] = round(bm.predict_proba(X)[0][1]*100, 1)
             
-            om = self.get_model('Over25', 'rf')
-            if om: response['over25'] = round(om.predict_proba(self.engineer.transform(df))[0][1]*100, 1)
+            om = self.get_model('Over25', self.preferred_model_type('Over25', subscription_tier))
+            if om:
+                with TIME_INFERENCE['Over25'].time(): response['over25'] = round(om.predict_proba(X)[0][1]*100, 1)
 
         return response
 
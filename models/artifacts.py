@@ -0,0 +1,104 @@
+import json
+import joblib
+import sys
+import os
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.tree_compiler import CompiledEnsemble
+
+def runtime_dir(path):
+    """models/model_WLD.pkl -> models/model_WLD.runtime/"""
+    return Path(path).with_suffix('.runtime')
+
+class TreeArtifactMixin:
+    """
+    Save / load shared by the tree-based model wrappers.
+
+        model_X.pkl        full sklearn estimator (joblib, optionally compressed for cold storage)
+        model_X.runtime/   uncompressed .npy node arrays of the compiled runtime + meta.json
+
+    load() only memory-maps the runtime; the estimator itself is unpickled lazily the first
+    time something needs it (large batches, incremental retraining).
+    Wrappers must set self.config and assign self.model in __init__.
+    """
+    _model = None
+    _model_path = None
+    runtime = None
+
+    @property
+    def model(self):
+        if self._model is None and self._model_path is not None:
+            self._model = joblib.load(self._model_path)
+        return self._model
+
+    @model.setter
+    def model(self, estimator):
+        self._model = estimator
+        self._model_path = None
+
+    def compile(self):
+        """Builds the flat-array runtime used for small prediction batches."""
+        self.runtime = CompiledEnsemble.from_sklearn(self.model)
+        return self.runtime
+
+    def _use_runtime(self, X):
+        return self.runtime is not None and len(X) <= self.config.COMPILED_MAX_BATCH
+
+    def _artifact_meta(self):
+        """Extra JSON fields stored next to the runtime (override in subclasses)."""
+        return {}
+
+    def _restore_meta(self, meta):
+        pass
+
+    def save(self, filename, compress=None):
+        """
+        :param compress: joblib compression level for the estimator pickle
+                         (defaults to Config.MODEL_COMPRESS). The runtime arrays are never compressed.
+        """
+        compress = self.config.MODEL_COMPRESS if compress is None else compress
+        os.makedirs(self.config.MODELS_DIR, exist_ok=True)
+        path = self.config.MODELS_DIR / filename
+        joblib.dump(self.model, path, compress=compress)
+
+        # The runtime records which pickle it was built from so a stale one is never served
+        stat = os.stat(path)
+        runtime = self.runtime or CompiledEnsemble.from_sklearn(self.model)
+        runtime.save(runtime_dir(path), source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns,
+                     **self._artifact_meta())
+        print(f"   💾 Model saved to {path}")
+
+    def load(self, filename):
+        path = self.config.MODELS_DIR / filename
+        if not path.exists():
+            raise FileNotFoundError(f"Model not found at {path}")
+
+        self.runtime = None
+        meta = self._fresh_runtime_meta(path)
+        if meta is None:
+            # Legacy artifact (pickle only): load eagerly and compile in memory
+            self.model = joblib.load(path)
+            if self.config.COMPILED_INFERENCE:
+                self.compile()
+            return
+
+        if self.config.COMPILED_INFERENCE:
+            self.runtime, meta = CompiledEnsemble.load(runtime_dir(path))
+        self._restore_meta(meta)
+        self._model, self._model_path = None, path
+
+    def _fresh_runtime_meta(self, path):
+        meta_path = runtime_dir(path) / "meta.json"
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        stat = os.stat(path)
+        if meta.get('source_size') != stat.st_size or meta.get('source_mtime_ns') != stat.st_mtime_ns:
+            print(f"   ⚠️ Runtime for {path.name} is stale; rebuilding from the pickle.")
+            return None
+        return meta
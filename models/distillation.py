@@ -0,0 +1,93 @@
+from sklearn.ensemble import RandomForestRegressor
+import numpy as np
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from models.artifacts import TreeArtifactMixin
+
+def measure_latency_ms(model, X, n_rows=50):
+    """Median single-row latency (ms) of model.predict_proba / model.predict."""
+    fn = model.predict_proba if model.mode == 'classification' else model.predict
+    times = []
+    for i in range(min(n_rows, len(X))):
+        row = X.iloc[[i]] if hasattr(X, 'iloc') else X[i:i + 1]
+        t0 = time.perf_counter()
+        fn(row)
+        times.append((time.perf_counter() - t0) * 1e3)
+    return float(np.median(times))
+
+class DistilledModel(TreeArtifactMixin):
+    """
+    Compact student that imitates a large teacher forest.
+    The student is a small multi-output forest fitted to the teacher's SOFT probabilities
+    (or predictions, for regression) on the training rows plus jittered copies of them,
+    so it learns the teacher's decision surface rather than the noisy hard labels.
+    """
+    def __init__(self, mode='classification', **kwargs):
+        self.config = Config()
+        self.mode = mode
+
+        kwargs.pop('mode', None)
+        kwargs.pop('n_jobs', None)
+        self.augment_factor = kwargs.pop('augment_factor', self.config.DISTILL_AUGMENT_FACTOR)
+        self.noise_scale = kwargs.pop('noise_scale', 0.1)
+
+        if 'n_estimators' not in kwargs: kwargs['n_estimators'] = self.config.DISTILL_N_ESTIMATORS
+        if 'max_depth' not in kwargs: kwargs['max_depth'] = self.config.DISTILL_MAX_DEPTH
+        if 'min_samples_leaf' not in kwargs: kwargs['min_samples_leaf'] = 5
+        kwargs['random_state'] = 42
+
+        self.model = RandomForestRegressor(**kwargs)
+        self.classes = None
+        self.runtime = None
+
+    def augment(self, X):
+        """Training rows plus `augment_factor` copies with Gaussian jitter (features are standard-scaled)."""
+        X = np.asarray(X, dtype=np.float64)
+        rng = np.random.default_rng(42)
+        std = X.std(axis=0)
+        copies = [X] + [X + rng.normal(0.0, 1.0, X.shape) * std * self.noise_scale
+                        for _ in range(self.augment_factor)]
+        return np.vstack(copies)
+
+    def distill(self, teacher, X):
+        """Fits the student on the teacher's outputs over X and its augmented copies."""
+        print(f"   🧪 Distilling teacher into a {self.model.n_estimators}-tree student ({self.mode})...")
+        X_aug = self.augment(X)
+        if self.mode == 'classification':
+            self.classes = np.asarray(teacher.model.classes_)
+            soft_targets = teacher.model.predict_proba(X_aug)
+        else:
+            soft_targets = teacher.model.predict(X_aug)
+        self.model.fit(X_aug, soft_targets)
+        self.runtime = None
+
+    def train(self, X, y):
+        raise NotImplementedError("DistilledModel is trained from a teacher: use distill(teacher, X).")
+
+    def _raw(self, X):
+        if self._use_runtime(X):
+            return self.runtime.predict(X)
+        return self.model.predict(np.asarray(X, dtype=np.float64))
+
+    def predict_proba(self, X):
+        if self.mode != 'classification':
+            raise NotImplementedError("Regression does not support probabilities.")
+        proba = np.clip(self._raw(X), 0.0, None)
+        return proba / np.maximum(proba.sum(axis=1, keepdims=True), 1e-12)
+
+    def predict(self, X):
+        if self.mode == 'classification':
+            return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+        return self._raw(X)
+
+    def _artifact_meta(self):
+        # The student is a regressor, so the class labels travel in the runtime metadata
+        return {'mode': self.mode, 'labels': None if self.classes is None else self.classes.tolist()}
+
+    def _restore_meta(self, meta):
+        self.mode = meta.get('mode', self.mode)
+        self.classes = None if meta.get('labels') is None else np.asarray(meta['labels'])
@@ -1,12 +1,14 @@
 from sklearn.ensemble import GradientBoostingClassifier, GradientBoostingRegressor
+import numpy as np
 import joblib
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
+from models.artifacts import TreeArtifactMixin
 
-class GradientBoostingModel:
+class GradientBoostingModel(TreeArtifactMixin):
     def __init__(self, mode='classification', **kwargs):
         self.config = Config()
         self.mode = mode
@@ -24,26 +26,35 @@ class GradientBoostingModel:
             self.model = GradientBoostingClassifier(**kwargs)
         else:
             self.model = GradientBoostingRegressor(**kwargs)
+        self.runtime = None
 
     def train(self, X, y):
         print(f"   🚀 Training Gradient Boosting ({self.mode})...")
         self.model.fit(X, y)
+        self.runtime = None
+
+    def add_trees(self, X, y, n_new_trees=50, max_trees=None):
+        """
+        Incremental update: appends `n_new_trees` boosting stages fitted on (X, y) via warm_start.
+        Stages depend on every earlier stage, so they cannot be retired; `max_trees` is ignored.
+        """
+        if self.mode == 'classification' and not np.array_equal(np.unique(y), self.model.classes_):
+            raise ValueError("Incremental data must contain every class the model was trained on.")
+
+        print(f"   🚀 Adding {n_new_trees} boosting stages ({self.mode})...")
+        self.model.set_params(warm_start=True, n_estimators=self.model.n_estimators_ + n_new_trees)
+        self.model.fit(X, y)
+        self.model.set_params(warm_start=False)
+        self.runtime = None
 
     def predict(self, X):
+        if self._use_runtime(X):
+            return self.runtime.predict(X)
         return self.model.predict(X)
 
     def predict_proba(self, X):
         if self.mode == 'classification':
+            if self._use_runtime(X):
+                return self.runtime.predict_proba(X)
             return self.model.predict_proba(X)
         raise NotImplementedError("Regression does not support probabilities.")
-
-    def save(self, filename="gb_model.pkl"):
-        path = self.config.MODELS_DIR / filename
-        joblib.dump(self.model, path)
-        print(f"   💾 Model saved to {path}")
-        
-    def load(self, filename):
-        path = self.config.MODELS_DIR / filename
-        if not path.exists():
-            raise FileNotFoundError(f"Model not found at {path}")
-        self.model = joblib.load(path)
\ No newline at end of file
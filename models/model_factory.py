@@ -1,13 +1,17 @@
 from models.random_forest import RandomForestModel
 from models.gradient_boosting import GradientBoostingModel
 from models.neural_network import NeuralNetworkModel
+from models.distillation import DistilledModel
+from models.svm_model import SVMModel
 
 class ModelFactory:
     @staticmethod
     def get_model(model_type, **kwargs):
         """
         Factory method to create models.
-        :param model_type: 'rf' (Random Forest), 'gb' (Gradient Boosting), 'nn' (Neural Network)
+        :param model_type: 'rf' (Random Forest), 'gb' (Gradient Boosting), 'nn' (Neural Network),
+                           'nn_int8' (int8-quantized Neural Network, serving only),
+                           'distilled' (compact student of a trained forest), 'svm' (linear SVM, SGD)
         """
         if model_type == 'rf':
             return RandomForestModel(**kwargs)
@@ -15,6 +19,10 @@ class ModelFactory:
             return GradientBoostingModel(**kwargs)
         elif model_type == 'nn':
             return NeuralNetworkModel(**kwargs)
+        elif model_type == 'nn_int8':
+            return NeuralNetworkModel(quantized=True, **kwargs)
+        elif model_type == 'distilled':
+            return DistilledModel(**kwargs)
         elif model_type == 'svm':
             return SVMModel(**kwargs)
         else:
@@ -1,9 +1,11 @@
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, TensorDataset
+from torch.nn.utils.fusion import fuse_linear_bn_eval
 import sys
 import os
+import warnings
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
@@ -32,16 +34,44 @@ class SoccerNet(nn.Module):
         x = self.layer2(x)
         return self.output(x)
 
+def fold_batchnorm(net):
+    """
+    Eval-mode copy of a SoccerNet as a plain nn.Sequential: each BatchNorm is folded into the
+    Linear before it (W' = W * gamma / sigma, b' = (b - mu) * gamma / sigma + beta) and Dropout is dropped.
+    """
+    net = net.to('cpu').eval()
+    layers = []
+    for block in (net.layer1, net.layer2):
+        layers += [fuse_linear_bn_eval(block[0], block[1]), nn.ReLU()]
+    layers.append(nn.Linear(net.output.in_features, net.output.out_features))
+    layers[-1].load_state_dict(net.output.state_dict())
+    return nn.Sequential(*layers).eval()
+
+def _int8_path(path):
+    """models/model_WLD.pkl -> models/model_WLD.int8.pt"""
+    return path.with_suffix('.int8.pt')
+
+def _as_tensor(X):
+    """DataFrame / ndarray -> float32 CPU tensor (copied: pandas may hand out read-only buffers)."""
+    return torch.tensor(np.asarray(X, dtype=np.float32))
+
 # --- Model Wrapper ---
 class NeuralNetworkModel:
-    def __init__(self, input_size, output_size=3, mode='classification', epochs=30, batch_size=64):
+    def __init__(self, input_size=None, output_size=None, mode='classification', epochs=100, batch_size=512,
+                 quantized=False, **kwargs):
         self.config = Config()
+        self.quantized = quantized  # serve the int8 artifact (ModelFactory type 'nn_int8')
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.epochs = epochs
+        self.epochs = epochs  # upper bound; early stopping usually ends training sooner
         self.batch_size = batch_size
         self.mode = mode
-        
-        self.model = SoccerNet(input_size, output_size).to(self.device)
+
+        # Defaults let ModelFactory build an empty shell that load() fills in
+        self.input_size = input_size or len(self.config.FEATURES_NUMERIC)
+        self.output_size = output_size or (1 if mode == 'regression' else 3)
+        self.runtime = None  # TorchScript module used for serving
+
+        self.model = SoccerNet(self.input_size, self.output_size).to(self.device)
         
         if mode == 'classification':
             self.criterion = nn.CrossEntropyLoss()
@@ -51,46 +81,190 @@ class NeuralNetworkModel:
         self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
 
     def train(self, X, y):
-        # Convert Pandas/Numpy to Tensor
-        X_tensor = torch.tensor(X.values, dtype=torch.float32)
-        
+        """
+        Full-batch-resident training: X/y live on the device once and each epoch shuffles by
+        index permutation. The newest NN_VAL_FRACTION of rows (data is chronological) drives
+        early stopping, and the best-validation weights are restored at the end.
+        Training continues from the current weights, so call warm_start() first to fine-tune
+        a previous model instead of starting from scratch.
+        """
+        X_all = _as_tensor(X).to(self.device)
         if self.mode == 'classification':
-            y_tensor = torch.tensor(y, dtype=torch.long)
+            y_all = torch.tensor(np.asarray(y), dtype=torch.long, device=self.device)
         else:
-            y_tensor = torch.tensor(y, dtype=torch.float32).view(-1, 1)
+            y_all = torch.tensor(np.asarray(y), dtype=torch.float32, device=self.device).view(-1, 1)
+
+        n_val = int(len(X_all) * self.config.NN_VAL_FRACTION) if len(X_all) >= 200 else 0
+        n_train = len(X_all) - n_val
+        X_train, y_train = X_all[:n_train], y_all[:n_train]
+        X_val, y_val = X_all[n_train:], y_all[n_train:]
+
+        print(f"🧠 Training Neural Network on {self.device} ({n_train} rows, {n_val} for early stopping)...")
+        self.model.to(self.device)
+        self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+        best_loss, best_state, best_epoch, bad_epochs = float('inf'), None, 0, 0
 
-        dataset = TensorDataset(X_tensor, y_tensor)
-        loader = DataLoader(dataset, batch_size=self.batch_size, shuffle=True)
-        
-        print(f"🧠 Training Neural Network on {self.device}...")
-        self.model.train()
-        
         for epoch in range(self.epochs):
-            total_loss = 0
-            for batch_X, batch_y in loader:
-                batch_X, batch_y = batch_X.to(self.device), batch_y.to(self.device)
-                
+            self.model.train()
+            perm = torch.randperm(n_train, device=self.device)
+            for i in range(0, n_train, self.batch_size):
+                idx = perm[i:i + self.batch_size]
+                if len(idx) < 2:
+                    continue  # BatchNorm needs at least two rows
                 self.optimizer.zero_grad()
-                outputs = self.model(batch_X)
-                loss = self.criterion(outputs, batch_y)
+                loss = self.criterion(self.model(X_train[idx]), y_train[idx])
                 loss.backward()
                 self.optimizer.step()
-                total_loss += loss.item()
 
-    def predict(self, X):
-        self.model.eval()
-        X_tensor = torch.tensor(X.values, dtype=torch.float32).to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model(X_tensor)
-            
-            if self.mode == 'classification':
-                _, predicted = torch.max(outputs, 1)
-                return predicted.cpu().numpy()
+            if not n_val:
+                continue
+            self.model.eval()
+            with torch.no_grad():
+                val_loss = self.criterion(self.model(X_val), y_val).item()
+            if val_loss < best_loss - 1e-4:
+                best_loss, best_epoch, bad_epochs = val_loss, epoch + 1, 0
+                best_state = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
             else:
-                return outputs.cpu().numpy().flatten()
+                bad_epochs += 1
+                if bad_epochs >= self.config.NN_PATIENCE:
+                    break
+
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
+            print(f"   ⏹️ Stopped after {epoch + 1} epochs; restored epoch {best_epoch} (val loss {best_loss:.4f}).")
+        self.model.eval()
+        self.runtime = None  # weights changed; export() rebuilds the serving module
+
+    def warm_start(self, filename):
+        """Initialises the weights from a saved model if its architecture matches. Returns True on success."""
+        path = self.config.MODELS_DIR / filename
+        if not path.exists():
+            return False
+        try:
+            checkpoint = torch.load(path, map_location='cpu')
+        except Exception:
+            return False  # not a torch artifact (e.g. a forest won last time)
+        state = checkpoint.get('state_dict', checkpoint)
+        own = self.model.state_dict()
+        if set(state) != set(own) or any(state[k].shape != own[k].shape for k in own):
+            return False
+        self.model.load_state_dict(state)
+        print(f"   ♻️ Warm start from {filename}")
+        return True
+
+    # --- INFERENCE ---
+    def _serving_module(self):
+        if self.runtime is not None:
+            return self.runtime
+        self.model.eval()
+        return self.model
+
+    def _forward(self, X):
+        """Runs the network on CPU in batches of Config.NN_INFERENCE_BATCH rows."""
+        X_tensor = _as_tensor(X)
+        module = self._serving_module()
+        if module is self.model:
+            self.model.to('cpu')
+        step = self.config.NN_INFERENCE_BATCH
+        with torch.inference_mode():
+            outputs = [module(X_tensor[i:i + step]) for i in range(0, len(X_tensor), step)]
+        return torch.cat(outputs) if len(outputs) > 1 else outputs[0]
+
+    def predict_proba(self, X):
+        if self.mode != 'classification':
+            raise NotImplementedError("Regression does not support probabilities.")
+        return torch.softmax(self._forward(X), dim=1).numpy()
+
+    def predict(self, X):
+        outputs = self._forward(X)
+        if self.mode == 'classification':
+            return outputs.argmax(dim=1).numpy()
+        return outputs.numpy().flatten()
+
+    # --- ARTIFACTS ---
+    def export(self):
+        """
+        Builds the TorchScript serving module: frozen (weights inlined, BatchNorm/Dropout in eval form)
+        and optimised for CPU inference. Serving it needs torch only, not this module's classes.
+        """
+        self.model.to('cpu').eval()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)  # torch.jit is deprecated upstream but still supported
+            scripted = torch.jit.script(self.model)
+            self.runtime = torch.jit.optimize_for_inference(torch.jit.freeze(scripted))
+        return self.runtime
+
+    def quantize(self):
+        """
+        Post-training dynamic int8 quantization for CPU serving: BatchNorm is folded into the
+        Linear layers, then every Linear gets int8 weights (activations quantized on the fly).
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # torch.ao / torch.jit deprecation notices
+            qmodel = torch.ao.quantization.quantize_dynamic(fold_batchnorm(self.model), {nn.Linear}, dtype=torch.qint8)
+            return torch.jit.trace(qmodel, torch.zeros(1, self.input_size))
+
+    def save_quantized(self, filename):
+        """Writes the int8 module next to the float model (model_X.int8.pt) and returns it."""
+        path = _int8_path(self.config.MODELS_DIR / filename)
+        qmodel = self.quantize()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            torch.jit.save(qmodel, path)
+        print(f"💾 Quantized model saved to {path}")
+        return qmodel
 
     def save(self, filename="nn_model.pth"):
+        """
+        Saves a checkpoint (weights + architecture sizes) and, next to it,
+        the TorchScript module (same name, .pt) used for serving.
+        """
+        os.makedirs(self.config.MODELS_DIR, exist_ok=True)
+        path = self.config.MODELS_DIR / filename
+        torch.save({
+            'state_dict': self.model.state_dict(),
+            'input_size': self.input_size,
+            'output_size': self.output_size,
+            'mode': self.mode,
+        }, path)
+        self.model.to(self.device)
+
+        script_path = path.with_suffix('.pt')
+        if script_path == path:
+            script_path = path.with_suffix('.script.pt')
+        runtime = self.runtime or self.export()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            torch.jit.save(runtime, script_path)
+        print(f"💾 Model saved to {path} (TorchScript: {script_path.name})")
+
+    def load(self, filename):
         path = self.config.MODELS_DIR / filename
-        torch.save(self.model.state_dict(), path)
-        print(f"💾 Model saved to {path}")
\ No newline at end of file
+        if not path.exists():
+            raise FileNotFoundError(f"Model not found at {path}")
+        torch.set_num_threads(self.config.NN_NUM_THREADS)
+
+        checkpoint = torch.load(path, map_location='cpu')
+        if 'state_dict' not in checkpoint:
+            # Older artifacts hold a bare state_dict; read the sizes off the weights
+            checkpoint = {'state_dict': checkpoint,
+                          'input_size': checkpoint['layer1.0.weight'].shape[1],
+                          'output_size': checkpoint['output.weight'].shape[0]}
+        self.input_size, self.output_size = checkpoint['input_size'], checkpoint['output_size']
+        self.mode = checkpoint.get('mode', self.mode)
+        self.model = SoccerNet(self.input_size, self.output_size)
+        self.model.load_state_dict(checkpoint['state_dict'])
+        self.model.eval()
+
+        script_path = path.with_suffix('.pt') if path.suffix != '.pt' else path.with_suffix('.script.pt')
+        if self.quantized:
+            script_path = _int8_path(path)
+            if not (script_path.exists() and script_path.stat().st_mtime >= path.stat().st_mtime):
+                self.runtime = self.quantize()
+                return
+        if script_path.exists() and script_path.stat().st_mtime >= path.stat().st_mtime:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', FutureWarning)
+                self.runtime = torch.jit.load(script_path, map_location='cpu')
+        else:
+            self.export()
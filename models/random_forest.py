@@ -1,4 +1,5 @@
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+import numpy as np
 import joblib
 import sys
 import os
@@ -6,8 +7,9 @@ import os
 # Link to Config
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
+from models.artifacts import TreeArtifactMixin
 
-class RandomForestModel:
+class RandomForestModel(TreeArtifactMixin):
     def __init__(self, mode='classification', **kwargs):
         self.config = Config()
         self.mode = mode
@@ -21,8 +23,9 @@ class RandomForestModel:
         if 'max_depth' not in kwargs: kwargs['max_depth'] = 10
         
         # 3. FORCE CRITICAL SETTINGS
-        # n_jobs=1 prevents Windows freeze
-        kwargs['n_jobs'] = 1 
+        # n_jobs=1 by default prevents Windows freeze.
+        # Parallel training passes each worker's share of the CPU budget explicitly.
+        kwargs['n_jobs'] = kwargs.get('n_jobs') or 1
         kwargs['random_state'] = 42
         
         # 4. INITIALIZE MODEL
@@ -32,28 +35,42 @@ class RandomForestModel:
             self.model = RandomForestClassifier(**kwargs)
         else:
             self.model = RandomForestRegressor(**kwargs)
+        self.runtime = None
 
     def train(self, X, y):
         print(f"   🌲 Training Random Forest ({self.mode})...")
         self.model.fit(X, y)
+        self.runtime = None
+
+    def add_trees(self, X, y, n_new_trees=50, max_trees=None):
+        """
+        Incremental update: grows the fitted forest by `n_new_trees` trees trained on (X, y) only,
+        using sklearn's warm_start. If `max_trees` is set, the oldest trees are retired so the
+        forest acts as a sliding window over time.
+        """
+        if self.mode == 'classification' and not np.array_equal(np.unique(y), self.model.classes_):
+            raise ValueError("Incremental data must contain every class the forest was trained on.")
+
+        print(f"   🌲 Adding {n_new_trees} trees to Random Forest ({self.mode})...")
+        self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + n_new_trees)
+        self.model.fit(X, y)
+        self.model.set_params(warm_start=False)
+        self.runtime = None
+
+        if max_trees and len(self.model.estimators_) > max_trees:
+            retired = len(self.model.estimators_) - max_trees
+            self.model.estimators_ = self.model.estimators_[retired:]
+            self.model.set_params(n_estimators=max_trees)
+            print(f"   🍂 Retired {retired} oldest trees (window = {max_trees}).")
 
     def predict(self, X):
+        if self._use_runtime(X):
+            return self.runtime.predict(X)
         return self.model.predict(X)
         
     def predict_proba(self, X):
         if self.mode == 'classification':
+            if self._use_runtime(X):
+                return self.runtime.predict_proba(X)
             return self.model.predict_proba(X)
         raise NotImplementedError("Regression does not support probabilities.")
-
-    def save(self, filename="rf_model.pkl"):
-        # Create directory if missing
-        os.makedirs(self.config.MODELS_DIR, exist_ok=True)
-        path = self.config.MODELS_DIR / filename
-        joblib.dump(self.model, path)
-        print(f"   💾 Model saved to {path}")
-        
-    def load(self, filename):
-        path = self.config.MODELS_DIR / filename
-        if not path.exists():
-            raise FileNotFoundError(f"Model not found at {path}")
-        self.model = joblib.load(path)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import json
+import hashlib
+import joblib
+import pandas as pd
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def data_fingerprint(df):
+    """Short content hash of a feature matrix, used as the 'data version' of a training run."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:12]
+
+class ModelRegistry:
+    """
+    Versions the scaler and the models trained on it together.
+    One training run = one version, recorded in models/saved/manifest.json:
+        {version, data_version, features, scaler: {...}, feature_reference: {...}, models: {target: {...}},
+         serving: {target: {model_type: {file, latency_ms, ...}}}}
+    """
+    def __init__(self):
+        self.config = Config()
+        self.path = self.config.MANIFEST_PATH
+        self.manifest = self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    @property
+    def version(self):
+        return self.manifest.get('version')
+
+    def start_version(self, data_version=None):
+        """Begins a new artifact version (call once per training run)."""
+        self.manifest = {
+            'version': datetime.now().strftime("%Y%m%d_%H%M%S"),
+            'data_version': data_version,
+            'features': list(self.config.FEATURES_NUMERIC),
+            'scaler': {},
+            'models': {},
+            'serving': {},
+        }
+        return self.manifest['version']
+
+    def save_scaler(self, scaler, reference=None):
+        """Writes the fitted scaler exactly once for this version (plus the training feature reference)."""
+        os.makedirs(self.config.SCALER_PATH.parent, exist_ok=True)
+        joblib.dump(scaler, self.config.SCALER_PATH)
+        self.manifest['scaler'] = {
+            'path': os.path.relpath(self.config.SCALER_PATH, self.config.PROJECT_ROOT),
+            'sha256': file_sha256(self.config.SCALER_PATH),
+        }
+        print(f"   - Scaler saved to {self.config.SCALER_PATH} (version {self.version})")
+        if reference is not None:
+            self.save_feature_reference(reference)
+
+    def save_feature_reference(self, reference):
+        """Training-time feature histograms, the baseline of serve-time drift checks (monitoring/feature_drift.py)."""
+        path = self.config.FEATURE_REFERENCE_PATH
+        os.makedirs(path.parent, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(dict(reference, version=self.version), f)
+        self.manifest['feature_reference'] = {
+            'path': os.path.relpath(path, self.config.PROJECT_ROOT),
+            'sha256': file_sha256(path),
+        }
+
+    def register_model(self, target, model_type, filename, **info):
+        """Records a saved model file under the current version."""
+        entry = {'model_type': model_type, 'file': filename, 'version': self.version}
+        path = self.config.MODELS_DIR / filename
+        if path.is_file():
+            entry['sha256'] = file_sha256(path)
+        entry.update(info)
+        self.manifest.setdefault('models', {})[target] = entry
+
+    def keep_model(self, target, entry, serving=None):
+        """Carries a previous version's entries (its files untouched) into the current version."""
+        self.manifest.setdefault('models', {})[target] = entry
+        if serving:
+            self.manifest.setdefault('serving', {})[target] = serving
+
+    def model_entry(self, target):
+        return self.manifest.get('models', {}).get(target)
+
+    def register_serving_model(self, target, model_type, filename, latency_ms, **info):
+        """Records a model the predictor may serve for `target`, with its single-row latency."""
+        entry = {'file': filename, 'latency_ms': round(latency_ms, 3), 'version': self.version}
+        entry.update(info)
+        self.manifest.setdefault('serving', {}).setdefault(target, {})[model_type] = entry
+
+    def serving_models(self, target):
+        return self.manifest.get('serving', {}).get(target, {})
+
+    def write(self):
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=4, default=str)
+        os.replace(tmp_path, self.path)
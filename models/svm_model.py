@@ -1,5 +1,7 @@
-from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.linear_model import SGDClassifier, SGDRegressor, LogisticRegression
 from sklearn.calibration import CalibratedClassifierCV
+import numpy as np
+import pandas as pd
 import joblib
 import sys
 import os
@@ -7,51 +9,158 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
 
+def _decision_matrix(sgd, X):
+    scores = sgd.decision_function(X)
+    return scores.reshape(-1, 1) if scores.ndim == 1 else scores
+
+def _fit_calibrator(sgd, X, y):
+    """Platt-style calibration: a logistic regression on the SGD margins of a held-out window."""
+    if len(np.unique(y)) < len(sgd.classes_):
+        return None  # window misses a class; keep the previous calibrator
+    calibrator = LogisticRegression(max_iter=1000)
+    calibrator.fit(_decision_matrix(sgd, X), y)
+    return calibrator
+
 class SVMModel:
+    """
+    Linear SVM trained with SGD. Training is incremental (partial_fit over chunks), so it can
+    stream data that does not fit in memory and absorb new results online; probabilities come
+    from a calibrator fitted on a held-out recent window instead of CalibratedClassifierCV refits.
+    """
     def __init__(self, mode='classification', **kwargs):
         self.config = Config()
         self.mode = mode
-        
+
         kwargs.pop('mode', None)
-        
+
         # Defaults
         if 'alpha' not in kwargs: kwargs['alpha'] = 0.0001
-        
+
         kwargs['max_iter'] = kwargs.get('max_iter', 1000)
         kwargs['tol'] = kwargs.get('tol', 1e-3)
         kwargs['random_state'] = 42
-        
+
         # SGDClassifier/Regressor parameters
-        # We need to filter kwargs because CalibratedClassifierCV doesn't take the same args as SGD
-        sgd_params = {k:v for k,v in kwargs.items() if k in ['alpha', 'penalty', 'max_iter', 'tol', 'random_state', 'n_jobs']}
-        sgd_params['n_jobs'] = 1 # Fix for windows
-        
+        sgd_params = {k:v for k,v in kwargs.items() if k in ['alpha', 'penalty', 'max_iter', 'tol', 'random_state']}
+
         if self.mode == 'classification':
-            base_model = SGDClassifier(loss='hinge', **sgd_params)
-            # Wrap for probabilities
-            self.model = CalibratedClassifierCV(base_model, method='sigmoid')
+            self.model = SGDClassifier(loss='hinge', n_jobs=1, **sgd_params) # n_jobs=1: fix for windows
         else:
             self.model = SGDRegressor(**sgd_params)
+        self.calibrator = None
+        self.rng = np.random.default_rng(42)
+
+    # --- TRAINING ---
+    def _partial_fit(self, X, y, classes=None):
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y)
+        order = self.rng.permutation(len(X))  # SGD wants shuffled rows
+        if self.mode == 'classification':
+            self.model.partial_fit(X[order], y[order], classes=classes)
+        else:
+            self.model.partial_fit(X[order], y[order])
+
+    def _split_recent(self, X, y):
+        """Rows are chronological: the newest SVM_CALIBRATION_FRACTION is held out for calibration."""
+        n_cal = int(len(X) * self.config.SVM_CALIBRATION_FRACTION) if self.mode == 'classification' else 0
+        n_fit = len(X) - n_cal
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y)
+        return X[:n_fit], y[:n_fit], X[n_fit:], y[n_fit:]
 
     def train(self, X, y):
-        print(f"   📐 Training SVM (Linear SGD) ({self.mode})...")
-        self.model.fit(X, y)
+        """In-memory data: several shuffled partial_fit passes in chunks, then calibration on the newest rows."""
+        print(f"   📐 Training SVM (Linear SGD, streaming) ({self.mode})...")
+        X_fit, y_fit, X_cal, y_cal = self._split_recent(X, y)
+        classes = np.unique(y) if self.mode == 'classification' else None
+        step = self.config.SVM_CHUNK_ROWS
+        for _ in range(self.config.SVM_PASSES):
+            for i in range(0, len(X_fit), step):
+                self._partial_fit(X_fit[i:i + step], y_fit[i:i + step], classes)
+        if len(X_cal):
+            self.calibrator = _fit_calibrator(self.model, X_cal, y_cal)
 
+    def train_from_csv(self, path, target_name, engineer, chunksize=None):
+        """
+        Out-of-core training straight from a processed CSV (chronological), `chunksize` rows at a time.
+        The newest rows (SVM_CALIBRATION_FRACTION, at most SVM_CALIBRATION_ROWS) never reach
+        partial_fit: they are kept aside and used to calibrate. `engineer` must hold the fitted scaler.
+        """
+        chunksize = chunksize or self.config.SVM_CHUNK_ROWS
+        target_col = self.config.TARGETS[target_name]
+        classes = None
+        if self.mode == 'classification':
+            classes = np.array(sorted(set(self.config.RESULT_MAP.values()))) if target_name == 'WLD' else np.array([0, 1])
+        print(f"   📐 Streaming SVM training from {os.path.basename(str(path))} ({chunksize} rows/chunk)...")
+
+        # Cheap counting pass (target column only) to know where the calibration window starts
+        n_total = sum(int(chunk[target_col].notna().sum())
+                      for chunk in pd.read_csv(path, usecols=[target_col], chunksize=chunksize))
+        n_hold = 0
+        if self.mode == 'classification':
+            n_hold = min(self.config.SVM_CALIBRATION_ROWS, int(n_total * self.config.SVM_CALIBRATION_FRACTION))
+        n_fit = n_total - n_hold
+
+        held = []
+        for pass_no in range(self.config.SVM_PASSES):
+            seen = 0
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                chunk = chunk.dropna(subset=[target_col])
+                fit = chunk.iloc[:max(0, n_fit - seen)]
+                if pass_no == 0 and len(fit) < len(chunk):
+                    held.append(chunk.iloc[len(fit):])
+                if len(fit):
+                    self._partial_fit(engineer.transform(fit), fit[target_col], classes)
+                seen += len(chunk)
+
+        if held:
+            calibration_df = pd.concat(held)
+            self.calibrator = _fit_calibrator(self.model, engineer.transform(calibration_df),
+                                              calibration_df[target_col])
+
+    def update(self, X, y):
+        """
+        Online update from newly graded results: partial_fit on the older rows, then recalibrate
+        on the newest ones. Costs one pass over the new rows only.
+        """
+        if isinstance(self.model, CalibratedClassifierCV):
+            raise ValueError("Legacy CalibratedClassifierCV artifact cannot be updated online; retrain it first.")
+        X_fit, y_fit, X_cal, y_cal = self._split_recent(X, y)
+        if self.mode == 'classification' and not np.isin(y_fit, self.model.classes_).all():
+            raise ValueError("Update contains classes the model was not trained on.")
+        print(f"   📐 Online SVM update: {len(X_fit)} rows, recalibrating on {len(X_cal)} ({self.mode})...")
+        if len(X_fit):
+            self._partial_fit(X_fit, y_fit)
+        if len(X_cal):
+            self.calibrator = _fit_calibrator(self.model, X_cal, y_cal) or self.calibrator
+
+    # --- INFERENCE ---
     def predict(self, X):
-        return self.model.predict(X)
-        
+        if self.mode == 'classification' and self.calibrator is not None:
+            return self.model.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        if isinstance(self.model, CalibratedClassifierCV):
+            return self.model.predict(X)  # legacy artifact
+        return self.model.predict(np.asarray(X, dtype=np.float64))
+
     def predict_proba(self, X):
-        if self.mode == 'classification':
-            return self.model.predict_proba(X)
-        raise NotImplementedError("Regression does not support probabilities.")
+        if self.mode != 'classification':
+            raise NotImplementedError("Regression does not support probabilities.")
+        if isinstance(self.model, CalibratedClassifierCV):
+            return self.model.predict_proba(X)  # legacy artifact
+        if self.calibrator is None:
+            raise ValueError("SVM has no calibrator yet (train it or update it with a recent window).")
+        return self.calibrator.predict_proba(_decision_matrix(self.model, np.asarray(X, dtype=np.float64)))
 
-    def save(self, filename="svm_model.pkl"):
+    def save(self, filename="svm_model.pkl", compress=None):
         path = self.config.MODELS_DIR / filename
-        joblib.dump(self.model, path)
+        artifact = {'model': self.model, 'calibrator': self.calibrator, 'mode': self.mode}
+        joblib.dump(artifact, path, compress=self.config.MODEL_COMPRESS if compress is None else compress)
         print(f"   💾 Model saved to {path}")
-        
+
     def load(self, filename):
         path = self.config.MODELS_DIR / filename
         if not path.exists():
             raise FileNotFoundError(f"Model not found at {path}")
-        self.model = joblib.load(path)
\ No newline at end of file
+        artifact = joblib.load(path)
+        if isinstance(artifact, dict):
+            self.model, self.calibrator, self.mode = artifact['model'], artifact['calibrator'], artifact['mode']
+        else:
+            self.model, self.calibrator = artifact, None  # older artifacts: the bare estimator
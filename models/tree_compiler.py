@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import numpy as np
+from sklearn.ensemble import (RandomForestClassifier, RandomForestRegressor,
+                              GradientBoostingClassifier, GradientBoostingRegressor)
+
+class CompiledEnsemble:
+    """
+    Flat NumPy form of a fitted RandomForest / GradientBoosting model for low-latency inference.
+
+    Every tree's nodes live in shared arrays (feature, threshold, left, right, value) and
+    leaves point to themselves, so one row (or a small batch) walks ALL trees together:
+    `max_depth` vectorised gather steps instead of one sklearn call per tree.
+
+    Output = link(base + scale * sum over trees of value[leaf])
+        RandomForest:     base = 0, scale = 1 / n_trees, link = identity
+        GradientBoosting: base = init prediction, scale = learning_rate, link = identity / sigmoid / softmax
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'base')
+
+    def __init__(self, feature, threshold, left, right, value, roots, base, scale, max_depth,
+                 link='identity', classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.base = base
+        self.scale = float(scale)
+        self.max_depth = int(max_depth)
+        self.link = link
+        self.classes = classes
+
+    # --- COMPILATION ---
+    @classmethod
+    def from_sklearn(cls, est):
+        if isinstance(est, (RandomForestClassifier, RandomForestRegressor)):
+            return cls._from_forest(est)
+        if isinstance(est, (GradientBoostingClassifier, GradientBoostingRegressor)):
+            return cls._from_boosting(est)
+        raise TypeError(f"Cannot compile {type(est).__name__}")
+
+    @classmethod
+    def _from_forest(cls, est):
+        is_clf = isinstance(est, RandomForestClassifier)
+        trees, values = [], []
+        for tree in est.estimators_:
+            t = tree.tree_
+            if is_clf:
+                v = t.value[:, 0, :].astype(np.float64)
+                v = v / v.sum(axis=1, keepdims=True)  # per-leaf class probabilities
+            else:
+                v = t.value[:, :, 0].astype(np.float64)
+            trees.append(t)
+            values.append(v)
+        n_out = values[0].shape[1]
+        return cls._pack(trees, values, base=np.zeros(n_out), scale=1.0 / len(trees),
+                         link='identity', classes=getattr(est, 'classes_', None))
+
+    @classmethod
+    def _from_boosting(cls, est):
+        is_clf = isinstance(est, GradientBoostingClassifier)
+        if is_clf and getattr(est, 'loss', 'log_loss') == 'exponential':
+            raise NotImplementedError("Exponential loss is not supported by the compiled runtime.")
+
+        n_out = est.estimators_.shape[1]
+        trees, values = [], []
+        for stage in est.estimators_:
+            for k, tree in enumerate(stage):
+                t = tree.tree_
+                v = np.zeros((t.node_count, n_out))
+                v[:, k] = t.value[:, 0, 0]  # each tree only contributes to its own class column
+                trees.append(t)
+                values.append(v)
+
+        if not is_clf:
+            link = 'identity'
+        else:
+            link = 'sigmoid' if n_out == 1 else 'softmax'
+        compiled = cls._pack(trees, values, base=np.zeros(n_out), scale=est.learning_rate,
+                             link=link, classes=getattr(est, 'classes_', None))
+
+        # The init estimator is constant, so recover it from one reference row:
+        # base = raw_prediction(x0) - learning_rate * sum(trees(x0))
+        x0 = np.zeros((1, est.n_features_in_))
+        x0_input = x0
+        if hasattr(est, 'feature_names_in_'):
+            import pandas as pd
+            x0_input = pd.DataFrame(x0, columns=est.feature_names_in_)
+        raw0 = est.decision_function(x0_input) if is_clf else est.predict(x0_input)
+        compiled.base = np.asarray(raw0, dtype=np.float64).reshape(n_out) - compiled._raw(x0)[0]
+        return compiled
+
+    @classmethod
+    def _pack(cls, trees, values, base, scale, link, classes):
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+        n_nodes = offsets[-1]
+
+        feature = np.empty(n_nodes, dtype=np.intp)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        left = np.empty(n_nodes, dtype=np.intp)
+        right = np.empty(n_nodes, dtype=np.intp)
+
+        for t, start in zip(trees, offsets[:-1]):
+            end = start + t.node_count
+            own = np.arange(start, end)
+            is_leaf = t.children_left == -1
+            # Leaves loop onto themselves so extra traversal steps are no-ops
+            feature[start:end] = np.where(is_leaf, 0, t.feature)
+            threshold[start:end] = np.where(is_leaf, 0.0, t.threshold)
+            left[start:end] = np.where(is_leaf, own, t.children_left + start)
+            right[start:end] = np.where(is_leaf, own, t.children_right + start)
+
+        return cls(feature=feature, threshold=threshold, left=left, right=right,
+                   value=np.vstack(values), roots=offsets[:-1].astype(np.intp), base=base,
+                   scale=scale, max_depth=max(t.max_depth for t in trees), link=link, classes=classes)
+
+    # --- ARTIFACT ---
+    def save(self, directory, **meta):
+        """
+        Writes every node array as an uncompressed .npy file plus meta.json.
+        The directory is swapped in atomically; processes that already mapped the
+        old files keep reading them until they reload.
+        """
+        directory = str(directory)
+        tmp_dir = directory + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in self.ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+
+        meta.update({
+            'scale': self.scale,
+            'max_depth': self.max_depth,
+            'link': self.link,
+            'classes': None if self.classes is None else np.asarray(self.classes).tolist(),
+        })
+        with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+            json.dump(meta, f, indent=4)
+
+        old_dir = directory + ".old"
+        if os.path.isdir(directory):
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Maps the node arrays read-only (no copy, no unpickling): load is near-instant and
+        every process serving the same model shares the same page-cache pages.
+        Returns (runtime, meta).
+        """
+        directory = str(directory)
+        with open(os.path.join(directory, "meta.json"), 'r') as f:
+            meta = json.load(f)
+        # np.asarray drops the memmap subclass (cheaper indexing) but keeps the mapping
+        arrays = {name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+                  for name in cls.ARRAYS}
+        classes = None if meta['classes'] is None else np.asarray(meta['classes'])
+        runtime = cls(scale=meta['scale'], max_depth=meta['max_depth'], link=meta['link'],
+                      classes=classes, **arrays)
+        return runtime, meta
+
+    # --- INFERENCE ---
+    def _leaves(self, X):
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        idx = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[idx]] <= self.threshold[idx]
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+        return idx
+
+    def _raw(self, X):
+        leaf_values = self.value[self._leaves(X)]  # (rows, trees, outputs)
+        return self.base + self.scale * leaf_values.sum(axis=1)
+
+    def predict_proba(self, X):
+        raw = self._raw(X)
+        if self.link == 'sigmoid':
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        if self.link == 'softmax':
+            e = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return e / e.sum(axis=1, keepdims=True)
+        return raw
+
+    def predict(self, X):
+        if self.classes is not None:
+            return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+        raw = self._raw(X)
+        return raw[:, 0] if raw.shape[1] == 1 else raw
@@ -9,7 +9,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
 from utils.feature_engineering import FeatureEngineer
 from models.model_factory import ModelFactory
-from sklearn.metrics import accuracy_score, mean_squared_error
+from models.registry import ModelRegistry
+from utils.evaluation import bootstrap_metrics, format_interval
+from monitoring.performance_monitor import PerformanceMonitor
+from monitoring.feature_drift import FeatureDriftTracker
+from utils.status_logger import read_system_status, system_status_path, update_system_status
 
 class AlertSystem:
     def __init__(self):
@@ -24,48 +28,84 @@ class AlertSystem:
             'Over25': 0.52,     # Alert if Accuracy < 52%
             'TotalGoals': 2.0   # Alert if MSE > 2.0 (Lower is better for regression)
         }
-    def _save_status_file(self, alerts):
-        """Saves system health to JSON for the Web Dashboard."""
-        # Ensure logs directory exists
-        log_dir = self.config.PROJECT_ROOT / "logs"
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        status_path = log_dir / "system_status.json"
-        
-        status_data = {
+    def _save_status_file(self, alerts, metrics=None, live=None, feature_drift=None, validation_alerts=None):
+        """
+        Saves system health (and the metrics with their confidence intervals) to JSON for the Web Dashboard.
+        Only the sections passed are replaced: a live check (metrics=None) keeps the last weekly metrics.
+        """
+        sections = {
             "last_check": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "status": "CRITICAL" if alerts else "HEALTHY",
             "active_alerts": alerts,
-            "models_monitored": list(self.thresholds.keys())
+            "models_monitored": list(self.thresholds.keys()),
+            "metrics": metrics,
+            "validation_alerts": validation_alerts,
+            "live": live,
+            "feature_drift": feature_drift,
         }
-        
-        with open(status_path, 'w') as f:
-            json.dump(status_data, f, indent=4)
-        print(f"   💾 System Status saved to {status_path.name}")
+        update_system_status(**{key: value for key, value in sections.items() if value is not None})
+        print(f"   💾 System Status saved to {system_status_path().name}")
 
-    def check_health(self):
+    def check_health(self, validate=True):
+        """
+        Live check: reads the streaming performance monitor (constant time, no model loading).
+        validate=True also re-scores every model on the validation set (the full weekly diagnostic).
+        """
         print("🩺 RUNNING SYSTEM DIAGNOSTICS...")
         print("================================")
+        alerts, metrics = [], {}
+
+        # 1. Live performance on graded results (sequential drift tests)
+        live = PerformanceMonitor().health()
+        for target_name, stats in live.items():
+            value = f"{stats['metric']} {stats['window']:.4f} over the last {min(stats['graded'], self.config.MONITOR_WINDOW)} matches"
+            if stats['alarm']:
+                alerts.append(f"🔴 {target_name}: live drift on version {stats['version']} ({value}, CUSUM {stats['cusum']:.2f})")
+            else:
+                print(f"   📡 {target_name} (live): {value} (No drift)")
+
+        # 2. Serve-time feature drift (last report published by the predictor processes)
+        drift = FeatureDriftTracker().report()
+        if drift and drift['drifted']:
+            worst = ", ".join(f"{f} (PSI {drift['features'][f]['psi']:.2f})" for f in drift['drifted'][:5])
+            alerts.append(f"🔴 Feature drift in served requests vs training data: {worst}")
+        elif drift:
+            print(f"   🧭 Feature drift: {drift['status']} ({drift['samples']:.0f} requests)")
+
+        # 3. Validation set diagnostic (a live check carries the last diagnostic's alerts over)
+        if validate:
+            validation_alerts = []
+            self._check_validation(validation_alerts, metrics)
+        else:
+            metrics, validation_alerts = None, None
+        alerts += validation_alerts if validate else read_system_status().get('validation_alerts', [])
+
+        # 4. Trigger Alert
+        self._trigger_incident_response(alerts)
         
-        # 1. Load Recent Data (Validation Set)
-        # In a live system, this would be "Last Week's Games"
+        self._save_status_file(alerts, metrics, live, drift, validation_alerts)
+
+    def _check_validation(self, alerts, metrics):
+        # Load Recent Data (Validation Set)
         val_path = self.config.PROCESSED_DATA_DIR / "val.csv"
         if not val_path.exists():
             print("⚠️ Critical: No validation data found for monitoring.")
             return
             
         val_df = pd.read_csv(val_path)
-        alerts = []
+        registry = ModelRegistry()
         
-        # 2. Check Each Model
+        # Check Each Model
         for target_name, threshold in self.thresholds.items():
-            filename = f"model_{target_name}.pkl"
             mode = 'regression' if target_name == 'TotalGoals' else 'classification'
+            # The registered champion of any type (older trees: the RF file)
+            entry = registry.model_entry(target_name) or {}
+            filename = entry.get('file', f"model_{target_name}.pkl")
             
             # Load Model
             try:
                 # We use the factory to load the generic structure, then load weights
-                model = ModelFactory.get_model('rf', mode=mode)
+                model = ModelFactory.get_model(entry.get('model_type', 'rf'), mode=mode)
                 model.load(filename)
             except FileNotFoundError:
                 print(f"   ⚠️ {target_name}: Model file missing. Skipping.")
@@ -76,36 +116,36 @@ class AlertSystem:
                 X_val, y_true = self.engineer.transform(val_df, target_name=target_name)
                 preds = model.predict(X_val)
                 
-                # Calculate Metric
-                current_perf = 0
-                status = "OK"
-                
+                # Calculate Metric + bootstrap confidence interval (block resampling: match weeks are correlated)
+                # Alerts fire only when the WHOLE interval is on the wrong side of the threshold,
+                # so a small validation window cannot raise an alarm through noise alone.
                 if mode == 'classification':
-                    current_perf = accuracy_score(y_true, preds)
+                    proba = model.predict_proba(X_val) if hasattr(model, 'predict_proba') else None
+                    ci = bootstrap_metrics(y_true, preds, proba=proba)
+                    acc = ci['accuracy']
                     # Alert Logic: Is Accuracy TOO LOW?
-                    if current_perf < threshold:
-                        status = "CRITICAL"
-                        alerts.append(f"🔴 {target_name}: Accuracy {current_perf:.2%} is below threshold {threshold:.2%}")
+                    if acc['high'] < threshold:
+                        alerts.append(f"🔴 {target_name}: Accuracy {format_interval(acc, percent=True)} is below threshold {threshold:.2%}")
+                    elif acc['value'] < threshold:
+                        print(f"   ⚠️ {target_name}: Accuracy {format_interval(acc, percent=True)} below {threshold:.2%}, but within noise")
                     else:
-                        print(f"   ✅ {target_name}: Accuracy {current_perf:.2%} (Healthy)")
+                        print(f"   ✅ {target_name}: Accuracy {format_interval(acc, percent=True)} (Healthy)")
                         
                 else: # Regression (MSE)
-                    current_perf = mean_squared_error(y_true, preds)
+                    ci = bootstrap_metrics(y_true, preds, mode='regression')
+                    mse = ci['mse']
                     # Alert Logic: Is Error TOO HIGH?
-                    if current_perf > threshold:
-                        status = "CRITICAL"
-                        alerts.append(f"🔴 {target_name}: MSE {current_perf:.2f} is above threshold {threshold:.2f}")
+                    if mse['low'] > threshold:
+                        alerts.append(f"🔴 {target_name}: MSE {format_interval(mse)} is above threshold {threshold:.2f}")
+                    elif mse['value'] > threshold:
+                        print(f"   ⚠️ {target_name}: MSE {format_interval(mse)} above {threshold:.2f}, but within noise")
                     else:
-                        print(f"   ✅ {target_name}: MSE {current_perf:.2f} (Healthy)")
+                        print(f"   ✅ {target_name}: MSE {format_interval(mse)} (Healthy)")
+                metrics[target_name] = ci
                         
             except Exception as e:
                 print(f"   ❌ Error evaluating {target_name}: {e}")
 
-        # 3. Trigger Alert
-        self._trigger_incident_response(alerts)
-        
-        self._save_status_file(alerts)
-
     def _trigger_incident_response(self, alerts):
         """
         Simulates sending an alert to Slack/Email/PagerDuty.
@@ -3,20 +3,31 @@ import pandas as pd
 import plotly.express as px
 from pathlib import Path
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from monitoring.metrics_store import MetricsStore
 
 # Set page title
 st.set_page_config(page_title="SCORE_PULSE AI Monitor", layout="wide")
 
 st.title("🧠 Model Performance Monitor")
 
-# Path to logs
-LOG_FILE = Path(__file__).resolve().parent.parent / "logs" / "training_history.csv"
+COLUMNS = {'timestamp': 'Timestamp', 'target': 'Target', 'model_type': 'ModelType', 'metric': 'Metric',
+           'value': 'Value', 'run_id': 'RunId', 'model_version': 'ModelVersion'}
 
 def load_data():
-    if not LOG_FILE.exists():
+    # Incremental: only rows added since the last rerun are fetched from the metrics store
+    history = st.session_state.get('history')
+    last_id = 0 if history is None or history.empty else int(history['id'].iloc[-1])
+    new_rows = MetricsStore().metrics(since_id=last_id)
+    if not new_rows.empty:
+        history = new_rows if history is None else pd.concat([history, new_rows], ignore_index=True)
+        st.session_state['history'] = history
+    if history is None or history.empty:
         st.error("No log data found. Run 'training.py' first.")
         return None
-    return pd.read_csv(LOG_FILE)
+    return history.rename(columns=COLUMNS)
 
 df = load_data()
 
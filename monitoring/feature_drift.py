@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import time
+import atexit
+import threading
+import numpy as np
+from datetime import datetime
+
+try:
+    import fcntl  # serialises the merge of several server processes (POSIX only)
+except ImportError:
+    fcntl = None
+
+# --- Import Project Modules ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from utils.status_logger import update_system_status
+
+def feature_reference(df, features=None, n_bins=None):
+    """
+    Training-time sketch of every feature: quantile bin edges + the share of rows per bin.
+    Bin i holds edges[i-1] < x <= edges[i]; the outer bins are open-ended.
+    """
+    features = list(features or Config.FEATURES_NUMERIC)
+    n_bins = n_bins or Config.DRIFT_BINS
+    edges, counts = [], []
+    for feature in features:
+        values = df[feature].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        cuts = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])) if len(values) else np.array([])
+        edges.append(cuts.tolist())
+        counts.append(np.bincount((values[:, None] > cuts).sum(axis=1), minlength=n_bins).tolist())
+    return {'features': features, 'bins': n_bins, 'edges': edges, 'counts': counts, 'rows': int(len(df))}
+
+def drift_report(reference, counts, n_samples, config=None):
+    """PSI and (binned) Kolmogorov-Smirnov distance of the served counts against the reference, per feature."""
+    config = config or Config()
+    counts = np.asarray(counts, dtype=np.float64)
+    ref = np.asarray(reference['counts'], dtype=np.float64)
+    eps = 1e-4  # empty bins would make PSI infinite
+    p = np.clip(counts / np.maximum(counts.sum(axis=1, keepdims=True), 1), eps, None)
+    q = np.clip(ref / np.maximum(ref.sum(axis=1, keepdims=True), 1), eps, None)
+    psi = ((p - q) * np.log(p / q)).sum(axis=1)
+    ks = np.abs(np.cumsum(p, axis=1) - np.cumsum(q, axis=1)).max(axis=1)
+
+    report = {
+        'updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'reference_version': reference.get('version'),
+        'samples': round(float(n_samples), 1),
+        'status': 'INSUFFICIENT_DATA',
+        'drifted': [],
+        'features': {},
+    }
+    if n_samples < config.DRIFT_MIN_SAMPLES:
+        return report
+    for i, feature in enumerate(reference['features']):
+        report['features'][feature] = {'psi': round(float(psi[i]), 4), 'ks': round(float(ks[i]), 4)}
+    report['drifted'] = sorted((f for f, s in report['features'].items() if s['psi'] >= config.DRIFT_PSI_ALERT),
+                               key=lambda f: -report['features'][f]['psi'])
+    warned = any(s['psi'] >= config.DRIFT_PSI_WARN for s in report['features'].values())
+    report['status'] = 'DRIFT' if report['drifted'] else 'WARNING' if warned else 'STABLE'
+    return report
+
+class FeatureDriftTracker:
+    """
+    Serve-time feature histograms, compared with the training reference saved next to the scaler.
+    observe() bins one request in a single vectorised comparison against fixed edges (no allocation
+    beyond the row itself); every DRIFT_FLUSH_EVERY requests / DRIFT_FLUSH_SECONDS the pending counts
+    are merged into Config.DRIFT_STATE_PATH (shared by every server process) and the PSI / KS report
+    is written to the "feature_drift" section of logs/system_status.json.
+    """
+    def __init__(self):
+        self.config = Config()
+        self.lock = threading.Lock()
+        self.reference = self._load_reference()
+        self.pending = None
+        self.n_pending = 0
+        self.last_flush = time.monotonic()
+        if self.reference is not None:
+            features, n_bins = self.reference['features'], self.reference['bins']
+            # Edges padded with +inf to one matrix: x > +inf is never true
+            self.edges = np.full((len(features), max(n_bins - 1, 1)), np.inf)
+            for i, cuts in enumerate(self.reference['edges']):
+                self.edges[i, :len(cuts)] = cuts
+            self.rows = np.arange(len(features))
+            self.pending = np.zeros((len(features), n_bins), dtype=np.int64)
+            atexit.register(self.flush)
+
+    def _load_reference(self):
+        try:
+            with open(self.config.FEATURE_REFERENCE_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    @property
+    def features(self):
+        return self.reference['features'] if self.reference else []
+
+    def observe(self, X):
+        """Counts the feature rows of a request (raw, unscaled values in reference feature order)."""
+        if self.reference is None:
+            return
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.rows))
+        bins = (X[:, :, None] > self.edges).sum(axis=2)
+        with self.lock:
+            np.add.at(self.pending, (np.broadcast_to(self.rows, bins.shape), bins), 1)
+            self.n_pending += len(X)
+            due = (self.n_pending >= self.config.DRIFT_FLUSH_EVERY
+                   or time.monotonic() - self.last_flush >= self.config.DRIFT_FLUSH_SECONDS)
+        if due:
+            self.flush()
+
+    # --- SHARED STATE ---
+    def flush(self):
+        """Merges the pending counts into the state file and refreshes the drift report."""
+        with self.lock:
+            if self.reference is None or not self.n_pending:
+                return None
+            pending, n_pending = self.pending, self.n_pending
+            self.pending = np.zeros_like(pending)
+            self.n_pending = 0
+            self.last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(self.config.DRIFT_STATE_PATH), exist_ok=True)
+        with open(f"{self.config.DRIFT_STATE_PATH}.lock", 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            state = self.load_state()
+            if state.get('reference_version') != self.reference.get('version'):
+                state = {}  # new training run: start over against its reference
+            counts = np.asarray(state.get('counts', np.zeros_like(pending)), dtype=np.float64) + pending
+            n_samples = state.get('samples', 0) + n_pending
+            if n_samples > self.config.DRIFT_MAX_SAMPLES:
+                counts, n_samples = counts / 2, n_samples / 2
+            report = drift_report(self.reference, counts, n_samples, self.config)
+            state = {
+                'reference_version': self.reference.get('version'),
+                'samples': n_samples,
+                'counts': counts.tolist(),
+                'report': report,
+            }
+            _write_json(self.config.DRIFT_STATE_PATH, state)
+        self._publish(report)
+        return report
+
+    def load_state(self):
+        try:
+            with open(self.config.DRIFT_STATE_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def report(self):
+        """The last published report (no recomputation)."""
+        return self.load_state().get('report')
+
+    def _publish(self, report):
+        """Updates only the "feature_drift" section of the dashboard's status file."""
+        update_system_status(feature_drift=report)
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+if __name__ == "__main__":
+    # Pass --build-reference to (re)create the training reference from the cached training split
+    if '--build-reference' in sys.argv:
+        from training import build_training_graph
+        from models.registry import ModelRegistry
+        registry = ModelRegistry()
+        registry.save_feature_reference(build_training_graph().run(['reference'])['reference'])
+        registry.write()
+    report = FeatureDriftTracker().report()
+    if not report:
+        print("📭 No serve-time drift report yet.")
+    else:
+        print(f"🧭 Feature drift: {report['status']} ({report['samples']:.0f} requests)")
+        for feature, stats in sorted(report['features'].items(), key=lambda kv: -kv[1]['psi']):
+            print(f"   {feature:<20} | PSI {stats['psi']:>7.4f} | KS {stats['ks']:.3f}")
@@ -1,10 +1,33 @@
-import pandas as pd
+import atexit
 import os
+import sys
+import time
+import weakref
 from datetime import datetime
 from pathlib import Path
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from monitoring.metrics_store import MetricsStore
+
+_open_loggers = weakref.WeakSet()
+
+@atexit.register
+def _flush_open_loggers():
+    for logger in list(_open_loggers):
+        logger.flush()
+
 class TrainingLogger:
-    def __init__(self):
+    """
+    Buffered logger for training / monitoring runs.
+    Metrics and events collect in memory and are written in batches: metrics (and events) to the
+    SQLite MetricsStore, events also to system_events.log in a single append. A batch goes out every
+    Config.METRICS_FLUSH_ROWS rows, when the buffer is older than METRICS_FLUSH_SECONDS, on any
+    WARNING/ERROR event, on flush() and at interpreter exit. A batch the store rejects (e.g. a lock
+    timeout) stays buffered for the next flush; if the last flush fails too, its metrics go to the text log.
+    """
+    def __init__(self, run_id=None, model_version=None):
+        self.config = Config()
         # 1. Determine the Root Directory (Go up two levels from monitoring/logger.py)
         self.project_root = Path(__file__).resolve().parent.parent
         self.log_dir = self.project_root / "logs"
@@ -12,14 +35,24 @@ class TrainingLogger:
         # 2. Create logs directory if it doesn't exist
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
-        # 3. Define File Paths
-        self.history_file = self.log_dir / "training_history.csv"
+        # 3. Define File Paths + the metrics sink
         self.event_file = self.log_dir / "system_events.log"
-        
-        # 4. Initialize History CSV with headers if missing
-        if not self.history_file.exists():
-            df = pd.DataFrame(columns=['Timestamp', 'Target', 'ModelType', 'Metric', 'Value'])
-            df.to_csv(self.history_file, index=False)
+        self.store = MetricsStore()
+
+        # 4. Run identity: every row of this run carries it (model_version is set once it is known)
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{os.getpid()}"
+        self.model_version = model_version
+
+        self.metrics, self.events, self.lines = [], [], []
+        self.buffered_since = None
+        self.retry_at = 0.0
+        _open_loggers.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
 
     def log_event(self, message, level="INFO"):
         """
@@ -37,31 +70,55 @@ class TrainingLogger:
             clean_msg = message.encode('ascii', 'ignore').decode('ascii')
             print(f"Log: {clean_msg}")
 
-        # B. Save to File (UTF-8 Enforced)
-        try:
-            with open(self.event_file, "a", encoding="utf-8") as f:
-                f.write(entry)
-        except Exception as e:
-            print(f"❌ Logging Failed: {e}")
+        # B. Buffer (warnings / errors are written immediately)
+        self.events.append((timestamp, self.run_id, level, message))
+        self.lines.append(entry)
+        self._maybe_flush(force=level != "INFO")
 
-    def log_metric(self, target, model_type, metric_name, value):
+    def log_metric(self, target, model_type, metric_name, value, model_version=None):
         """
-        Appends a numeric metric to the CSV for the Dashboard.
+        Buffers a numeric metric for the Dashboard.
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        new_row = {
-            'Timestamp': timestamp,
-            'Target': target,
-            'ModelType': model_type,
-            'Metric': metric_name,
-            'Value': value
-        }
-        
-        # Append to CSV safely
+        self.metrics.append((timestamp, self.run_id, model_version or self.model_version,
+                             target, model_type, metric_name, float(value)))
+        self._maybe_flush()
+
+    # --- BATCHED WRITES ---
+    def _maybe_flush(self, force=False):
+        now = time.monotonic()
+        if self.buffered_since is None:
+            self.buffered_since = now
+        if now < self.retry_at and not force:
+            return  # the store just failed: do not retry on every row
+        if (force or len(self.metrics) + len(self.events) >= self.config.METRICS_FLUSH_ROWS
+                or now - self.buffered_since >= self.config.METRICS_FLUSH_SECONDS):
+            self.flush(final=False)
+
+    def flush(self, final=True):
+        """
+        Writes every buffered row: one SQLite transaction + one append to the text log.
+        final=False (periodic flushes) keeps a rejected batch buffered for the next attempt.
+        """
+        metrics, events, lines = self.metrics, self.events, self.lines
+        self.metrics, self.events, self.lines = [], [], []
+        self.buffered_since = None
         try:
-            df = pd.DataFrame([new_row])
-            df.to_csv(self.history_file, mode='a', header=False, index=False)
+            self.store.append(metrics=metrics, events=events)
         except Exception as e:
-            print(f"❌ Failed to save metric: {e}")
-            
\ No newline at end of file
+            if final:
+                print(f"❌ Failed to save metrics: {e}. Writing them to {self.event_file.name} instead.")
+                lines = lines + [f"[{ts}] [METRIC] {run_id} {version} {target} {model_type} {metric}={value}\n"
+                                 for ts, run_id, version, target, model_type, metric, value in metrics]
+            else:
+                print(f"⚠️ Failed to save metrics ({e}); keeping {len(metrics) + len(events)} rows for the next flush.")
+                self.metrics, self.events = metrics + self.metrics, events + self.events
+                self.buffered_since = time.monotonic()
+                self.retry_at = self.buffered_since + self.config.METRICS_FLUSH_SECONDS
+        if lines:
+            # UTF-8 Enforced; one write() on an O_APPEND file keeps the batch contiguous
+            try:
+                with open(self.event_file, "a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+            except Exception as e:
+                print(f"❌ Logging Failed: {e}")
@@ -0,0 +1,356 @@
+import asyncio
+import functools
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import atexit
+from bisect import bisect_left
+
+try:
+    import fcntl  # serialises folding the snapshots of exited processes (POSIX only)
+except ImportError:
+    fcntl = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+# --- METRIC TYPES ---
+# Updates are plain attribute arithmetic (no locks, no allocation): a few hundred nanoseconds.
+# Under the GIL a concurrent increment can very rarely be lost; acceptable for monitoring.
+class Counter:
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+    def state(self):
+        return self.value
+
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+    def dec(self, amount=1.0):
+        self.value -= amount
+
+    def state(self):
+        return self.value
+
+class Histogram:
+    """Fixed buckets (upper bounds, inclusive like Prometheus 'le'); the last slot is +Inf."""
+    kind = 'histogram'
+
+    def __init__(self, buckets):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return Timer(self)
+
+    def state(self):
+        return {'counts': list(self.counts), 'sum': self.sum}
+
+class Timer:
+    """Times a block (`with hist.time():`) or a sync / async function (`@hist.time()`) in seconds."""
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0)
+
+    def __call__(self, fn):
+        histogram = self.histogram
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - t0)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - t0)
+        return wrapper
+
+class MetricFamily:
+    """
+    One named metric with optional labels. labels(*values) returns the child to update;
+    resolve it once (e.g. at module level) on hot paths so the update skips the dict lookup.
+    """
+    def __init__(self, name, help_text, kind, labelnames=(), buckets=None):
+        self.name, self.help, self.kind = name, help_text, kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets is not None else None
+        self.children = {}
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = (Histogram(self.buckets) if self.kind == 'histogram'
+                     else Counter() if self.kind == 'counter' else Gauge())
+            self.children[values] = child
+        return child
+
+    # Unlabelled shortcuts
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+# --- REGISTRY ---
+class MetricsRegistry:
+    """
+    Process-local registry. Each process (gunicorn worker, bot) writes a snapshot of its values
+    to Config.METRICS_MULTIPROC_DIR/<pid>-<start>.json every METRICS_SNAPSHOT_SECONDS from a daemon
+    thread; exposition() merges every snapshot, so any worker can answer a scrape for the whole service.
+    Counters and histograms of exited processes are folded into one accumulated file (totals stay
+    monotonic, the directory stays small); gauges are reported per live pid.
+    """
+    EXITED_FILE = "_exited.json"
+
+    def __init__(self):
+        self.config = Config()
+        self.families = {}
+        self.lock = threading.Lock()
+        self.exporter = None
+        self.hooks_installed = False
+        self.instance = f"{os.getpid()}-{time.time_ns()}"  # unique even when a pid is reused
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _family(self, name, help_text, kind, labelnames, buckets=None):
+        with self.lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(name, help_text, kind, labelnames, buckets)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as {family.kind}{family.labelnames}")
+            return family
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, 'counter', labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, 'gauge', labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=None):
+        return self._family(name, help_text, 'histogram', labelnames, buckets or self.config.LATENCY_BUCKETS)
+
+    # --- SNAPSHOTS (one file per process) ---
+    def snapshot(self):
+        metrics = {}
+        for name, family in list(self.families.items()):
+            metrics[name] = {
+                'kind': family.kind,
+                'help': family.help,
+                'labelnames': list(family.labelnames),
+                'buckets': list(family.buckets) if family.buckets else None,
+                'samples': [[list(values), child.state()] for values, child in list(family.children.items())],
+            }
+        return {'pid': os.getpid(), 'time': time.time(), 'metrics': metrics}
+
+    def write_snapshot(self):
+        directory = self.config.METRICS_MULTIPROC_DIR
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, f"{self.instance}.json"), self.snapshot())
+
+    def start_exporter(self):
+        """Starts the snapshot thread of this process (idempotent; restarted in forked children)."""
+        if self.exporter is not None and self.exporter[0] == os.getpid():
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.config.METRICS_SNAPSHOT_SECONDS)
+                try:
+                    self.write_snapshot()
+                except OSError as e:
+                    print(f"⚠️ Metrics snapshot failed: {e}")
+
+        thread = threading.Thread(target=loop, name="metrics-exporter", daemon=True)
+        thread.start()
+        self.exporter = (os.getpid(), thread)
+        if not self.hooks_installed:
+            atexit.register(self.write_snapshot)
+            self.hooks_installed = True
+
+    def _after_fork(self):
+        # A forked worker inherits the parent's values: start from zero under its own file
+        # (in place: hot paths hold references to the children)
+        self.instance = f"{os.getpid()}-{time.time_ns()}"
+        for family in self.families.values():
+            for child in family.children.values():
+                if family.kind == 'histogram':
+                    child.counts, child.sum = [0] * len(child.counts), 0.0
+                else:
+                    child.value = 0.0
+        if self.exporter is not None:
+            self.exporter = None
+            self.start_exporter()
+
+    # --- AGGREGATION + EXPOSITION ---
+    def collect(self):
+        """Merges the snapshots of every process (this one freshly written) into {name: family dict}."""
+        self.write_snapshot()
+        self._fold_exited()
+        merged = {}
+        snaps = _read_snapshots(self.config.METRICS_MULTIPROC_DIR)
+        live = _live_snapshots(snaps)
+        for snap in snaps:
+            _merge(merged, snap, gauges=snap['path'] in live)
+        return merged
+
+    def _fold_exited(self):
+        """
+        Adds the counters / histograms of exited processes to EXITED_FILE and deletes their snapshots,
+        under a lock so concurrent scrapes never fold a snapshot twice (no lock: snapshots are kept).
+        """
+        if fcntl is None:
+            return
+        directory = self.config.METRICS_MULTIPROC_DIR
+        with open(os.path.join(directory, ".fold.lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            snaps = _read_snapshots(directory)
+            live = _live_snapshots(snaps)
+            exited = [snap for snap in snaps if snap.get('pid') is not None and snap['path'] not in live]
+            if not exited:
+                return
+            accumulated = {}
+            for snap in _read_snapshots(directory, names=[self.EXITED_FILE]) + exited:
+                _merge(accumulated, snap, gauges=False)
+            _write_json(os.path.join(directory, self.EXITED_FILE), {'pid': None, 'time': time.time(), 'metrics': {
+                name: dict(family, samples=[[list(k), v] for k, v in family['samples'].items()])
+                for name, family in accumulated.items()}})
+            for snap in exited:
+                try:
+                    os.remove(snap['path'])
+                except OSError:
+                    pass
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4) of the merged metrics."""
+        lines = []
+        for name, family in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            labelnames = family['labelnames'] + (['pid'] if family['kind'] == 'gauge' else [])
+            for values, state in sorted(family['samples'].items()):
+                labels = list(zip(labelnames, values))
+                if family['kind'] != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(state)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(family['buckets'] + ['+Inf'], state['counts']):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(state['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+def _read_snapshots(directory, names=None):
+    paths = [os.path.join(directory, n) for n in names] if names else glob.glob(os.path.join(directory, "*.json"))
+    snaps = []
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                snaps.append(dict(json.load(f), path=path))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return snaps
+
+def _live_snapshots(snaps):
+    """Paths of the snapshots of running processes (a reused pid: only its newest file)."""
+    newest = {}
+    for snap in snaps:
+        pid = snap.get('pid')
+        if pid is not None and snap['time'] >= newest.get(pid, (0, None))[0]:
+            newest[pid] = (snap['time'], snap['path'])
+    return {path for pid, (_, path) in newest.items() if _pid_alive(pid)}
+
+def _merge(merged, snap, gauges=True):
+    """Adds one snapshot into {name: family dict}: counters and histograms summed, gauges per pid."""
+    for name, data in snap['metrics'].items():
+        family = merged.setdefault(name, {k: data[k] for k in ('kind', 'help', 'labelnames', 'buckets')}
+                                   | {'samples': {}})
+        for values, state in data['samples']:
+            if data['kind'] == 'gauge':
+                if gauges:
+                    family['samples'][tuple(values) + (str(snap['pid']),)] = state
+                continue
+            key = tuple(values)
+            if data['kind'] == 'counter':
+                family['samples'][key] = family['samples'].get(key, 0.0) + state
+            else:
+                total = family['samples'].setdefault(key, {'counts': [0] * len(state['counts']), 'sum': 0.0})
+                total['counts'] = [a + b for a, b in zip(total['counts'], state['counts'])]
+                total['sum'] += state['sum']
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _number(value):
+    return repr(float(value))
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# The process-wide registry and its shortcuts
+REGISTRY = MetricsRegistry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
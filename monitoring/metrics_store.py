@@ -0,0 +1,104 @@
+import sqlite3
+import os
+import sys
+import pandas as pd
+from contextlib import closing
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp     TEXT NOT NULL,
+    run_id        TEXT,
+    model_version TEXT,
+    target        TEXT NOT NULL,
+    model_type    TEXT NOT NULL,
+    metric        TEXT NOT NULL,
+    value         REAL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_target ON metrics (target, metric);
+CREATE TABLE IF NOT EXISTS events (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    run_id    TEXT,
+    level     TEXT NOT NULL,
+    message   TEXT NOT NULL
+);
+"""
+
+METRIC_COLUMNS = ['id', 'timestamp', 'run_id', 'model_version', 'target', 'model_type', 'metric', 'value']
+EVENT_COLUMNS = ['id', 'timestamp', 'run_id', 'level', 'message']
+
+class MetricsStore:
+    """
+    Append-only SQLite sink for training / monitoring metrics and events (Config.METRICS_DB_PATH).
+    Writers append whole batches in one transaction; SQLite's file lock (WAL mode) keeps concurrent
+    processes from interleaving. Readers page through the rows by id, so a dashboard only fetches
+    what was added since its last read.
+    """
+    def __init__(self, path=None):
+        self.config = Config()
+        self.path = str(path or self.config.METRICS_DB_PATH)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")  # a concurrent first open must not import twice
+            if conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0] == 0:
+                conn.executemany(self._insert_metrics, self._legacy_rows())
+            conn.commit()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _legacy_rows(self):
+        """The old logs/training_history.csv, copied once so the history stays continuous."""
+        legacy = self.config.PROJECT_ROOT / "logs" / "training_history.csv"
+        if not legacy.exists():
+            return []
+        df = pd.read_csv(legacy)
+        return [(r.Timestamp, 'legacy', None, r.Target, r.ModelType, r.Metric, float(r.Value))
+                for r in df.itertuples(index=False)]
+
+    _insert_metrics = f"INSERT INTO metrics ({', '.join(METRIC_COLUMNS[1:])}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    _insert_events = f"INSERT INTO events ({', '.join(EVENT_COLUMNS[1:])}) VALUES (?, ?, ?, ?)"
+
+    # --- WRITES ---
+    def append(self, metrics=(), events=()):
+        """
+        :param metrics: (timestamp, run_id, model_version, target, model_type, metric, value) tuples
+        :param events: (timestamp, run_id, level, message) tuples
+        """
+        if not metrics and not events:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(self._insert_metrics, metrics)
+            conn.executemany(self._insert_events, events)
+
+    # --- READS ---
+    def metrics(self, since_id=0, target=None, run_id=None, limit=None):
+        """Metric rows with id > since_id (oldest first), as a DataFrame. Pass the last id back to continue."""
+        query, params = f"SELECT {', '.join(METRIC_COLUMNS)} FROM metrics WHERE id > ?", [since_id]
+        if target is not None:
+            query += " AND target = ?"
+            params.append(target)
+        if run_id is not None:
+            query += " AND run_id = ?"
+            params.append(run_id)
+        return self._read(query + " ORDER BY id" + (" LIMIT ?" if limit else ""),
+                          params + ([limit] if limit else []), METRIC_COLUMNS)
+
+    def events(self, since_id=0, level=None, limit=None):
+        query, params = f"SELECT {', '.join(EVENT_COLUMNS)} FROM events WHERE id > ?", [since_id]
+        if level is not None:
+            query += " AND level = ?"
+            params.append(level)
+        return self._read(query + " ORDER BY id" + (" LIMIT ?" if limit else ""),
+                          params + ([limit] if limit else []), EVENT_COLUMNS)
+
+    def _read(self, query, params, columns):
+        with closing(self._connect()) as conn:
+            return pd.DataFrame(conn.execute(query, params).fetchall(), columns=columns)
@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# --- Import Project Modules ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from utils.feature_engineering import FeatureEngineer
+from models.model_factory import ModelFactory
+from models.registry import ModelRegistry
+
+class MetricAccumulator:
+    """
+    Streaming performance of ONE model version on ONE target, in constant memory.
+    Every graded match contributes a loss (classification: 0/1 error, regression: squared error):
+        - running total, exponentially decayed mean (half-life in matches)
+        - fixed-size ring buffer for the rolling-window mean (running sum, O(1) per update)
+        - one-sided standardised CUSUM against the baseline loss:
+              S = max(0, S + (loss - baseline) / sigma - k)
+          an alarm is raised (and latched) when S > h, i.e. the loss has drifted upwards.
+          k = 0.1, h = 15 gives ~700-1000 matches between false alarms and detects a 0.2-0.3 sigma
+          degradation (e.g. error rate 50% -> 60-65%) after ~70-110 matches.
+    """
+    def __init__(self, baseline=None, sigma=None, window=100, halflife=50, k=0.1, h=15.0):
+        self.n = 0
+        self.loss_sum = 0.0
+        self.ewma = None
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+        self.ring = [0.0] * window
+        self.window_sum = 0.0
+        self.baseline = baseline
+        self.sigma = sigma
+        self.k, self.h = k, h   # in standard deviations of the per-match loss
+        self.cusum = 0.0
+        self.alarm_at = None    # match count when the alarm fired
+
+    def update(self, loss):
+        slot = self.n % len(self.ring)
+        self.window_sum += loss - (self.ring[slot] if self.n >= len(self.ring) else 0.0)
+        self.ring[slot] = loss
+        self.n += 1
+        self.loss_sum += loss
+        self.ewma = loss if self.ewma is None else self.ewma + self.alpha * (loss - self.ewma)
+
+        if self.baseline is None and self.n == len(self.ring):
+            # No registered score: the first full window is the reference
+            self.baseline, self.sigma = self.window_sum / self.n, float(np.std(self.ring))
+        if self.baseline is not None and self.sigma:
+            self.cusum = max(0.0, self.cusum + (loss - self.baseline) / self.sigma - self.k)
+            if self.alarm_at is None and self.cusum > self.h:
+                self.alarm_at = self.n
+
+    @property
+    def window_mean(self):
+        return self.window_sum / min(self.n, len(self.ring)) if self.n else None
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        acc = cls.__new__(cls)
+        acc.__dict__.update(data)
+        return acc
+
+class PerformanceMonitor:
+    """
+    Live performance of the deployed models, graded as match results arrive.
+    State (one MetricAccumulator per target and model version, plus a watermark of the last
+    graded match) lives in Config.MONITOR_STATE_PATH, so health() is a constant-time read.
+    """
+    def __init__(self):
+        self.config = Config()
+        self.path = self.config.MONITOR_STATE_PATH
+        self.state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {'watermark': None, 'targets': {}}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    # --- UPDATES ---
+    def accumulator(self, target_name, version, baseline=None, sigma=None):
+        versions = self.state['targets'].setdefault(target_name, {})
+        if version not in versions:
+            acc = MetricAccumulator(baseline=baseline, sigma=sigma, window=self.config.MONITOR_WINDOW,
+                                    halflife=self.config.MONITOR_HALFLIFE,
+                                    k=self.config.MONITOR_CUSUM_K, h=self.config.MONITOR_CUSUM_H)
+            versions[version] = acc.to_dict()
+            # Keep the newest versions only (insertion order = deployment order)
+            for old in list(versions)[:-self.config.MONITOR_MAX_VERSIONS]:
+                del versions[old]
+        return MetricAccumulator.from_dict(versions[version])
+
+    def observe(self, target_name, version, losses, baseline=None, sigma=None):
+        """Feeds per-match losses (chronological) to the accumulator of `version`."""
+        acc = self.accumulator(target_name, version, baseline, sigma)
+        for loss in np.asarray(losses, dtype=np.float64):
+            acc.update(float(loss))
+        self.state['targets'][target_name][version] = acc.to_dict()
+        return acc
+
+    def grade(self, target_name, version, y_true, y_pred, baseline_score=None):
+        """Grades one model's predictions against real results (rows in match order)."""
+        mode = 'regression' if target_name == 'TotalGoals' else 'classification'
+        y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+        baseline = sigma = None
+        if mode == 'classification':
+            losses = (y_true != y_pred).astype(np.float64)
+            if baseline_score is not None:
+                baseline = 1.0 - baseline_score  # accuracy -> error rate
+                sigma = np.sqrt(baseline * (1.0 - baseline))  # Bernoulli
+        else:
+            losses = (y_true.astype(np.float64) - y_pred.astype(np.float64)) ** 2
+            if baseline_score is not None:
+                baseline = baseline_score  # registered MSE
+                sigma = np.sqrt(2.0) * baseline  # squared Gaussian errors: std = sqrt(2) * mean
+        return self.observe(target_name, version, losses, baseline, sigma)
+
+    def grade_new_results(self, df):
+        """
+        Scores every deployed champion on the matches played after the watermark and feeds the
+        graded predictions to the accumulators. `df` is the preprocessed match history.
+        Returns the number of newly graded matches.
+        """
+        col_date = self.config.COL_DATE
+        dates = pd.to_datetime(df[col_date])
+        watermark = self.state.get('watermark')
+        if watermark is None:
+            # First run: warm up on the most recent window of results
+            new = df.loc[dates.sort_values().index[-self.config.MONITOR_WINDOW:]]
+        else:
+            new = df[dates > pd.Timestamp(watermark)]
+        if new.empty:
+            return 0
+        new = new.sort_values(col_date)
+
+        registry = ModelRegistry()
+        engineer = FeatureEngineer()
+        X, targets = engineer.transform(new), engineer.get_targets(new)
+        for target_name in self.config.TARGETS:
+            entry = registry.model_entry(target_name) or {}
+            mode = 'regression' if target_name == 'TotalGoals' else 'classification'
+            try:
+                model = ModelFactory.get_model(entry.get('model_type', 'rf'), mode=mode)
+                model.load(entry.get('file', f"model_{target_name}.pkl"))
+            except FileNotFoundError:
+                continue
+            acc = self.grade(target_name, self.model_version(entry), targets[target_name], model.predict(X),
+                             baseline_score=entry.get('score'))
+            if acc.alarm_at is not None:
+                print(f"   🔴 {target_name}: live performance drift detected (CUSUM {acc.cusum:.2f})")
+
+        self.state['watermark'] = str(pd.to_datetime(new[col_date]).max())
+        self.state['updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.save()
+        print(f"   📡 Graded {len(new)} new results for live monitoring.")
+        return len(new)
+
+    @staticmethod
+    def model_version(entry):
+        """Registry version, plus the number of incremental updates applied on top of it."""
+        version = str(entry.get('version', 'unversioned'))
+        updates = entry.get('incremental_updates', 0)
+        return f"{version}+{updates}" if updates else version
+
+    # --- READS ---
+    def health(self):
+        """Constant-time summary: the newest version per target, with its live metrics and alarm."""
+        summary = {}
+        for target_name, versions in self.state.get('targets', {}).items():
+            if not versions:
+                continue
+            version, data = list(versions.items())[-1]
+            acc = MetricAccumulator.from_dict(data)
+            is_regression = target_name == 'TotalGoals'
+
+            def to_metric(loss):
+                # Losses are error rates for classifiers: report accuracy
+                return loss if loss is None or is_regression else 1.0 - loss
+
+            summary[target_name] = {
+                'version': version,
+                'metric': 'mse' if is_regression else 'accuracy',
+                'graded': acc.n,
+                'window': to_metric(acc.window_mean),
+                'ewma': to_metric(acc.ewma),
+                'baseline': to_metric(acc.baseline),
+                'cusum': round(acc.cusum, 4),
+                'alarm': acc.alarm_at is not None,
+            }
+        return summary
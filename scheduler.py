@@ -8,10 +8,60 @@ from datetime import datetime
 # Ensure we can find the modules
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
+from config.config import Config
 from updating.data_collection import DataCollector
 from updating.model_retraining import ModelRetrainer
 from monitoring.alert_system import AlertSystem
+from monitoring.performance_monitor import PerformanceMonitor
 from monitoring.logger import TrainingLogger
+from training import build_training_graph
+
+def import_incoming(logger, quiet=False):
+    """Merges any files waiting in data/incoming/ into the master dataset. Returns rows added."""
+    collector = DataCollector()
+    added = collector.import_directory(Config.INCOMING_DATA_DIR)
+    if added:
+        logger.log_event(f"📥 Imported {added} new matches from data/incoming/.")
+    elif not quiet:
+        logger.log_event("ℹ️ No new matches found in data/incoming/. Skipping import.")
+    return added
+
+def grade_live_results(logger):
+    """
+    Grades the deployed models on the results that just arrived (before any retraining, so the
+    predictions are those of the models that were live for these matches).
+    """
+    # The preprocess checkpoint is reused by the retraining that follows
+    df = build_training_graph().run(['preprocess'])['preprocess']
+    graded = PerformanceMonitor().grade_new_results(df)
+    if graded:
+        logger.log_event(f"📡 Graded {graded} new results for live performance monitoring.")
+    return graded
+
+def incoming_poll_job():
+    """
+    Frequent, cheap check of data/incoming/.
+    New results are graded right away; the retraining cycle runs once enough new matches have
+    accumulated (or the last retrain is old enough), so fresh results reach the models within
+    hours instead of a week without retraining on every single imported row.
+    """
+    with TrainingLogger() as logger:
+        try:
+            added = import_incoming(logger, quiet=True)
+            if added:
+                try:
+                    grade_live_results(logger)
+                except Exception as e:
+                    logger.log_event(f"❌ Live Grading Failed: {e}", "ERROR")
+                updater = ModelRetrainer()
+                if updater.retrain_due(added):
+                    logger.log_event("🔄 New data arrived. Running update cycle...")
+                    updater.run_update_cycle(force=False)
+                # After the retrain, so its status update cannot hide the live alarms
+                # (constant-time read of the live monitor, no validation re-scoring)
+                AlertSystem().check_health(validate=False)
+        except Exception as e:
+            logger.log_event(f"❌ Incoming Import Failed: {e}", "ERROR")
 
 def weekly_maintenance_job():
     logger = TrainingLogger()
@@ -21,25 +71,21 @@ def weekly_maintenance_job():
     print(f"🚀 WEEKLY JOB STARTED AT {datetime.now()}")
     print("="*50)
 
-    # 1. DATA COLLECTION (Optional / Placeholder)
-    # If you have an API fetching script, call it here. 
-    # For now, we assume you might have dropped a 'new_results.csv' into a specific folder.
-    incoming_data = "data/incoming/weekly_update.csv"
-    if os.path.exists(incoming_data):
-        logger.log_event("📥 Found new data file. Importing...")
-        collector = DataCollector()
-        collector.import_new_matches(incoming_data)
-        # Rename processed file so we don't import it again next week
-        os.rename(incoming_data, f"data/incoming/processed_{datetime.now().strftime('%Y%m%d')}.csv")
-    else:
-        logger.log_event("ℹ️ No 'weekly_update.csv' found in data/incoming/. Skipping import.")
+    # 1. DATA COLLECTION
+    # Bulk-imports every CSV dropped into data/incoming/ (including the legacy 'weekly_update.csv').
+    # Imported files are moved to data/incoming/processed/ so they are never imported twice.
+    if import_incoming(logger):
+        try:
+            grade_live_results(logger)
+        except Exception as e:
+            logger.log_event(f"❌ Live Grading Failed: {e}", "ERROR")
 
     # 2. MODEL RETRAINING & DRIFT CHECK
-    # This script automatically checks if the new data is enough (>500 rows) to justify retraining.
+    # An incremental update on the recent matches; every Config.FULL_REBUILD_EVERY updates a full rebuild.
     try:
         logger.log_event("🔄 Checking Model Health & Drift...")
         updater = ModelRetrainer()
-        # We run the standard cycle. It handles the "check_necessity" logic internally.
+        # The weekly run always retrains (the poll's row / interval gate does not apply).
         updater.run_update_cycle(force=False) 
     except Exception as e:
         logger.log_event(f"❌ Retraining Failed: {e}", "ERROR")
@@ -54,17 +100,21 @@ def weekly_maintenance_job():
         logger.log_event(f"❌ Monitoring Failed: {e}", "ERROR")
 
     logger.log_event("✅ SCHEDULER: Weekly Job Finished. Going back to sleep.")
+    logger.flush()
     print("\n💤 Job Complete. Waiting for next cycle...")
 
 # --- CONFIGURATION ---
 # Run every 7 days (e.g., every Monday at 3:00 AM)
 # You can change this to .every().monday.at("03:00")
 schedule.every(7).days.at("03:00").do(weekly_maintenance_job)
+# Poll the incoming folder every few minutes (cheap directory scan when nothing is there)
+schedule.every(Config.INCOMING_POLL_SECONDS).seconds.do(incoming_poll_job)
 
 if __name__ == "__main__":
     print("⏳ Scheduler Active.")
     print("   - Frequency: Every 7 Days at 03:00 AM")
     print("   - Task: Import Data -> Retrain Models -> Check Health")
+    print(f"   - Incoming Folder: polled every {Config.INCOMING_POLL_SECONDS}s")
     print("   - Press Ctrl+C to stop.")
     
     # OPTIONAL: Run once immediately on startup to verify everything works
@@ -73,4 +123,4 @@ if __name__ == "__main__":
     
     while True:
         schedule.run_pending()
-        time.sleep(60) # Check the clock every minute
\ No newline at end of file
+        time.sleep(min(60, Config.INCOMING_POLL_SECONDS)) # Check the clock every minute (or every poll, if sooner)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import sys
 import os
 import threading
+import subprocess
 import json
 import time
 import pandas as pd
@@ -34,6 +35,28 @@ except ImportError as e:
 except Exception as e:
     print(f"⚠️ SCORE_PULSE Engine Error: {e}")
 
+# Request metrics (aggregated across gunicorn workers, scraped at /metrics)
+from flask import g, Response
+from monitoring.metrics_registry import REGISTRY
+HTTP_SECONDS = REGISTRY.histogram('http_request_seconds', 'Flask request latency', ('endpoint', 'method', 'status'))
+REGISTRY.start_exporter()
+
+@app.before_request
+def start_request_timer():
+    g.request_t0 = time.perf_counter()
+
+@app.after_request
+def observe_request(response):
+    t0 = g.pop('request_t0', None)
+    if t0 is not None:
+        HTTP_SECONDS.labels(request.endpoint or 'unknown', request.method, str(response.status_code)).observe(
+            time.perf_counter() - t0)
+    return response
+
+@app.route("/metrics")
+def metrics():
+    return Response(REGISTRY.exposition(), mimetype='text/plain; version=0.0.4')
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -266,25 +289,57 @@ def admin_dashboard():
 @login_required
 def run_retrain():
     if current_user.id != 1: return jsonify({"error": "Forbidden"}), 403
+    from utils.status_logger import new_job_id
+    job_id = new_job_id()
     def task():
         if project_root not in sys.path: sys.path.insert(0, project_root)
         from updating.model_retraining import ModelRetrainer
-        ModelRetrainer().run_update_cycle(force=True)
+        ModelRetrainer(job_id=job_id).run_update_cycle(force=True)
     thread = threading.Thread(target=task)
     thread.start()
-    return jsonify({"status": "started"})
+    return jsonify({"status": "started", "job_id": job_id})
 
 @app.route("/admin/run_roi", methods=['POST'])
 @login_required
 def run_roi():
     if current_user.id != 1: return jsonify({"error": "Forbidden"}), 403
-    def task():
-        if project_root not in sys.path: sys.path.insert(0, project_root)
-        from analysis.roi_simulator import ROISimulator
-        ROISimulator().run_simulation()
-    thread = threading.Thread(target=task)
-    thread.start()
-    return jsonify({"status": "started"})
+    from analysis.roi_simulator import ROISimulator
+    simulator = ROISimulator()
+    key = simulator.series_key()
+    # Same model + same test data = same simulation: answer from the stored series
+    if simulator.cached_series(key) is not None:
+        return jsonify({"status": "cached"})
+    from utils.status_logger import new_job_id
+    job_id = new_job_id()
+    # Clicks while the simulation for this key is still running follow that run
+    running = simulator.claim_run(key, job_id) if key else None
+    if running:
+        return jsonify({"status": "running", "job_id": running})
+    # The simulation runs in its own process, off the web worker's CPU (it lowers its own priority)
+    script = os.path.join(project_root, 'analysis', 'roi_simulator.py')
+    subprocess.Popen([sys.executable, script], cwd=project_root, start_new_session=True,
+                     env=dict(os.environ, JOB_ID=job_id))
+    return jsonify({"status": "started", "job_id": job_id})
+
+@app.route("/api/admin/roi_series")
+@login_required
+def roi_series():
+    if current_user.id != 1: return jsonify({}), 403
+    from config.config import Config
+    try:
+        with open(Config.ROI_SERIES_PATH, 'r') as f: return jsonify(json.load(f))
+    except (OSError, ValueError): return jsonify({}), 404
+
+@app.route("/api/admin/metrics")
+@login_required
+def metrics_feed():
+    # Incremental read of the metrics store: pass back the returned last_id as ?since=
+    if current_user.id != 1: return jsonify({}), 403
+    from monitoring.metrics_store import MetricsStore
+    since = request.args.get('since', 0, type=int)
+    rows = MetricsStore().metrics(since_id=since, target=request.args.get('target'), limit=1000)
+    return jsonify({"rows": rows.to_dict(orient='records'),
+                    "last_id": int(rows['id'].iloc[-1]) if len(rows) else since})
 
 @app.route("/admin/update_results", methods=['POST'])
 @login_required
@@ -329,6 +384,52 @@ def force_update():
 @login_required
 def job_status():
     if current_user.id != 1: return jsonify({}), 403
-    try:
-        with open(os.path.join(project_root, 'logs', 'active_job.json'), 'r') as f: return jsonify(json.load(f))
-    except: return jsonify({"status": "idle", "logs": [], "progress": 0})
\ No newline at end of file
+    from utils.status_logger import read_job
+    return jsonify(read_job(request.args.get('job')))
+
+@app.route("/api/admin/job_stream")
+@login_required
+def job_stream():
+    """
+    Server-sent events: pushes the new progress lines of a job as they are written.
+    The job file is checked with a cheap stat() every JOB_STREAM_POLL_SECONDS on the server;
+    the browser resumes a dropped stream with Last-Event-ID ("<job_id>:<seq>").
+    """
+    if current_user.id != 1: return jsonify({}), 403
+    from config.config import Config
+    from utils.status_logger import read_job, job_path
+    job_id = request.args.get('job')  # default: follow whichever job wrote last
+    last_job, _, last_seq = request.headers.get('Last-Event-ID', '').rpartition(':')
+
+    def events(last_job, last_seq):
+        path = job_path(job_id)
+        last_mtime, last_beat = None, time.time()
+        deadline = time.time() + Config.JOB_STREAM_SECONDS
+        yield "retry: 2000\n\n"
+        while time.time() < deadline:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None  # job not started yet
+            if mtime is not None and mtime != last_mtime:
+                last_mtime = mtime
+                job = read_job(job_id)
+                if job['job_id'] != last_job:
+                    last_job, last_seq = job['job_id'], 0
+                # The ring buffer holds lines seq-len+1 .. seq
+                count = min(len(job['logs']), job['seq'] - last_seq)
+                new = job['logs'][len(job['logs']) - count:] if count > 0 else []
+                last_seq = max(last_seq, job['seq'])
+                payload = {k: job.get(k) for k in ('job_id', 'task', 'status', 'progress')}
+                payload['lines'] = new
+                yield f"id: {job['job_id']}:{last_seq}\nevent: progress\ndata: {json.dumps(payload)}\n\n"
+                if job['status'] in ('completed', 'error'):
+                    return
+                last_beat = time.time()
+            elif time.time() - last_beat > 15:
+                yield ": keepalive\n\n"
+                last_beat = time.time()
+            time.sleep(Config.JOB_STREAM_POLL_SECONDS)
+
+    return Response(events(last_job, int(last_seq) if last_seq.isdigit() else 0), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
\ No newline at end of file
@@ -25,6 +25,10 @@ except Exception as e:
     print(f"⚠️ AI Engine Offline: {e}")
     ai_engine = None
 
+# Handler latency (merged with the web workers' metrics at /metrics)
+from monitoring.metrics_registry import REGISTRY
+HANDLER_SECONDS = REGISTRY.histogram('bot_handler_seconds', 'Telegram handler latency', ('handler',))
+
 # STATES
 PHONE, PAYMENT_CONFIRM = range(2)
 
@@ -33,6 +37,7 @@ TOKEN = "8379170828:AAF3PpY_TDosvr-gfBasP-0igTdJ4f3UnZ4"
 
 # --- COMMANDS ---
 
+@HANDLER_SECONDS.labels('start').time()
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "⚽ *Welcome to ScorePulse Premium Bot!*\n\n"
@@ -43,6 +48,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='Markdown'
     )
 
+@HANDLER_SECONDS.labels('predict').time()
 async def predict(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not ai_engine:
         await update.message.reply_text("⚠️ AI Brain is waking up... Try again in 10s.")
@@ -89,6 +95,7 @@ async def predict(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- BUY FLOW ---
 
+@HANDLER_SECONDS.labels('buy_start').time()
 async def buy_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "💎 *Premium Package*\n"
@@ -98,6 +105,7 @@ async def buy_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     return PHONE
 
+@HANDLER_SECONDS.labels('process_payment').time()
 async def process_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     phone = update.message.text
     await update.message.reply_text(f"📲 Sending prompt to {phone}...")
@@ -118,6 +126,7 @@ async def process_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Payment Failed. Check number and try again.")
         return ConversationHandler.END
 
+@HANDLER_SECONDS.labels('deliver_predictions').time()
 async def deliver_predictions(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.message.text == 'Cancel ❌':
         await update.message.reply_text("Cancelled.", reply_markup=ReplyKeyboardRemove())
@@ -147,6 +156,7 @@ async def deliver_predictions(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     return ConversationHandler.END
 
+@HANDLER_SECONDS.labels('cancel').time()
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("❌ Cancelled.", reply_markup=ReplyKeyboardRemove())
     return ConversationHandler.END
@@ -175,5 +185,6 @@ if __name__ == '__main__':
     )
     app.add_handler(buy_conv)
     
+    REGISTRY.start_exporter()
     print("🚀 Bot starting...")
     app.run_polling()
\ No newline at end of file
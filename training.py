@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 import sys
 import os
-import joblib
+import time
 from sklearn.metrics import accuracy_score, mean_squared_error, mean_absolute_error
 
 # --- 1. SETUP PATHS ---
@@ -17,99 +17,287 @@ from config.config import Config
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
 from utils.tuner import HyperparameterTuner
+from utils.pipeline_dag import PipelineDAG
 from models.model_factory import ModelFactory
+from models.registry import ModelRegistry, data_fingerprint, file_sha256
+from models.distillation import measure_latency_ms
 from monitoring.logger import TrainingLogger
+from monitoring.feature_drift import feature_reference
+
+
+def _score(mode, y_true, preds):
+    return accuracy_score(y_true, preds) if mode == 'classification' else mean_squared_error(y_true, preds)
+
+
+def distill_target(target_name, mode, teacher, X_train, X_val, y_val, teacher_score):
+    """
+    Trains the compact student for one target and compares it with its teacher.
+    Fidelity = share of validation rows where student and teacher agree (classification)
+    or mean absolute difference of their predictions (regression).
+    """
+    student = ModelFactory.get_model('distilled', mode=mode)
+    student.distill(teacher, X_train)
+
+    student_preds = student.predict(X_val)
+    teacher_preds = teacher.predict(X_val)
+    if mode == 'classification':
+        fidelity_name, fidelity = 'Fidelity', float(np.mean(student_preds == teacher_preds))
+    else:
+        fidelity_name, fidelity = 'FidelityMAE', float(np.mean(np.abs(student_preds - teacher_preds)))
+    score = _score(mode, y_val, student_preds)
+
+    filename = f"model_{target_name}_distilled.pkl"
+    student.save(filename)
+
+    # Latency is measured on the serving path (compiled runtimes) for both models
+    teacher.compile()
+    student.compile()
+    teacher_ms = measure_latency_ms(teacher, X_val)
+    student_ms = measure_latency_ms(student, X_val)
+    print(f"   🧪 [{target_name}] Student {fidelity_name}: {fidelity:.3f} | score Δ: {score - teacher_score:+.4f} "
+          f"| latency {teacher_ms:.2f}ms → {student_ms:.2f}ms")
+
+    return {
+        'file': filename,
+        'score': score,
+        'score_delta': score - teacher_score,
+        'fidelity_name': fidelity_name,
+        'fidelity': fidelity,
+        'latency_ms': student_ms,
+        'teacher_latency_ms': teacher_ms,
+    }
+
+
+def train_target(target_name, X_train, y_train, X_val, y_val, tune_models=True, n_jobs=1, data_version=None):
+    """
+    Tunes, trains, evaluates and saves the model for ONE target.
+    Module-level so it can run in its own worker process during parallel training.
+    Returns the score and a timing breakdown for the TrainingLogger.
+    """
+    t_start = time.perf_counter()
+    print(f"\n⚽ TRAINING TARGET: {target_name}")
+    print("----------------------------------")
+
+    # 1. Define Problem Type
+    # TotalGoals is regression (predicting a number), others are classification (Win/Loss, Yes/No)
+    mode = 'regression' if target_name == 'TotalGoals' else 'classification'
+    metric_name = 'MSE' if mode == 'regression' else 'Accuracy'
+
+    # 2. Hyperparameter Tuning (Optional)
+    model_params = {}
+    if tune_models:
+        strategy = Config.TUNING_STRATEGY
+        print(f"🔧 [{target_name}] Tuning Hyperparameters ({strategy})...")
+        # We default to Random Forest ('rf')
+        model_params = HyperparameterTuner().tune('rf', mode, X_train, y_train, n_iter=5, n_jobs=n_jobs,
+                                                  strategy=strategy, data_version=data_version)
+    t_tuned = time.perf_counter()
+
+    # 3. Train Model
+    print(f"🧠 [{target_name}] Training Model ({mode})...")
+    model = ModelFactory.get_model('rf', mode=mode, n_jobs=n_jobs, **model_params)
+    model.train(X_train, y_train)
+    t_fitted = time.perf_counter()
+
+    # 4. Evaluate
+    score = _score(mode, y_val, model.predict(X_val))
+    if mode == 'classification':
+        print(f"   ✅ [{target_name}] {metric_name}: {score:.2%}")
+    else:
+        print(f"   📉 [{target_name}] {metric_name}: {score:.4f}")
+
+    # 5. Save Model
+    filename = f"model_{target_name}.pkl"
+    model.save(filename)
+    print(f"   💾 [{target_name}] Model saved: {filename}")
+
+    # 6. Distill a compact serving model
+    distilled = None
+    if Config.DISTILLATION:
+        distilled = distill_target(target_name, mode, model, X_train, X_val, y_val, score)
+
+    return {
+        'target': target_name,
+        'file': filename,
+        'sha256': file_sha256(Config.MODELS_DIR / filename),
+        'metric': metric_name,
+        'score': score,
+        'distilled': distilled,
+        'timings': {
+            'TuneSeconds': t_tuned - t_start,
+            'FitSeconds': t_fitted - t_tuned,
+            'TotalSeconds': time.perf_counter() - t_start,
+        }
+    }
+
+
+# --- PIPELINE STAGES ---
+# Every stage receives {dependency: output} plus its params (see utils/pipeline_dag.py).
+def stage_load_raw(inputs, raw_sha256):
+    return DataLoader().load_raw_data()
+
+
+def stage_preprocess(inputs):
+    return DataLoader().preprocess(inputs['load_raw'])
+
+
+def stage_split(inputs, train_split, val_split):
+    loader = DataLoader()
+    train_df, val_df, test_df = loader.save_splits(inputs['preprocess'])
+    if Config.USE_MATCH_DB:
+        loader.sync_match_store(inputs['load_raw'], inputs['preprocess'])
+    return {'train': train_df, 'val': val_df, 'test': test_df}
+
+
+def stage_features(inputs, features):
+    # The scaler is fitted ONCE on Train; every target reuses the same scaled matrix
+    engineer = FeatureEngineer()
+    split = inputs['split']
+    X_train = engineer.fit_features(split['train'])
+    return {
+        'X_train': X_train,
+        'X_val': engineer.transform(split['val']),
+        'y_train': engineer.get_targets(split['train']),
+        'y_val': engineer.get_targets(split['val']),
+        'scaler': engineer.scaler,
+        'data_version': data_fingerprint(X_train),
+    }
+
+
+def stage_reference(inputs, features, n_bins):
+    # Raw (unscaled) training distribution per feature, saved with the scaler for drift checks
+    return feature_reference(inputs['split']['train'], features, n_bins)
+
+
+def stage_train(inputs, target_name, tune_models, settings=None, n_jobs=1):
+    """`settings` only feeds the cache key (tuning / distillation config the result depends on)."""
+    f = inputs['features']
+    return train_target(target_name, f['X_train'], f['y_train'][target_name], f['X_val'], f['y_val'][target_name],
+                        tune_models=tune_models, n_jobs=n_jobs, data_version=f['data_version'])
+
+
+def build_training_graph(tune_models=True, cache_dir=None):
+    """
+    load_raw -> preprocess -> split -> features -> train_<target> (one per target, run in parallel)
+                                      split -> reference (training feature histograms for drift checks)
+    Also used by compare_models.py / evaluate.py to reuse the cached data stages.
+    """
+    raw_path = Config.RAW_DATA_PATH
+    dag = PipelineDAG(cache_dir)
+    dag.add('load_raw', stage_load_raw,
+            params={'raw_sha256': file_sha256(raw_path) if raw_path.exists() else None})
+    dag.add('preprocess', stage_preprocess, deps=['load_raw'])
+    dag.add('split', stage_split, deps=['load_raw', 'preprocess'],
+            params={'train_split': Config.TRAIN_SPLIT, 'val_split': Config.VAL_SPLIT})
+    dag.add('features', stage_features, deps=['split'], params={'features': list(Config.FEATURES_NUMERIC)})
+    dag.add('reference', stage_reference, deps=['split'],
+            params={'features': list(Config.FEATURES_NUMERIC), 'n_bins': Config.DRIFT_BINS})
+
+    settings = {
+        'tuning_strategy': Config.TUNING_STRATEGY,
+        'tuning_budget': Config.TUNING_TIME_BUDGET,
+        'distillation': Config.DISTILLATION,
+    }
+    for target_name in Config.TARGETS:
+        dag.add(f"train_{target_name}", stage_train, deps=['features'], uses_cores=True,
+                params={'target_name': target_name, 'tune_models': tune_models, 'settings': settings})
+    return dag
+
 
 class TrainingPipeline:
     def __init__(self):
         self.config = Config()
-        self.loader = DataLoader()
-        self.engineer = FeatureEngineer()
-        self.tuner = HyperparameterTuner()
         self.logger = TrainingLogger()
-        
-    def run(self, tune_models=True):
+        self.registry = ModelRegistry()
+
+    def run(self, tune_models=True, parallel=None, only=None, full=False):
+        """
+        :param parallel: train every target in its own worker process.
+                         Defaults to Config.PARALLEL_TRAINING.
+        :param only: target names to retrain; every other stage is served from its checkpoint.
+        :param full: retrain every target even when its checkpoint is current (full rebuild).
+        """
+        parallel = self.config.PARALLEL_TRAINING if parallel is None else parallel
+        t_pipeline = time.perf_counter()
         print("\n🚀 STARTING TRAINING PIPELINE")
         print("==================================")
-        
-        # --- PHASE 1: DATA LOADING ---
-        # Check if processed data exists; if not, generate it.
-        train_path = self.config.PROCESSED_DATA_DIR / "train.csv"
-        val_path = self.config.PROCESSED_DATA_DIR / "val.csv"
-
-        if not train_path.exists() or not val_path.exists():
-            print("⚠️  Processed data missing. Initializing Data Loader...")
-            raw_df = self.loader.load_raw_data()
-            clean_df = self.loader.preprocess(raw_df)
-            self.loader.save_splits(clean_df)
-        
-        print(f"📥 Loading datasets...")
-        train_df = pd.read_csv(train_path)
-        val_df = pd.read_csv(val_path)
-        print(f"   - Train Rows: {len(train_df)}")
-        print(f"   - Val Rows:   {len(val_df)}")
-
-        # --- PHASE 2: TRAINING LOOP ---
-        # We train a separate model for every target in config.TARGETS
-        for target_name, target_col in self.config.TARGETS.items():
-            print(f"\n⚽ TRAINING TARGET: {target_name}")
-            print("----------------------------------")
-            
-            # 1. Define Problem Type
-            # TotalGoals is regression (predicting a number), others are classification (Win/Loss, Yes/No)
-            mode = 'regression' if target_name == 'TotalGoals' else 'classification'
-            metric_name = 'MSE' if mode == 'regression' else 'Accuracy'
-
-            # 2. Feature Engineering
-            # fit_transform on Train to learn scaling, transform on Val to apply it
-            print(f"⚙️  Engineering Features...")
-            X_train, y_train = self.engineer.fit_transform(train_df, target_name=target_name)
-            X_val, y_val = self.engineer.transform(val_df, target_name=target_name)
-            
-            # Save the scaler immediately so main.py can use it later
-            # We save it after the first target (WLD) loop, or overwrite it safely
-            if target_name == 'WLD':
-                joblib.dump(self.engineer.scaler, self.config.SCALER_PATH)
-                print(f"   - Scaler saved to {self.config.SCALER_PATH}")
-
-            # 3. Hyperparameter Tuning (Optional)
-            model_params = {}
-            if tune_models:
-                print(f"🔧 Tuning Hyperparameters (Random Search)...")
-                # We default to Random Forest ('rf')
-                best_params = self.tuner.tune('rf', mode, X_train, y_train, n_iter=5)
-                model_params = best_params
-            
-            # 4. Train Model
-            print(f"🧠 Training Model ({mode})...")
-            model = ModelFactory.get_model('rf', mode=mode, **model_params)
-            model.train(X_train, y_train)
-            
-            # 5. Evaluate
-            print(f"📊 Evaluating...")
-            preds = model.predict(X_val)
-            
-            if mode == 'classification':
-                score = accuracy_score(y_val, preds)
-                print(f"   ✅ {metric_name}: {score:.2%}")
-            else:
-                score = mean_squared_error(y_val, preds)
-                print(f"   📉 {metric_name}: {score:.4f}")
-
-            # 6. Log Metrics
-            self.logger.log_metric(target_name, 'RandomForest', metric_name, score)
-
-            # 7. Save Model
-            filename = f"model_{target_name}.pkl"
-            model.save(filename)
-            print(f"   💾 Model saved: {filename}")
+
+        # --- PHASE 1-3: DATA, FEATURES & TRAINING (checkpointed stage graph) ---
+        dag = build_training_graph(tune_models)
+        train_stages = [f"train_{name}" for name in self.config.TARGETS]
+        force = train_stages if full else [f"train_{name}" for name in only] if only else ()
+        outputs = dag.run(['features', 'reference'] + train_stages, force=force, parallel=parallel)
+        timings = list(dag.timings)
+
+        # A cached result is only valid while its model file is the one it saved: incremental updates
+        # and compare_models.py promotions overwrite model_<target>.pkl after training
+        stale = [name for name, status, _ in timings
+                 if name in train_stages and status == 'cached' and not _model_file_matches(outputs[name])]
+        if stale:
+            print(f"♻️  Model file changed since the checkpoint: retraining {', '.join(stale)}")
+            outputs.update(dag.run(stale, force=stale, parallel=parallel))
+            timings = [t for t in timings if t[0] not in stale] + [t for t in dag.timings if t[0] in stale]
+
+        features = outputs['features']
+        results = [outputs[name] for name in train_stages]
+        trained = {name for name, status, _ in timings if status == 'ran'}
+
+        # Save the scaler once, under the same version as the models
+        self.logger.model_version = self.registry.start_version(data_version=features['data_version'])
+        self.registry.save_scaler(features['scaler'], reference=outputs['reference'])
+
+        # --- PHASE 4: REGISTER MODELS (+ DISTILLED STUDENTS), LOG METRICS & TIMINGS ---
+        for stage_name, res in zip(train_stages, results):
+            self.registry.register_model(res['target'], 'rf', res['file'], metric=res['metric'], score=res['score'])
+            student = res.get('distilled')
+            if student:
+                self.registry.register_serving_model(res['target'], 'rf', res['file'], student['teacher_latency_ms'],
+                                                     score=res['score'])
+                self.registry.register_serving_model(res['target'], 'distilled', student['file'], student['latency_ms'],
+                                                     score=student['score'], fidelity=student['fidelity'])
+            if stage_name not in trained:
+                continue  # served from cache: metrics were logged when it actually ran
+
+            self.logger.log_metric(res['target'], 'RandomForest', res['metric'], res['score'])
+            for timing_name, seconds in res['timings'].items():
+                self.logger.log_metric(res['target'], 'RandomForest', timing_name, seconds)
+            if student:
+                self.logger.log_metric(res['target'], 'Distilled', res['metric'], student['score'])
+                self.logger.log_metric(res['target'], 'Distilled', f"{res['metric']}Delta", student['score_delta'])
+                self.logger.log_metric(res['target'], 'Distilled', student['fidelity_name'], student['fidelity'])
+                self.logger.log_metric(res['target'], 'Distilled', 'LatencyMs', student['latency_ms'])
+
+        self.registry.write()
+
+        wall = time.perf_counter() - t_pipeline
+        breakdown = ", ".join(f"{name}={seconds:.1f}s ({status})" for name, status, seconds in timings)
+        self.logger.log_event(f"Training finished in {wall:.1f}s (parallel={parallel}) | {breakdown}")
+        self.logger.flush()
 
         print("\n==================================")
         print("✅ PIPELINE COMPLETE. READY FOR INFERENCE.")
         print("==================================")
 
+def _model_file_matches(result):
+    path = Config.MODELS_DIR / result['file']
+    return path.is_file() and result.get('sha256') == file_sha256(path)
+
+def _parse_only(argv):
+    """--only TotalGoals[,BTTS] -> ['TotalGoals', 'BTTS']"""
+    if '--only' not in argv:
+        return None
+    names = argv[argv.index('--only') + 1].split(',')
+    unknown = [n for n in names if n not in Config.TARGETS]
+    if unknown:
+        raise SystemExit(f"❌ Unknown target(s): {unknown}. Choose from {list(Config.TARGETS)}")
+    return names
+
 if __name__ == "__main__":
     pipeline = TrainingPipeline()
     # Set tune_models=True for better accuracy (takes longer)
     # Set tune_models=False for fast debugging
-    pipeline.run(tune_models=True)
\ No newline at end of file
+    # Pass --sequential to train targets one after another
+    # Pass --only TotalGoals to retrain one target; other stages come from their checkpoints
+    # Pass --full to retrain every target (data stages still come from their checkpoints)
+    pipeline.run(tune_models=True, parallel=False if '--sequential' in sys.argv else None,
+                 only=_parse_only(sys.argv), full='--full' in sys.argv)
@@ -1,90 +1,262 @@
 import pandas as pd
 import sys
 import os
+import time
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # --- Import Project Modules ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
+from utils.match_store import MatchStore
+
+# Columns an incoming file cannot be merged without
+CRITICAL_COLUMNS = ['MatchDate', 'HomeTeam', 'AwayTeam', 'FTHome', 'FTAway']
+
+
+def _parse_incoming_file(path, master_columns):
+    """
+    Reads and validates a single incoming CSV.
+    Module-level so it can run inside a worker process.
+    Returns (path, dataframe or None, message).
+    """
+    try:
+        try:
+            new_df = pd.read_csv(path, encoding='utf-8')
+        except UnicodeDecodeError:
+            new_df = pd.read_csv(path, encoding='latin1')
+    except Exception as e:
+        return path, None, f"Unreadable file: {e}"
+
+    missing_cols = [c for c in master_columns if c not in new_df.columns]
+    missing_critical = [c for c in CRITICAL_COLUMNS if c not in new_df.columns]
+    if missing_critical:
+        return path, None, f"Missing critical columns: {missing_critical}"
+
+    new_df['MatchDate'] = pd.to_datetime(new_df['MatchDate'], errors='coerce')
+    new_df = new_df.dropna(subset=['MatchDate', 'HomeTeam', 'AwayTeam'])
+
+    msg = f"{len(new_df)} rows"
+    if missing_cols:
+        msg += f" (missing non-critical columns filled with NaN: {missing_cols})"
+    return path, new_df, msg
+
 
 class DataCollector:
     def __init__(self):
         self.config = Config()
         self.raw_path = self.config.RAW_DATA_PATH
-        
+
     def import_new_matches(self, new_data_path):
         """
         Safely merges a new CSV of matches into the master dataset.
         """
         print(f"📥 IMPORTING NEW DATA FROM: {new_data_path}")
         print("==========================================")
-        
+
         # 1. Load Master Data
         if not self.raw_path.exists():
             print("❌ Master database not found.")
             return
 
         try:
-            # Try loading with different encodings
-            try:
-                master_df = pd.read_csv(self.raw_path, encoding='utf-8')
-            except UnicodeDecodeError:
-                master_df = pd.read_csv(self.raw_path, encoding='latin1')
-            
+            master_df = self._load_master()
             print(f"   📄 Current Master DB Size: {len(master_df)} rows")
-            
-            # 2. Load New Data
-            new_df = pd.read_csv(new_data_path)
-            print(f"   📄 New Data Size: {len(new_df)} rows")
-            
-            # 3. Validation
-            # Ensure new columns match master columns
-            missing_cols = [c for c in master_df.columns if c not in new_df.columns]
-            if missing_cols:
-                # Warnings for optional columns, Error for critical ones
-                critical = ['MatchDate', 'HomeTeam', 'AwayTeam', 'FTHome', 'FTAway']
-                if any(c in missing_cols for c in critical):
-                    print(f"   ❌ CRITICAL ERROR: New data is missing columns: {missing_cols}")
-                    return
-                else:
-                    print(f"   ⚠️ Warning: New data missing non-critical columns. Filling with NaN.")
-            
-            # 4. Merge & Deduplicate
-            # We combine them, then drop duplicates based on Date+Teams to prevent adding the same game twice
-            combined_df = pd.concat([master_df, new_df])
-            
-            # Convert date to ensure proper duplicate checking
-            combined_df['MatchDate'] = pd.to_datetime(combined_df['MatchDate'], errors='coerce')
-            
-            before_dedup = len(combined_df)
-            combined_df = combined_df.drop_duplicates(subset=['MatchDate', 'HomeTeam', 'AwayTeam'], keep='last')
-            duplicates_removed = before_dedup - len(combined_df)
-            
-            # Sort by date
-            combined_df = combined_df.sort_values(by='MatchDate')
-            
-            print(f"   🧹 Duplicates removed: {duplicates_removed}")
-            print(f"   ✅ New Master DB Size: {len(combined_df)} rows")
-            
-            # 5. Safety Backup & Save
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self.config.PROJECT_ROOT / "data" / "raw" / f"matches_backup_{timestamp}.csv"
-            shutil.copy(self.raw_path, backup_path)
-            print(f"   🛡️  Backup created at: {backup_path.name}")
-            
-            combined_df.to_csv(self.raw_path, index=False)
-            print("   💾 SUCCESS: Master database updated.")
-            
+
+            # 2. Load & Validate New Data
+            _, new_df, msg = _parse_incoming_file(new_data_path, list(master_df.columns))
+            if new_df is None:
+                print(f"   ❌ CRITICAL ERROR: {msg}")
+                return
+            print(f"   📄 New Data Size: {msg}")
+
+            # 3. Merge & Save
+            self._merge_into_master(master_df, [new_df])
+
         except Exception as e:
             print(f"   ❌ Error during import: {e}")
 
+    def import_directory(self, directory=None, max_workers=None, archive=True, files=None):
+        """
+        Bulk import: parses and validates every CSV in `directory` (or just `files`)
+        in parallel, then merges all of them into the master dataset in a single write.
+        Returns the number of new rows added to the master dataset.
+        """
+        directory = directory or self.config.INCOMING_DATA_DIR
+        if files is None:
+            # Skip files touched in the last few seconds (likely still being written)
+            cutoff = time.time() - 5
+            files = [f for f in self._pending_files(directory) if os.path.getmtime(f) < cutoff]
+        if not files:
+            return 0
+
+        print(f"📥 BULK IMPORT FROM: {directory}")
+        print("==========================================")
+        if not self.raw_path.exists():
+            print("❌ Master database not found.")
+            return 0
+
+        master_columns = list(pd.read_csv(self.raw_path, nrows=0).columns)
+
+        # 1. Parse & Validate (one worker per file, capped by CPU count)
+        workers = max_workers or min(len(files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_parse_incoming_file, f, master_columns) for f in files]
+            # Master is read in the parent while the workers parse
+            master_df = self._load_master()
+            results = [fut.result() for fut in futures]
+
+        frames, accepted, rejected = [], [], []
+        for path, df, msg in results:
+            name = os.path.basename(path)
+            if df is None:
+                print(f"   ❌ {name}: {msg}")
+                rejected.append(path)
+            else:
+                print(f"   📄 {name}: {msg}")
+                frames.append(df)
+                accepted.append(path)
+
+        # 2. Merge everything in one commit
+        added = 0
+        if frames:
+            print(f"   📄 Current Master DB Size: {len(master_df)} rows")
+            added = self._merge_into_master(master_df, frames)
+
+        # 3. Move files out of the inbox so they are not imported twice
+        if archive:
+            self._archive(accepted, os.path.join(directory, 'processed'))
+            self._archive(rejected, os.path.join(directory, 'rejected'))
+
+        return added
+
+    def watch(self, directory=None, interval=None, on_import=None):
+        """
+        Watches `directory` with cheap mtime polling and bulk-imports files as they land.
+        A file is only picked up once its size and mtime are unchanged between two polls,
+        so half-written uploads are never read.
+        `on_import(rows_added)` is called after every merge that added rows.
+        """
+        directory = directory or self.config.INCOMING_DATA_DIR
+        interval = interval or self.config.INCOMING_POLL_SECONDS
+        os.makedirs(directory, exist_ok=True)
+
+        print(f"👀 Watching {directory} every {interval}s (Ctrl+C to stop)...")
+        previous = {}
+        while True:
+            current = self._snapshot(directory)
+            stable = [p for p, sig in current.items() if previous.get(p) == sig]
+            if stable:
+                added = self.import_directory(directory, files=stable)
+                if added and on_import:
+                    on_import(added)
+                current = self._snapshot(directory)
+            previous = current
+            time.sleep(interval)
+
+    # --- INTERNALS ---
+
+    def _load_master(self):
+        # Try loading with different encodings
+        try:
+            return pd.read_csv(self.raw_path, encoding='utf-8', low_memory=False)
+        except UnicodeDecodeError:
+            return pd.read_csv(self.raw_path, encoding='latin1', low_memory=False)
+
+    def _merge_into_master(self, master_df, frames):
+        """Combines, deduplicates and atomically rewrites the master CSV. Returns rows added."""
+        # We combine them, then drop duplicates based on Date+Teams to prevent adding the same game twice
+        combined_df = pd.concat([master_df] + frames)
+
+        # Convert date to ensure proper duplicate checking
+        combined_df['MatchDate'] = pd.to_datetime(combined_df['MatchDate'], errors='coerce')
+
+        before_dedup = len(combined_df)
+        combined_df = combined_df.drop_duplicates(subset=['MatchDate', 'HomeTeam', 'AwayTeam'], keep='last')
+        duplicates_removed = before_dedup - len(combined_df)
+
+        # Sort by date
+        combined_df = combined_df.sort_values(by='MatchDate')
+
+        print(f"   🧹 Duplicates removed: {duplicates_removed}")
+        print(f"   ✅ New Master DB Size: {len(combined_df)} rows")
+
+        # Safety Backup & Save
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = self.config.PROJECT_ROOT / "data" / "raw" / f"matches_backup_{timestamp}.csv"
+        shutil.copy(self.raw_path, backup_path)
+        print(f"   🛡️  Backup created at: {backup_path.name}")
+        self._prune_backups()
+
+        # Write to a temp file first so readers never see a half-written master
+        tmp_path = self.raw_path.with_suffix('.csv.tmp')
+        combined_df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.raw_path)
+        print("   💾 SUCCESS: Master database updated.")
+
+        # Keep the indexed store in step so lookups see the new results (and the Elo / form
+        # features derived from them) immediately. Results that only extend the history are
+        # appended; a backfill or correction of older matches rewrites the tables.
+        store = MatchStore()
+        if store.exists():
+            master_end = pd.to_datetime(master_df['MatchDate'], errors='coerce').max()
+            new_start = min(frame['MatchDate'].min() for frame in frames)
+            since = master_end if pd.notna(master_end) and new_start > master_end else None
+            store.update_table(combined_df, MatchStore.RAW_TABLE, since)
+            store.update_table(self._processed_history(), MatchStore.PROCESSED_TABLE, since)
+
+        return max(0, len(combined_df) - len(master_df))
+
+    def _processed_history(self):
+        """The preprocessed master, through the training graph's checkpoint (reused by grading / retraining)."""
+        from training import build_training_graph
+        return build_training_graph().run(['preprocess'])['preprocess']
+
+    def _prune_backups(self):
+        """Keeps the newest Config.RAW_BACKUPS_KEEP backups (timestamped names sort by age)."""
+        backups = sorted((self.config.PROJECT_ROOT / "data" / "raw").glob("matches_backup_*.csv"))
+        for path in backups[:max(0, len(backups) - self.config.RAW_BACKUPS_KEEP)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _pending_files(self, directory):
+        if not os.path.isdir(directory):
+            return []
+        files = [e.path for e in os.scandir(directory) if e.is_file() and e.name.lower().endswith('.csv')]
+        return sorted(files, key=os.path.getmtime)
+
+    def _snapshot(self, directory):
+        snap = {}
+        for path in self._pending_files(directory):
+            st = os.stat(path)
+            snap[path] = (st.st_mtime, st.st_size)
+        return snap
+
+    def _archive(self, paths, dest_dir):
+        if not paths:
+            return
+        os.makedirs(dest_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for path in paths:
+            shutil.move(path, os.path.join(dest_dir, f"{stamp}_{os.path.basename(path)}"))
+
 if __name__ == "__main__":
     # Example Usage:
     # python updating/data_collection.py "path/to/new_matches.csv"
-    
+    # python updating/data_collection.py "data/incoming"           (bulk import a folder)
+    # python updating/data_collection.py "data/incoming" --watch   (keep importing as files land)
+
     if len(sys.argv) > 1:
         importer = DataCollector()
-        importer.import_new_matches(sys.argv[1])
+        target = sys.argv[1]
+        if '--watch' in sys.argv:
+            importer.watch(target)
+        elif os.path.isdir(target):
+            importer.import_directory(target)
+        else:
+            importer.import_new_matches(target)
     else:
-        print("Usage: python updating/data_collection.py <path_to_new_csv>")
\ No newline at end of file
+        print("Usage: python updating/data_collection.py <path_to_new_csv | incoming_dir> [--watch]")
@@ -3,7 +3,10 @@ import os
 import time
 import subprocess
 import json
+import copy
+import pandas as pd
 from datetime import datetime
+from sklearn.metrics import accuracy_score, mean_squared_error
 
 # --- PATH SETUP ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -16,19 +19,165 @@ try:
 except ImportError:
     # Fallback mock logger if utility is missing
     class StatusLogger:
-        def __init__(self, name): print(f"[{name}] Logger init")
+        def __init__(self, name, job_id=None): print(f"[{name}] Logger init")
         def start(self): print("Start")
         def log(self, msg, p=0): print(f"Log: {msg} ({p}%)")
         def complete(self, s=True): print("Done")
 
+from config.config import Config
+from utils.data_loader import DataLoader
+from utils.feature_engineering import FeatureEngineer
+from models.model_factory import ModelFactory
+from models.registry import ModelRegistry
+from utils.status_logger import read_system_status, update_system_status
+
 class ModelRetrainer:
-    def __init__(self):
-        self.logger = StatusLogger("Model Retraining")
+    def __init__(self, job_id=None):
+        self.config = Config()
+        self.logger = StatusLogger("Model Retraining", job_id=job_id)
         self.root = project_root
+        self.state_file = os.path.join(self.root, 'logs', 'retrain_state.json')
+
+    def run_update_cycle(self, force=False, incremental=None):
+        """
+        Retrains the models and logs progress to the Admin Dashboard.
+        By default this is a cheap incremental (warm-start) update; a full rebuild runs when
+        `force` is set, when incremental updates are disabled, when the incremental path is
+        not possible, or after Config.FULL_REBUILD_EVERY incremental updates.
+        """
+        incremental = self.config.INCREMENTAL_RETRAIN if incremental is None else incremental
+        done = self._load_state().get('incremental_updates', 0)
+
+        if incremental and not force and done < self.config.FULL_REBUILD_EVERY:
+            if self.run_incremental_cycle():
+                return
+        self.run_full_rebuild()
 
-    def run_update_cycle(self, force=False):
+    def retrain_due(self, new_rows):
         """
-        Runs the full retraining pipeline and logs progress to the Admin Dashboard.
+        Gate for the frequent incoming poll: adds `new_rows` to the rows waiting since the last
+        retrain and returns True once Config.INCOMING_RETRAIN_MIN_ROWS have accumulated or the last
+        retrain is older than Config.INCOMING_RETRAIN_MIN_HOURS.
+        """
+        state = self._load_state()
+        state['pending_rows'] = state.get('pending_rows', 0) + new_rows
+        self._save_state(state)
+
+        last = max(state.get('last_incremental', ''), state.get('last_full', ''))
+        if not last or state['pending_rows'] >= self.config.INCOMING_RETRAIN_MIN_ROWS:
+            return True
+        age = datetime.now() - datetime.strptime(last, "%Y-%m-%d %H:%M")
+        return age.total_seconds() >= self.config.INCOMING_RETRAIN_MIN_HOURS * 3600
+
+    def run_incremental_cycle(self):
+        """
+        Adds trees fitted on recent matches to the current (champion) models (NN champions are
+        fine-tuned from their weights, SVMs get an online partial_fit update), validates the
+        candidate against the champion on the newest matches and only saves it if it is not worse.
+        Returns False when an incremental update is not possible (caller falls back to a full rebuild,
+        which continues the same dashboard job).
+        """
+        self.logger.start()
+        try:
+            # --- PHASE 1: RECENT DATA ---
+            self.logger.log("🌱 Incremental Update: loading recent matches...", 10)
+            loader = DataLoader()
+            engineer = FeatureEngineer()
+            registry = ModelRegistry()
+            col_date = self.config.COL_DATE
+
+            df = loader.preprocess(loader.load_raw_data())
+            df[col_date] = pd.to_datetime(df[col_date])
+            cutoff = df[col_date].max() - pd.Timedelta(days=self.config.INCREMENTAL_RECENT_DAYS)
+            recent = df[df[col_date] >= cutoff].sort_values(col_date)
+            if len(recent) < 100:
+                self.logger.log(f"⚠️ Only {len(recent)} recent matches. Falling back to full rebuild.", 15)
+                return False
+
+            # Newest 25% validates the candidate; the rest trains the new trees
+            split = int(len(recent) * 0.75)
+            update_df, holdout_df = recent.iloc[:split], recent.iloc[split:]
+            X_upd = engineer.transform(update_df)  # scaler stays fixed so old trees remain valid
+            X_hold = engineer.transform(holdout_df)
+            y_upd, y_hold = engineer.get_targets(update_df), engineer.get_targets(holdout_df)
+            self.logger.log(f"📂 {len(update_df)} update rows, {len(holdout_df)} holdout rows.", 25)
+
+            # --- PHASE 2: GROW & VALIDATE EACH TARGET ---
+            promoted = 0
+            targets = list(self.config.TARGETS)
+            for i, target_name in enumerate(targets):
+                progress = 30 + int(60 * i / len(targets))
+                entry = registry.model_entry(target_name) or {}
+                model_type = entry.get('model_type', 'rf')
+                filename = entry.get('file', f"model_{target_name}.pkl")
+                mode = 'regression' if target_name == 'TotalGoals' else 'classification'
+
+                if model_type not in ('rf', 'gb', 'nn', 'svm'):
+                    self.logger.log(f"⏭️ {target_name}: '{model_type}' has no incremental mode. Skipping.", progress)
+                    continue
+                try:
+                    champion = ModelFactory.get_model(model_type, mode=mode)
+                    champion.load(filename)
+                except FileNotFoundError:
+                    self.logger.log(f"⚠️ {target_name}: no champion model. Falling back to full rebuild.", progress)
+                    return False
+
+                try:
+                    if model_type == 'nn':
+                        # Fine-tune a second copy of the champion's weights (warm start + early stopping)
+                        candidate = ModelFactory.get_model(model_type, mode=mode)
+                        candidate.load(filename)
+                        candidate.train(X_upd, y_upd[target_name])
+                    elif model_type == 'svm':
+                        # Online SGD step on the new results + recalibration on the newest of them
+                        candidate = copy.deepcopy(champion)
+                        candidate.update(X_upd, y_upd[target_name])
+                    else:
+                        candidate = copy.deepcopy(champion)
+                        candidate.add_trees(X_upd, y_upd[target_name],
+                                            n_new_trees=self.config.INCREMENTAL_NEW_TREES,
+                                            max_trees=self.config.INCREMENTAL_MAX_TREES)
+                except ValueError as e:
+                    self.logger.log(f"⏭️ {target_name}: {e}", progress)
+                    continue
+
+                champ_score = self._score(champion, mode, X_hold, y_hold[target_name])
+                cand_score = self._score(candidate, mode, X_hold, y_hold[target_name])
+                if cand_score >= champ_score:
+                    candidate.save(filename)
+                    # Keep the entry's validation metric/score; the recent-holdout score is recorded
+                    # on its own, in the registry's units (accuracy, or positive MSE)
+                    info = {k: v for k, v in entry.items() if k not in ('model_type', 'file', 'version', 'sha256')}
+                    info.update(holdout_score=cand_score if mode == 'classification' else -cand_score,
+                                updated=datetime.now().strftime("%Y-%m-%d %H:%M"),
+                                incremental_updates=entry.get('incremental_updates', 0) + 1)
+                    registry.register_model(target_name, model_type, filename, **info)
+                    promoted += 1
+                    self.logger.log(f"✅ {target_name}: candidate {cand_score:.4f} >= champion {champ_score:.4f}. Saved.", progress)
+                else:
+                    self.logger.log(f"↩️ {target_name}: candidate {cand_score:.4f} < champion {champ_score:.4f}. Kept champion.", progress)
+
+            # --- PHASE 3: BOOKKEEPING ---
+            if promoted:
+                registry.write()
+            state = self._load_state()
+            state['incremental_updates'] = state.get('incremental_updates', 0) + 1
+            state['last_incremental'] = datetime.now().strftime("%Y-%m-%d %H:%M")
+            state['pending_rows'] = 0
+            self._save_state(state)
+
+            self._update_health_status()
+            self.logger.log(f"✅ Incremental Update Finished ({promoted}/{len(targets)} models promoted).", 98)
+            self.logger.complete(success=True)
+            return True
+
+        except Exception as e:
+            self.logger.log(f"❌ Incremental update failed: {str(e)}. Falling back to full rebuild.")
+            return False
+
+    def run_full_rebuild(self):
+        """
+        Runs the full retraining pipeline (training.py) and logs progress to the Admin Dashboard.
         """
         self.logger.start()
         
@@ -55,8 +204,10 @@ class ModelRetrainer:
             # We run training.py as a separate process to manage memory and capture logs
             self.logger.log("🧠 Starting Training Engine...", 30)
             
+            # --full: retrain every target, never reuse a cached result (the incremental
+            # updates this rebuild resets may have grown the models since it was cached)
             process = subprocess.Popen(
-                [sys.executable, train_script],
+                [sys.executable, train_script, '--full'],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -81,6 +232,11 @@ class ModelRetrainer:
                 raise Exception(f"Training Script Failed:\n{stderr}")
 
             self.logger.log("✅ Training Process Completed Successfully.", 95)
+            state = self._load_state()
+            state['incremental_updates'] = 0
+            state['last_full'] = datetime.now().strftime("%Y-%m-%d %H:%M")
+            state['pending_rows'] = 0
+            self._save_state(state)
 
             # --- PHASE 4: UPDATE SYSTEM HEALTH ---
             self._update_health_status()
@@ -95,24 +251,42 @@ class ModelRetrainer:
             # Re-raise to ensure calling thread knows it failed
             print(f"Error in retraining: {e}")
 
+    def _score(self, model, mode, X, y):
+        """Higher is better for both modes (accuracy / negative MSE)."""
+        preds = model.predict(X)
+        if mode == 'classification':
+            return accuracy_score(y, preds)
+        return -mean_squared_error(y, preds)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f)
+
     def _update_health_status(self):
-        """Writes a simple health check file for the admin panel."""
-        status_file = os.path.join(self.root, 'logs', 'system_status.json')
-        
-        health_data = {
-            "status": "ONLINE",
-            "last_training": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "active_alerts": []
-        }
-        
+        """
+        Records the training time in the admin panel's health file (merged: the live monitor's
+        alarms and the weekly metrics stay until the next health check re-evaluates them).
+        """
+        sections = {"last_training": datetime.now().strftime("%Y-%m-%d %H:%M")}
+
         # Check if models exist
-        model_path = os.path.join(self.root, 'models', 'saved', 'model_WLD.pkl')
+        model_path = os.path.join(self.root, 'models', 'model_WLD.pkl')
         if not os.path.exists(model_path):
-            health_data['status'] = "DEGRADED"
-            health_data['active_alerts'].append("WLD Model Missing")
-            
-        with open(status_file, 'w') as f:
-            json.dump(health_data, f)
+            alerts = read_system_status().get('active_alerts', [])
+            if "WLD Model Missing" not in alerts:
+                alerts.append("WLD Model Missing")
+            sections['status'] = "DEGRADED"
+            sections['active_alerts'] = alerts
+
+        update_system_status(**sections)
 
 if __name__ == "__main__":
     # Test Run
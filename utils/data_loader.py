@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
 from utils.feature_generator import AdvancedFeatureGenerator
+from utils.match_store import MatchStore
 
 class DataLoader:
     def __init__(self):
@@ -106,9 +107,15 @@ class DataLoader:
         test.to_csv(self.config.PROCESSED_DATA_DIR / "test.csv", index=False)
 
         print(f"💾 Data processed & saved to {self.config.PROCESSED_DATA_DIR}")
+        return train, val, test
+
+    def sync_match_store(self, raw_df, processed_df=None):
+        """Writes raw (and processed) history into the indexed SQLite store."""
+        MatchStore().sync(raw_df=raw_df, processed_df=processed_df)
 
 if __name__ == "__main__":
     loader = DataLoader()
     raw_df = loader.load_raw_data()
     clean_df = loader.preprocess(raw_df)
-    loader.save_splits(clean_df)
\ No newline at end of file
+    loader.save_splits(clean_df)
+    loader.sync_match_store(raw_df, clean_df)
\ No newline at end of file
@@ -1,23 +1,198 @@
 import pandas as pd
 import numpy as np
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, mean_absolute_error, mean_squared_error
-import matplotlib.pyplot as plt
-import seaborn as sns
 from config.config import Config
 
+# Odds column of each WLD class label (Config.RESULT_MAP: 2=Home, 1=Draw, 0=Away)
+ODDS_COLUMNS = {2: 'OddHome', 1: 'OddDraw', 0: 'OddAway'}
+
+def strategy_grid(stake=None, fractions=None, kelly_fractions=None, edges=None):
+    """
+    Every staking rule crossed with every edge threshold, as strategy dicts for backtest().
+    staking: 'flat' (size = stake), 'proportional' (size = share of bankroll) or
+    'kelly' (size = Kelly multiplier); min_edge: model prob - implied prob required to bet.
+    """
+    config = Config()
+    stake = config.BACKTEST_STAKE if stake is None else stake
+    rules = [('flat', stake)]
+    rules += [('proportional', f) for f in (fractions or config.BACKTEST_FRACTIONS)]
+    rules += [('kelly', k) for k in (kelly_fractions or config.BACKTEST_KELLY_FRACTIONS)]
+    return [{'name': f"{kind}({size:g}) edge>={edge:g}", 'staking': kind, 'size': size, 'min_edge': edge}
+            for kind, size in rules for edge in (edges or config.BACKTEST_EDGES)]
+
+def stake_plan(strategies, odds, prob=None):
+    """
+    Bet sizes of every strategy on every match, before any outcome is known.
+    :return: (is_flat (S, 1), sizes (S, n)): money for flat strategies, a share of the current
+             bankroll for proportional / Kelly ones; 0 means no bet.
+    """
+    odds = np.asarray(odds, dtype=np.float64)
+    kind = np.array([s['staking'] for s in strategies])[:, None]
+    size = np.array([s['size'] for s in strategies], dtype=np.float64)[:, None]
+    min_edge = np.array([s.get('min_edge') for s in strategies], dtype=np.float64)[:, None]  # None -> nan
+    needs_prob = (kind == 'kelly').any() or (~np.isnan(min_edge)).any()
+    if prob is None and needs_prob:
+        raise ValueError("Kelly staking and edge thresholds need the model probabilities (prob).")
+
+    valid = np.isfinite(odds) & (odds > 1.0)
+    safe_odds = np.where(valid, odds, 2.0)
+    bet = np.broadcast_to(valid, (len(strategies), len(odds)))
+    kelly = 0.0
+    if prob is not None:
+        prob = np.asarray(prob, dtype=np.float64)
+        edge = prob - 1.0 / safe_odds
+        bet = bet & (np.isnan(min_edge) | (edge >= min_edge))
+        kelly = np.clip((prob * safe_odds - 1.0) / (safe_odds - 1.0), 0.0, 1.0)  # full-Kelly fraction
+
+    is_flat = kind == 'flat'
+    fraction = np.clip(np.where(kind == 'kelly', size * kelly, size), 0.0, 1.0)
+    sizes = np.where(bet, np.where(is_flat, size, fraction), 0.0)
+    return is_flat, sizes
+
+def unit_returns(odds, won):
+    """Profit per 1 staked: odds - 1 on a win, -1 on a loss, 0 where there are no usable odds."""
+    odds = np.asarray(odds, dtype=np.float64)
+    valid = np.isfinite(odds) & (odds > 1.0)
+    return np.where(valid, np.where(won, np.where(valid, odds, 2.0) - 1.0, -1.0), 0.0)
+
+def equity_curves(is_flat, sizes, unit_return, bankroll):
+    """
+    Bankroll after every match for each row of the broadcast (rows x matches) grid:
+    flat stakes accumulate with cumsum, bankroll shares compound with cumprod.
+    :return: (equity, stakes) where stakes is the money actually put on each bet.
+    """
+    flat_stakes = np.where(is_flat, sizes, 0.0) * np.ones_like(unit_return)
+    fraction = np.where(is_flat, 0.0, sizes)
+    flat_equity = bankroll + np.cumsum(flat_stakes * unit_return, axis=1)
+    compound_equity = bankroll * np.cumprod(1.0 + fraction * unit_return, axis=1)
+    equity = np.where(is_flat, flat_equity, compound_equity)
+    before = np.hstack([np.full((equity.shape[0], 1), bankroll), equity[:, :-1]])
+    stakes = np.where(is_flat, flat_stakes, fraction * before)
+    return equity, stakes
+
+def backtest(odds, won, prob=None, strategies=None, bankroll=None):
+    """
+    Vectorised backtest of many staking strategies over the same sequence of bets.
+    Works on a (strategies x matches) matrix: flat stakes accumulate with cumsum, bankroll-relative
+    stakes (proportional, Kelly) compound with cumprod, so a sweep of hundreds of strategies over
+    a season is a handful of NumPy operations.
+
+    :param odds: decimal odds of the picked outcome per match (chronological order)
+    :param won: whether the pick came in
+    :param prob: model probability of the pick (required by Kelly staking and edge thresholds)
+    :return: {'names', 'equity' (bankroll after each match), 'drawdown', 'summary' DataFrame}
+    """
+    config = Config()
+    bankroll = config.BACKTEST_BANKROLL if bankroll is None else bankroll
+    strategies = strategies or [{'name': 'flat', 'staking': 'flat', 'size': config.BACKTEST_STAKE}]
+    won = np.asarray(won, dtype=bool)
+    if len(won) == 0:
+        raise ValueError("Nothing to backtest: no matches.")
+
+    is_flat, sizes = stake_plan(strategies, odds, prob)
+    equity, stakes = equity_curves(is_flat, sizes, unit_returns(odds, won), bankroll)
+    placed = stakes > 0
+
+    n_bets = placed.sum(axis=1)
+    staked = stakes.sum(axis=1)
+    profit = equity[:, -1] - bankroll
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peak = np.maximum.accumulate(np.hstack([np.full((len(strategies), 1), bankroll), equity]), axis=1)[:, 1:]
+        drawdown = np.where(peak > 0, (peak - equity) / peak, np.nan)
+        summary = pd.DataFrame({
+            'Strategy': [s['name'] for s in strategies],
+            'Bets': n_bets,
+            'HitRate': np.where(n_bets > 0, (placed & won).sum(axis=1) / n_bets, np.nan),
+            'Staked': staked,
+            'Profit': profit,
+            'ROI': np.where(staked > 0, profit / staked * 100, np.nan),
+            'MaxDrawdown': drawdown.max(axis=1) * 100,
+            'FinalBankroll': equity[:, -1],
+        })
+    return {'names': summary['Strategy'].tolist(), 'equity': equity, 'drawdown': drawdown, 'summary': summary}
+
+def bootstrap_indices(n, n_boot, block_size=1, seed=42):
+    """
+    (n_boot, n) matrix of resampled row indices, drawn once for every metric.
+    block_size > 1 draws circular blocks of consecutive rows (rows are chronological, so a
+    block is roughly a match week) to keep the correlation between matches of the same round.
+    """
+    rng = np.random.default_rng(seed)
+    if block_size <= 1:
+        return rng.integers(0, n, size=(n_boot, n))
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_boot, n_blocks, 1))
+    return ((starts + np.arange(block_size)) % n).reshape(n_boot, -1)[:, :n]
+
+def bootstrap_metrics(y_true, y_pred=None, proba=None, mode='classification', classes=None, n_boot=None,
+                      block_size=None, confidence=None, seed=42):
+    """
+    Point estimates and bootstrap confidence intervals of accuracy, log loss and Brier score
+    (classification: y_pred and/or proba) or MSE and MAE (regression: y_pred).
+    Every metric is a mean of a per-row loss, so the resamples reduce to one
+    (n_boot x n) count matrix times a (n x metrics) loss matrix.
+    :return: {metric: {'value', 'low', 'high', 'std'}}
+    """
+    config = Config()
+    n_boot = n_boot or config.BOOTSTRAP_SAMPLES
+    block_size = config.BOOTSTRAP_BLOCK_SIZE if block_size is None else block_size
+    confidence = confidence or config.BOOTSTRAP_CONFIDENCE
+    y_true = np.asarray(y_true)
+    n = len(y_true)
+    if n == 0:
+        raise ValueError("Cannot bootstrap metrics of an empty sample.")
+
+    losses = {}
+    if mode == 'regression':
+        err = np.asarray(y_pred, dtype=np.float64) - y_true.astype(np.float64)
+        losses['mse'] = err ** 2
+        losses['mae'] = np.abs(err)
+    elif proba is not None:
+        proba = np.clip(np.asarray(proba, dtype=np.float64), 1e-15, 1.0)
+        classes = np.arange(proba.shape[1]) if classes is None else np.asarray(classes)
+        onehot = (y_true[:, None] == classes[None, :]).astype(np.float64)
+        losses['log_loss'] = -np.log((proba * onehot).sum(axis=1))
+        losses['brier'] = ((proba - onehot) ** 2).sum(axis=1)
+        if y_pred is None:
+            y_pred = classes[np.argmax(proba, axis=1)]
+    if mode != 'regression' and y_pred is not None:
+        losses['accuracy'] = (np.asarray(y_pred) == y_true).astype(np.float64)
+
+    names = list(losses)
+    L = np.column_stack([losses[m] for m in names])  # (n, metrics)
+    idx = bootstrap_indices(n, n_boot, block_size, seed)
+    counts = np.bincount((idx + n * np.arange(n_boot)[:, None]).ravel(), minlength=n_boot * n).reshape(n_boot, n)
+    samples = counts @ L / n  # (n_boot, metrics)
+
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail], axis=0)
+    point, std = L.mean(axis=0), samples.std(axis=0)
+    return {m: {'value': float(point[i]), 'low': float(low[i]), 'high': float(high[i]), 'std': float(std[i])}
+            for i, m in enumerate(names)}
+
+def format_interval(stats, percent=False):
+    if percent:
+        return f"{stats['value']:.2%} [{stats['low']:.2%}, {stats['high']:.2%}]"
+    return f"{stats['value']:.4f} [{stats['low']:.4f}, {stats['high']:.4f}]"
+
 class Evaluator:
     def __init__(self):
         self.config = Config()
 
-    def evaluate_classification(self, y_true, y_pred, target_name="WLD", class_names=None):
+    def evaluate_classification(self, y_true, y_pred, target_name="WLD", class_names=None, proba=None):
         """
-        Prints standard classification metrics.
+        Prints standard classification metrics, with bootstrap confidence intervals
+        (log loss and Brier score too when `proba` is given).
         """
         print(f"\n📊 EVALUATION REPORT: {target_name}")
         print("=========================================")
         
         acc = accuracy_score(y_true, y_pred)
-        print(f"✅ Accuracy: {acc:.2%}")
+        ci = bootstrap_metrics(y_true, y_pred, proba=proba)
+        print(f"✅ Accuracy: {format_interval(ci['accuracy'], percent=True)} ({self.config.BOOTSTRAP_CONFIDENCE:.0%} CI)")
+        if proba is not None:
+            print(f"📉 Log Loss: {format_interval(ci['log_loss'])}")
+            print(f"📉 Brier Score: {format_interval(ci['brier'])}")
         
         print("\n📝 Classification Report:")
         print(classification_report(y_true, y_pred, target_names=class_names))
@@ -30,7 +205,7 @@ class Evaluator:
 
     def evaluate_regression(self, y_true, y_pred, target_name="TotalGoals"):
         """
-        Prints regression metrics for goals.
+        Prints regression metrics for goals, with bootstrap confidence intervals.
         """
         print(f"\n📊 EVALUATION REPORT: {target_name}")
         print("=========================================")
@@ -38,11 +213,22 @@ class Evaluator:
         mae = mean_absolute_error(y_true, y_pred)
         mse = mean_squared_error(y_true, y_pred)
         rmse = np.sqrt(mse)
+        ci = bootstrap_metrics(y_true, y_pred, mode='regression')
         
-        print(f"📉 Mean Absolute Error (MAE): {mae:.4f} goals")
+        print(f"📉 Mean Absolute Error (MAE): {format_interval(ci['mae'])} goals ({self.config.BOOTSTRAP_CONFIDENCE:.0%} CI)")
+        print(f"📉 Mean Squared Error (MSE): {format_interval(ci['mse'])}")
         print(f"📉 Root Mean Squared Error (RMSE): {rmse:.4f} goals")
         return mae
 
+    def _picked_odds(self, df, preds, proba=None):
+        """Odds (and model probability) of the predicted WLD outcome for every row, via array indexing."""
+        labels = np.array(sorted(ODDS_COLUMNS))
+        idx = np.searchsorted(labels, np.asarray(preds))
+        rows = np.arange(len(df))
+        odds = df[[ODDS_COLUMNS[c] for c in labels]].to_numpy(dtype=np.float64)[rows, idx]
+        prob = None if proba is None else np.asarray(proba)[rows, idx]  # proba columns follow sorted labels
+        return odds, prob
+
     def calculate_roi(self, df, preds, target_col="Target_WLD"):
         """
         Calculates the Return on Investment (ROI) assuming a flat stake bet on every game.
@@ -51,48 +237,37 @@ class Evaluator:
         print(f"\n💰 BETTING ROI ANALYSIS ({target_col})")
         print("=========================================")
         
-        # We need the odds from the dataframe
-        # Assuming preds align with df index (Test Set)
-        
-        capital = 0.0
-        stake = 10.0 # Bet $10 per game
-        wins = 0
-        losses = 0
-        
-        roi_data = []
-
-        # Iterate through the test set
-        for i, (index, row) in enumerate(df.iterrows()):
-            actual = row[target_col]
-            prediction = preds[i]
-            
-            # Get the odds for the PREDICTED outcome
-            # Map prediction (0,1,2) to column names (OddHome, OddDraw, OddAway)
-            if prediction == 0: # Home
-                odds = row['OddHome']
-            elif prediction == 1: # Draw
-                odds = row['OddDraw']
-            else: # Away
-                odds = row['OddAway']
-            
-            # Betting Logic
-            if prediction == actual:
-                profit = (odds * stake) - stake
-                capital += profit
-                wins += 1
-            else:
-                loss = stake
-                capital -= loss
-                losses += 1
-                
-            roi_data.append(capital)
-
-        total_bets = wins + losses
-        roi_percent = (capital / (total_bets * stake)) * 100
+        # Assuming preds align with df rows (Test Set)
+        odds, _ = self._picked_odds(df, preds)
+        won = np.asarray(preds) == df[target_col].to_numpy()
+        result = backtest(odds, won, bankroll=0.0)
+        flat = result['summary'].iloc[0]
+
+        total_bets = int(flat['Bets'])
+        wins = int(round(flat['HitRate'] * total_bets)) if total_bets else 0
+        capital = float(flat['Profit'])
+        roi_percent = float(flat['ROI'])
         
         print(f"💵 Total Bets: {total_bets}")
-        print(f"✅ Wins: {wins} | ❌ Losses: {losses} | Win Rate: {wins/total_bets:.1%}")
+        print(f"✅ Wins: {wins} | ❌ Losses: {total_bets - wins} | Win Rate: {flat['HitRate']:.1%}")
         print(f"💲 Net Profit: ${capital:.2f}")
         print(f"📈 ROI: {roi_percent:.2f}%")
         
-        return capital, roi_percent
\ No newline at end of file
+        return capital, roi_percent
+
+    def backtest_strategies(self, df, preds, proba, target_col="Target_WLD", strategies=None, top=10):
+        """
+        Backtests a grid of staking strategies (flat / proportional / fractional Kelly x edge thresholds)
+        on the predicted outcomes. Returns the backtest() result; prints the best strategies by ROI.
+        """
+        print(f"\n🎲 STRATEGY BACKTEST ({target_col})")
+        print("=========================================")
+        strategies = strategies or strategy_grid()
+        odds, prob = self._picked_odds(df, preds, proba)
+        won = np.asarray(preds) == df[target_col].to_numpy()
+        result = backtest(odds, won, prob=prob, strategies=strategies)
+
+        best = result['summary'].sort_values('ROI', ascending=False).head(top)
+        print(f"   {len(strategies)} strategies x {len(odds)} matches")
+        print(best.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        return result
@@ -16,6 +16,30 @@ class FeatureEngineer:  # <--- Class Name must match this exactly!
         # We load the list of numeric features from config to ensure consistency
         self.features = self.config.FEATURES_NUMERIC
 
+    def fit_features(self, df):
+        """
+        Fits the Scaler ONCE on the training features and returns the scaled X.
+        Every target trains on this same matrix, so there is no reason to refit per target.
+        Does not write the scaler; the caller saves it together with the models (see ModelRegistry).
+        """
+        missing_cols = [c for c in self.features if c not in df.columns]
+        if missing_cols:
+            raise ValueError(f"❌ Missing features in dataframe: {missing_cols}")
+
+        print(f"   ⚙️ Scaling {len(self.features)} features (shared by all targets)...")
+        X_scaled = self.scaler.fit_transform(df[self.features])
+        return pd.DataFrame(X_scaled, columns=self.features)
+
+    def get_targets(self, df, target_names=None):
+        """Returns {target_name: y} for every target column present in df."""
+        targets = {}
+        for target_name in (target_names or self.config.TARGETS.keys()):
+            target_col = self.config.TARGETS[target_name]
+            if target_col not in df.columns:
+                raise ValueError(f"❌ Target column '{target_col}' not found for '{target_name}'")
+            targets[target_name] = df[target_col].values
+        return targets
+
     def fit_transform(self, df, target_name="WLD"):
         """
         1. Selects the numeric features.
@@ -0,0 +1,152 @@
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+import sys
+import os
+from pathlib import Path
+
+# Allow importing from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+class MatchStore:
+    """
+    Optional embedded SQLite copy of the match history.
+    Lets the web app / bot run indexed point queries (team, H2H, hierarchy)
+    instead of holding the full history as a DataFrame in every process.
+    """
+    RAW_TABLE = "raw_matches"
+    PROCESSED_TABLE = "processed_matches"
+
+    def __init__(self, db_path=None):
+        self.config = Config()
+        self.db_path = Path(db_path or self.config.MATCH_DB_PATH)
+
+    def exists(self):
+        if not self.db_path.exists():
+            return False
+        with self._connect() as con:
+            tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        return {self.RAW_TABLE, self.PROCESSED_TABLE} <= tables
+
+    # --- WRITE ---
+    def write_table(self, df, table):
+        """Replaces `table` with `df` and (re)creates the lookup indexes."""
+        os.makedirs(self.db_path.parent, exist_ok=True)
+        df = df.copy()
+        df[self.config.COL_DATE] = pd.to_datetime(df[self.config.COL_DATE], errors='coerce')
+
+        with self._connect() as con:
+            df.to_sql(table, con, if_exists='replace', index=False, chunksize=5000)
+            con.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_home_date ON {table} (HomeTeam, MatchDate)')
+            con.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_away_date ON {table} (AwayTeam, MatchDate)')
+            con.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (MatchDate)')
+            if 'Division' in df.columns:
+                con.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_division ON {table} (Division)')
+            con.execute("ANALYZE")
+        print(f"   🗄️  Match store: {len(df)} rows written to '{table}'.")
+
+    def update_table(self, df, table, since=None):
+        """
+        Brings `table` up to date with `df` (the full history). With `since` (every stored row is
+        dated on/before it and unchanged) only the newer rows are appended; otherwise the table is rewritten.
+        """
+        with self._connect() as con:
+            columns = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+        if since is None or not columns or not set(df.columns) <= columns:
+            return self.write_table(df, table)
+
+        dates = pd.to_datetime(df[self.config.COL_DATE], errors='coerce')
+        newer = (dates > pd.Timestamp(since)).to_numpy()
+        new = df[newer].copy()
+        new[self.config.COL_DATE] = dates[newer].to_numpy()
+        with self._connect() as con:
+            new.to_sql(table, con, if_exists='append', index=False, chunksize=5000)
+        print(f"   🗄️  Match store: {len(new)} rows appended to '{table}'.")
+
+    def sync(self, raw_df=None, processed_df=None):
+        if raw_df is not None:
+            self.write_table(raw_df, self.RAW_TABLE)
+        if processed_df is not None:
+            self.write_table(processed_df, self.PROCESSED_TABLE)
+
+    # --- POINT QUERIES ---
+    def team_matches(self, team, limit=1, table=PROCESSED_TABLE):
+        """Most recent `limit` matches of `team` (home or away), newest first."""
+        # Two indexed range scans instead of one OR scan
+        sql = (
+            f"SELECT * FROM (SELECT * FROM {table} WHERE HomeTeam = ? ORDER BY MatchDate DESC LIMIT ?) "
+            f"UNION ALL "
+            f"SELECT * FROM (SELECT * FROM {table} WHERE AwayTeam = ? ORDER BY MatchDate DESC LIMIT ?) "
+            f"ORDER BY MatchDate DESC LIMIT ?"
+        )
+        return self._query(sql, (team, limit, team, limit, limit))
+
+    def latest_team_row(self, team):
+        sql = (
+            f"SELECT * FROM (SELECT * FROM {self.PROCESSED_TABLE} WHERE HomeTeam = ? ORDER BY MatchDate DESC LIMIT 1) "
+            f"UNION ALL "
+            f"SELECT * FROM (SELECT * FROM {self.PROCESSED_TABLE} WHERE AwayTeam = ? ORDER BY MatchDate DESC LIMIT 1) "
+            f"ORDER BY MatchDate DESC LIMIT 1"
+        )
+        cols, rows = self._fetch(sql, (team, team))
+        if not rows:
+            return None
+        # A plain Series is far cheaper than building a one-row DataFrame
+        row = pd.Series(dict(zip(cols, rows[0])))
+        row[self.config.COL_DATE] = pd.Timestamp(row[self.config.COL_DATE])
+        return row
+
+    def head_to_head(self, home, away, limit=5):
+        sql = (
+            f"SELECT * FROM {self.RAW_TABLE} "
+            f"WHERE (HomeTeam = ? AND AwayTeam = ?) OR (HomeTeam = ? AND AwayTeam = ?) "
+            f"ORDER BY MatchDate DESC LIMIT ?"
+        )
+        return self._query(sql, (home, away, away, home, limit))
+
+    def teams_by_division(self, since=None):
+        """Returns {division: sorted team list}, optionally only for matches on/after `since`."""
+        where = "WHERE MatchDate >= ?" if since is not None else ""
+        params = (str(pd.Timestamp(since)),) * 2 if since is not None else ()
+        sql = (
+            f"SELECT Division, HomeTeam AS Team FROM {self.RAW_TABLE} {where} "
+            f"UNION SELECT Division, AwayTeam AS Team FROM {self.RAW_TABLE} {where}"
+        )
+        with self._connect() as con:
+            rows = con.execute(sql, params).fetchall()
+
+        out = {}
+        for div, team in rows:
+            out.setdefault(div, []).append(team)
+        return {div: sorted(teams) for div, teams in out.items()}
+
+    # --- INTERNALS ---
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with con:  # commits on success
+                yield con
+        finally:
+            con.close()
+
+    def _fetch(self, sql, params):
+        with self._connect() as con:
+            cur = con.execute(sql, params)
+            cols = [d[0] for d in cur.description]
+            return cols, cur.fetchall()
+
+    def _query(self, sql, params):
+        cols, rows = self._fetch(sql, params)
+        df = pd.DataFrame.from_records(rows, columns=cols)
+        if self.config.COL_DATE in df.columns:
+            df[self.config.COL_DATE] = pd.to_datetime(df[self.config.COL_DATE])
+        return df
+
+if __name__ == "__main__":
+    # Build / refresh the store from matches.csv
+    from utils.data_loader import DataLoader
+    loader = DataLoader()
+    raw_df = loader.load_raw_data()
+    loader.sync_match_store(raw_df, loader.preprocess(raw_df))
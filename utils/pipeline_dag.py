@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+import joblib
+from joblib import Parallel, delayed
+from pathlib import Path
+
+# Allow importing from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+class Stage:
+    """
+    One node of the pipeline graph.
+    fn(inputs, **params) receives {dep_name: dep_output} and returns a picklable output.
+    params (and the cache keys of the deps) define the stage's cache key.
+    """
+    def __init__(self, name, fn, deps=(), params=None, cache=True, uses_cores=False, version=1):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.cache = cache
+        self.uses_cores = uses_cores  # receives n_jobs = its share of the CPU budget
+        self.version = version        # bump when the stage's code changes
+
+def _execute(fn, inputs, params, checkpoint_path):
+    """
+    Runs one stage (possibly in a worker process) and checkpoints its output there,
+    so finished siblings survive a crash in another stage. Errors are returned, not raised,
+    for the same reason.
+    """
+    t0 = time.perf_counter()
+    try:
+        output = fn(inputs, **params)
+    except Exception:
+        return None, time.perf_counter() - t0, traceback.format_exc()
+    if checkpoint_path is not None:
+        tmp_path = f"{checkpoint_path}.tmp"
+        joblib.dump(output, tmp_path)
+        os.replace(tmp_path, checkpoint_path)
+    return output, time.perf_counter() - t0, None
+
+class PipelineDAG:
+    """
+    Declarative stage graph with checkpointed, content-keyed stage outputs.
+    - Each stage's output is saved under a hash of (name, version, params, dep keys).
+    - run() skips stages whose checkpoint exists; only the ancestors a request needs are touched.
+    - Stages on the same level of the graph run in parallel (loky workers, large arrays memory-mapped).
+    """
+    def __init__(self, cache_dir=None):
+        self.config = Config()
+        self.cache_dir = Path(cache_dir or self.config.PIPELINE_CACHE_DIR)
+        self.stages = {}
+        self.timings = []
+
+    def add(self, name, fn, deps=(), params=None, **options):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}' (add dependencies first).")
+        self.stages[name] = Stage(name, fn, deps, params, **options)
+        return self
+
+    # --- CACHE KEYS ---
+    def keys(self):
+        keys = {}
+        for name, stage in self.stages.items():  # insertion order is topological
+            payload = json.dumps({
+                'stage': name,
+                'version': stage.version,
+                'params': stage.params,
+                'deps': [keys[d] for d in stage.deps],
+            }, sort_keys=True, default=str)
+            keys[name] = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        return keys
+
+    def _checkpoint(self, name, key):
+        return self.cache_dir / f"{name}-{key}.pkl"
+
+    def _descendants(self, names):
+        out = set(names)
+        for name, stage in self.stages.items():
+            if any(d in out for d in stage.deps):
+                out.add(name)
+        return out
+
+    # --- EXECUTION ---
+    def run(self, targets=None, force=(), parallel=True):
+        """
+        Materialises `targets` (default: every stage) and returns {name: output}.
+        :param force: stages to recompute even if cached (their descendants are recomputed too).
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        targets = list(targets or self.stages)
+        keys = self.keys()
+        forced = self._descendants(force)
+        self.timings = []
+
+        def cached(name):
+            stage = self.stages[name]
+            return stage.cache and name not in forced and self._checkpoint(name, keys[name]).exists()
+
+        # Walk back from the targets; a cached stage cuts off its own ancestors.
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            if not cached(name):
+                stack.extend(self.stages[name].deps)
+
+        outputs = {}
+        level_of = {}
+        for name, stage in self.stages.items():
+            if name in needed:
+                level_of[name] = 1 + max([level_of[d] for d in stage.deps if d in level_of], default=-1)
+
+        for level in range(max(level_of.values(), default=-1) + 1):
+            names = [n for n, lv in level_of.items() if lv == level]
+            to_run = []
+            for name in names:
+                if cached(name):
+                    t0 = time.perf_counter()
+                    outputs[name] = joblib.load(self._checkpoint(name, keys[name]))
+                    self.timings.append((name, 'cached', time.perf_counter() - t0))
+                else:
+                    to_run.append(name)
+            if to_run:
+                self._run_level(to_run, keys, outputs, parallel)
+
+        self.report()
+        return {name: outputs[name] for name in targets}
+
+    def _run_level(self, names, keys, outputs, parallel):
+        n_cpus = joblib.cpu_count()
+        n_workers = max(1, min(len(names), n_cpus)) if parallel else 1
+        jobs_per_worker = max(1, n_cpus // n_workers)
+
+        calls = []
+        for name in names:
+            stage = self.stages[name]
+            params = dict(stage.params)
+            if stage.uses_cores:
+                params['n_jobs'] = jobs_per_worker
+            inputs = {d: outputs[d] for d in stage.deps}
+            checkpoint = self._checkpoint(name, keys[name]) if stage.cache else None
+            calls.append(delayed(_execute)(stage.fn, inputs, params, checkpoint))
+
+        if n_workers > 1:
+            print(f"\n⚡ Running stages in parallel: {', '.join(names)} ({n_workers} workers x {jobs_per_worker} cores)")
+            results = Parallel(n_jobs=n_workers, backend='loky', max_nbytes='1M', mmap_mode='r')(calls)
+        else:
+            results = [fn(*args, **kwargs) for fn, args, kwargs in calls]
+
+        failures = []
+        for name, (output, seconds, error) in zip(names, results):
+            if error:
+                self.timings.append((name, 'failed', seconds))
+                failures.append(f"{name}:\n{error}")
+                continue
+            outputs[name] = output
+            self.timings.append((name, 'ran', seconds))
+            if self.stages[name].cache:
+                self._prune(name, keys[name])
+
+        if failures:
+            self.report()
+            raise RuntimeError("Pipeline stage(s) failed (finished stages are checkpointed; rerun to resume):\n"
+                               + "\n".join(failures))
+
+    def _prune(self, name, key):
+        """Keeps only the current checkpoint of a stage."""
+        for path in self.cache_dir.glob(f"{name}-*.pkl"):
+            if path.name != f"{name}-{key}.pkl":
+                path.unlink(missing_ok=True)
+
+    def report(self):
+        print("\n⏱️  Stage timings")
+        print(f"   {'Stage':<20} | {'Status':<7} | {'Seconds':>8}")
+        for name, status, seconds in self.timings:
+            print(f"   {name:<20} | {status:<7} | {seconds:>8.2f}")
@@ -1,51 +1,145 @@
 import json
 import os
-import time
+import sys
+import threading
+import uuid
+from collections import deque
 from datetime import datetime
 
+try:
+    import fcntl  # serialises the read-modify-write of the shared status file (POSIX only)
+except ImportError:
+    fcntl = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+IDLE = {"job_id": None, "status": "idle", "logs": [], "progress": 0, "seq": 0}
+
+def new_job_id():
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+def job_path(job_id=None):
+    """logs/jobs/<job_id>.json, or logs/active_job.json (the most recently updated job)."""
+    logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+    return os.path.join(logs_dir, 'jobs', f"{job_id}.json") if job_id else os.path.join(logs_dir, 'active_job.json')
+
+def read_job(job_id=None):
+    try:
+        with open(job_path(job_id), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return dict(IDLE)
+
+def system_status_path():
+    return Config.PROJECT_ROOT / "logs" / "system_status.json"
+
+def read_system_status():
+    try:
+        with open(system_status_path(), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def update_system_status(**sections):
+    """
+    Merges `sections` into logs/system_status.json (the admin dashboard's health file).
+    The alert system, the retrainer and the drift tracker each own some keys: the update is a
+    read-modify-write under a file lock, replaced atomically, so no writer erases another's keys.
+    """
+    path = system_status_path()
+    os.makedirs(path.parent, exist_ok=True)
+    with open(f"{path}.lock", 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        status = read_system_status()
+        status.update(sections)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(status, f, indent=4)
+        os.replace(tmp_path, path)
+    return status
+
 class StatusLogger:
-    def __init__(self, task_name="System"):
-        # Find the logs folder relative to this script
-        self.root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.log_file = os.path.join(self.root, 'logs', 'active_job.json')
+    """
+    Progress of one background job (retraining, ROI simulation, ...) for the admin dashboard.
+    Lines are kept in a bounded ring buffer (Config.JOB_LOG_LINES) and every update rewrites only
+    that bounded state, atomically (write + rename), to logs/jobs/<job_id>.json and
+    logs/active_job.json. Nothing is read back, so concurrent jobs cannot corrupt each other.
+    The job id comes from the caller, the JOB_ID environment variable (subprocesses) or is new.
+    """
+    def __init__(self, task_name="System", job_id=None):
+        self.config = Config()
+        self.log_file = job_path()
         self.task_name = task_name
-        
-        # Ensure logs dir exists
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        self.job_id = job_id or os.environ.get('JOB_ID') or new_job_id()
+        self.lines = deque(maxlen=self.config.JOB_LOG_LINES)
+        self.seq = 0  # lines logged so far; the buffer holds seq-len(lines)+1 .. seq
+        self.status, self.progress, self.started = "idle", 0, None
+        self.lock = threading.Lock()
+
+        # Ensure logs dirs exist
+        os.makedirs(os.path.dirname(job_path(self.job_id)), exist_ok=True)
 
     def start(self):
-        self._write({"status": "running", "task": self.task_name, "logs": [], "progress": 0})
+        """Marks the job as running (a restart, e.g. a fallback path, continues the same job)."""
+        self.status, self.progress = "running", 0
+        self.started = self.started or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._prune()
+        self._write()
 
     def log(self, message, progress=None):
         """Adds a log line and updates progress."""
-        data = self._read()
+        self._append(message, progress)
+        self._write()
+
+    def complete(self, success=True):
+        self._append("Task Completed Successfully." if success else "Task Failed.", 100)
+        self.status = "completed" if success else "error"
+        self._write()
+
+    def _append(self, message, progress):
         timestamp = datetime.now().strftime("%H:%M:%S")
         entry = f"[{timestamp}] {message}"
-        
+
         print(entry) # Keep console output
-        
-        data['logs'].append(entry)
-        if progress is not None:
-            data['progress'] = progress
-            
-        self._write(data)
 
-    def complete(self, success=True):
-        self.log("Task Completed Successfully." if success else "Task Failed.")
-        data = self._read()
-        data['status'] = "completed" if success else "error"
-        data['progress'] = 100
-        self._write(data)
-
-    def _read(self):
-        if not os.path.exists(self.log_file):
-            return {"status": "idle", "logs": [], "progress": 0}
-        try:
-            with open(self.log_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {"status": "idle", "logs": [], "progress": 0}
-
-    def _write(self, data):
-        with open(self.log_file, 'w') as f:
-            json.dump(data, f)
\ No newline at end of file
+        with self.lock:
+            self.lines.append(entry)
+            self.seq += 1
+            if progress is not None:
+                self.progress = progress
+
+    def _write(self):
+        with self.lock:
+            data = {
+                "job_id": self.job_id,
+                "task": self.task_name,
+                "status": self.status,
+                "progress": self.progress,
+                "started": self.started,
+                "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "seq": self.seq,
+                "logs": list(self.lines),
+            }
+            for path in (job_path(self.job_id), self.log_file):
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+
+    def _prune(self):
+        """Keeps the newest Config.JOB_HISTORY job files."""
+        jobs_dir = os.path.dirname(job_path(self.job_id))
+        files = []
+        for name in os.listdir(jobs_dir):
+            try:
+                if name.endswith('.json'):
+                    files.append((os.path.getmtime(os.path.join(jobs_dir, name)), name))
+            except OSError:
+                pass  # removed by another job meanwhile
+        for _, name in sorted(files)[:max(0, len(files) - self.config.JOB_HISTORY + 1)]:
+            try:
+                os.remove(os.path.join(jobs_dir, name))
+            except OSError:
+                pass
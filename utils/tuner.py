@@ -1,28 +1,81 @@
-from sklearn.model_selection import TimeSeriesSplit, RandomizedSearchCV
+from sklearn.model_selection import TimeSeriesSplit, RandomizedSearchCV, ParameterSampler, cross_val_score
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, RandomForestRegressor, GradientBoostingRegressor
 import numpy as np
+import json
+import math
+import time
 import sys
 import os
+from datetime import datetime
 
 # Allow importing config
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.config import Config
 
+class TrialStore:
+    """
+    Persistent, append-only record of every tuning trial (JSON lines).
+    One line = {model_type, mode, params, resource, data_version, score, seconds, timestamp}.
+    Lets a weekly retrain warm-start from the best known configs and skip
+    configs already scored on the same data.
+    """
+    def __init__(self, path=None):
+        self.config = Config()
+        self.path = path or self.config.TRIAL_STORE_PATH
+
+    @staticmethod
+    def key(params):
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def load(self, model_type, mode):
+        if not os.path.exists(self.path):
+            return []
+        trials = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    t = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # tolerate a torn last line
+                if t.get('model_type') == model_type and t.get('mode') == mode:
+                    trials.append(t)
+        return trials
+
+    def record(self, trial):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        trial = dict(trial, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        # One write per line keeps concurrent appends from parallel training workers intact
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(trial, default=str) + "\n")
+
+    @staticmethod
+    def best_params(trials, k):
+        """Top-k distinct configs, ranked by their score at the largest resource they reached."""
+        best = {}
+        for t in trials:
+            key = TrialStore.key(t['params'])
+            if key not in best or (t['resource'], t['score']) > (best[key]['resource'], best[key]['score']):
+                best[key] = t
+        ranked = sorted(best.values(), key=lambda t: (t['resource'], t['score']), reverse=True)
+        return [t['params'] for t in ranked[:k]]
+
 class HyperparameterTuner:
     def __init__(self):
         self.config = Config()
         # TimeSeriesSplit prevents "future data leakage"
         # We perform 3 splits (train on past, test on near future)
         self.cv = TimeSeriesSplit(n_splits=3)
+        self.trials = TrialStore()
 
-    def tune(self, model_type, mode, X, y, n_iter=10):
+    def tune(self, model_type, mode, X, y, n_iter=10, n_jobs=-1, strategy='random', data_version=None, time_budget=None):
         """
         Finds the best parameters for a given model type.
         :param model_type: 'rf' (Random Forest) or 'gb' (Gradient Boosting)
         :param mode: 'classification' (Win/Loss) or 'regression' (Goals)
+        :param n_jobs: CPU cores for the search (-1 = all; parallel training passes its share)
+        :param strategy: 'random' (RandomizedSearchCV) or 'halving' (budgeted successive halving, see tune_halving)
         """
-        print(f"🔧 Tuning {model_type.upper()} ({mode}) with {n_iter} iterations...")
-        
         # 1. Select the Base Algorithm & Param Grid
         if model_type == 'rf':
             model, param_grid = self._get_rf_config(mode)
@@ -32,6 +85,12 @@ class HyperparameterTuner:
             print("⚠️ Neural Networks require manual tuning. Skipping.")
             return {}
 
+        if strategy == 'halving':
+            return self.tune_halving(model_type, mode, X, y, n_jobs=n_jobs,
+                                     data_version=data_version, time_budget=time_budget)
+
+        print(f"🔧 Tuning {model_type.upper()} ({mode}) with {n_iter} iterations...")
+
         # 2. Run Randomized Search (Faster than Grid Search)
         search = RandomizedSearchCV(
             estimator=model,
@@ -39,7 +98,7 @@ class HyperparameterTuner:
             n_iter=n_iter,
             cv=self.cv,
             scoring='accuracy' if mode == 'classification' else 'neg_mean_squared_error',
-            n_jobs=-1, # Use all CPU cores
+            n_jobs=n_jobs, # -1 uses all CPU cores
             random_state=42,
             verbose=1
         )
@@ -49,6 +108,94 @@ class HyperparameterTuner:
         print(f"✅ Best Params found: {search.best_params_}")
         return search.best_params_
 
+    def tune_halving(self, model_type, mode, X, y, n_candidates=9, eta=3, n_jobs=-1,
+                     data_version=None, time_budget=None):
+        """
+        Successive halving over `n_estimators`:
+        every candidate starts with a small ensemble, only the best 1/eta survive each round
+        and get eta times more trees, until the full grid maximum is reached.
+
+        - Warm start: the best configs from previous runs (TrialStore) are always candidates.
+        - Cache: a (params, n_estimators, data_version) already scored is not refitted.
+        - Budget: stops once `time_budget` seconds are spent and returns the best config so far.
+        """
+        if model_type == 'rf':
+            model, param_grid = self._get_rf_config(mode)
+        else:
+            model, param_grid = self._get_gb_config(mode)
+        scoring = 'accuracy' if mode == 'classification' else 'neg_mean_squared_error'
+        time_budget = time_budget or self.config.TUNING_TIME_BUDGET
+        deadline = time.perf_counter() + time_budget
+
+        # 1. Resource schedule (n_estimators grows by eta each round)
+        search_grid = {k: v for k, v in param_grid.items() if k != 'n_estimators'}
+        max_resource = max(param_grid['n_estimators'])
+        n_rounds = max(1, math.ceil(math.log(n_candidates, eta)) + 1)
+        schedule = [max(10, max_resource // eta ** (n_rounds - 1 - i)) for i in range(n_rounds)]
+        resource = schedule[0]
+
+        # 2. Candidates = best previous configs + fresh random samples
+        history = self.trials.load(model_type, mode)
+        warm = TrialStore.best_params(history, k=eta)
+        sampled = list(ParameterSampler(search_grid, n_iter=n_candidates, random_state=42))
+        candidates, seen = [], set()
+        for params in warm + sampled:
+            key = TrialStore.key(params)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+        candidates = candidates[:max(n_candidates, len(warm))]
+
+        cached = {(TrialStore.key(t['params']), t['resource']): t['score']
+                  for t in history if t.get('data_version') == data_version}
+
+        print(f"🔧 Tuning {model_type.upper()} ({mode}) by successive halving: "
+              f"{len(candidates)} candidates ({len(warm)} warm-started), budget {time_budget}s...")
+
+        # 3. Rounds
+        best_params, best_score, best_resource = candidates[0], -np.inf, 0
+        fits, hits = 0, 0
+        while candidates:
+            scores = []
+            for params in candidates:
+                key = (TrialStore.key(params), resource)
+                if key in cached:
+                    score = cached[key]
+                    hits += 1
+                else:
+                    if time.perf_counter() > deadline:
+                        break
+                    t0 = time.perf_counter()
+                    est = clone(model).set_params(n_estimators=resource, **params)
+                    score = float(np.mean(cross_val_score(est, X, y, cv=self.cv, scoring=scoring, n_jobs=n_jobs)))
+                    fits += 1
+                    self.trials.record({
+                        'model_type': model_type, 'mode': mode, 'params': params, 'resource': resource,
+                        'data_version': data_version, 'score': score, 'seconds': time.perf_counter() - t0,
+                    })
+                scores.append((score, params))
+
+            if scores:
+                # Later rounds use more trees, so their winner supersedes earlier ones
+                top_score, top_params = max(scores, key=lambda s: s[0])
+                best_params, best_score, best_resource = top_params, top_score, resource
+                print(f"   - n_estimators={resource}: {len(scores)} scored, best {top_score:.4f}")
+
+            if time.perf_counter() > deadline:
+                print(f"   ⏱️ Time budget reached after {fits} fits. Using best so far.")
+                break
+            if resource >= max_resource:
+                break
+
+            # Keep the top 1/eta, give them eta times more trees
+            keep = max(1, len(scores) // eta)
+            candidates = [p for _, p in sorted(scores, key=lambda s: s[0], reverse=True)[:keep]]
+            resource = schedule[min(schedule.index(resource) + 1, n_rounds - 1)]
+
+        best = dict(best_params, n_estimators=best_resource or resource)
+        print(f"✅ Best Params found: {best} ({fits} fits, {hits} cached)")
+        return best
+
     def _get_rf_config(self, mode):
         """Returns Random Forest model and search grid."""
         if mode == 'classification':